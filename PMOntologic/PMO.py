@@ -1,5 +1,6 @@
 
 from Tasks.task import Task
+from Tasks.task_table import TaskTable
 from PMOntologic.Resource import Resource
 
 # Class representing a Project
@@ -11,6 +12,12 @@ class Project:
         self.risks = risks
         self.opportunities = opportunities 
         self.resources = {resource.id : resource for resource in resources} # {resource_id : Resource}
+        self.task_table = TaskTable.from_project(self)  # Tabla de las tareas, las tareas son vistas sobre ella
+
+    @property
+    def dependency_index(self):
+        # Índice de dependencias de las tareas del proyecto, construido una sola vez (ver DependencyIndex)
+        return self.task_table.dependency_index()
 
     def add_task(self, task):
         self.tasks.append(task)
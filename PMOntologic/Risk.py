@@ -1,6 +1,7 @@
 # Class representing a Risk in the project
 
 import random
+import numpy as np
 from Simulation.PMAgent import PMAgent
 
 
@@ -35,12 +36,14 @@ class Risk:
 
     # Evento: Dependencias no cumplidas
     def unfulfilled_dependences(self, PM: PMAgent , time : int) -> bool:
-        for task in PM.project.tasks.values():
-            if task.status == 0:  # Si la tarea no ha comenzado
-                for dependency in task.dependencies:
-                    if PM.beliefs['tasks'][dependency.id] == -1:  # Si alguna dependencia fallo
-                        return True
-        return False
+        # Máscara de las tareas que fallaron, comparada con las dependencias de cada tarea en el
+        # índice de dependencias del proyecto
+        table = PM.project.task_table
+        failed = [table.index[task] for task, state in PM.beliefs['tasks'].items() if state == -1 and task in table.index]
+        if len(failed) == 0:
+            return False
+        blocked = PM.project.dependency_index.blocked_by(PM.project.dependency_index.mask(failed))
+        return bool(np.any(blocked & (table.status == 0)))  # Alguna tarea sin comenzar con una dependencia fallida
 
     # Evento: Falta de personal
     def lack_of_staff(self, PM: PMAgent, time : int) -> bool:
@@ -50,7 +53,8 @@ class Risk:
 
     # Evento: Baja productividad
     def low_productivity(self, PM: PMAgent, time: int) -> bool:
-        incomplete_tasks_reward = sum(task.reward for task in PM.project.tasks.values() if task.status == 0)
+        table = PM.project.task_table
+        incomplete_tasks_reward = table.reward[table.status == 0].sum()
         return incomplete_tasks_reward < PM.beliefs['max_reward'] * 0.25 and time > PM.beliefs['project_average_time'] * 0.5
 
     # Evento: Baja experiencia del equipo
@@ -63,8 +67,9 @@ class Risk:
 
     # Evento: Baja prioridad
     def low_priority(self, PM: PMAgent, time: int) -> bool:
-        total_priority = sum(task.priority for task in PM.project.tasks.values())
-        completed_priority = sum(task.priority for task in PM.project.tasks.values() if task.status == 1)
+        table = PM.project.task_table
+        total_priority = table.priority.sum()
+        completed_priority = table.priority[table.status == 1].sum()
         return completed_priority < total_priority * 0.3 and time > PM.beliefs['project_average_time'] * 0.5
 
 ######################## Clases de riesgos #########################
@@ -1,14 +1,27 @@
 from collections import deque
 import random
+import time
+import numpy as np
 from PMOntologic.PMO import *
 from Simulation.Rule import Agent, Rule
 from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Island_model import IslandModel, shared_island_executor
 from Tasks.GeneticAlgorithm.Tasks_combination import Tasks_combination, optimization_function
+from Tasks.GeneticAlgorithm.Fitness_cache import FitnessCache
+from Tasks.GeneticAlgorithm.Local_search import LocalSearch
+from Tasks.GeneticAlgorithm.List_scheduler import list_schedule
+from Tasks.GeneticAlgorithm.Mutation_operators import warm_start_permutations
+from Tasks.GeneticAlgorithm.Multi_objective import PLANNER_OBJECTIVES
+from Tasks.GeneticAlgorithm.Resource_evaluation import ResourceAwareObjective
+from Tasks.GeneticAlgorithm.Schedule_decoder import ParallelScheduleObjective
+from Tasks.task_table import TaskTable
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import functools
 import json
 
+# Probabilidad de mutación de cada posición de los hijos en las optimizaciones del agente
+PLANNER_MUTATION_PROB = 0.02
+
 class PMperception ():
     def __init__ (self,
                   reward,
@@ -93,14 +106,54 @@ class PMAction():
 
 
 class PMAgent(Agent):
-    def __init__(self, min_motivation_team, initial_perception, rules, active_rules, ordered_tasks = None, project:Project = None, risky : float = 0.2, work_prob = 0.1, cooperation_prob = 0.5, exploration_rate : float = 0.1, generate_rules = False):
+    def __init__(self, min_motivation_team, initial_perception, rules, active_rules, ordered_tasks = None, project:Project = None, risky : float = 0.2, work_prob = 0.1, cooperation_prob = 0.5, exploration_rate : float = 0.1, generate_rules = False, planning_time_budget : float = 5.0, n_islands : int = 1, local_search : str = None, planner : str = 'genetic', resource_aware : bool = False, n_workers : int = None, progress_evaluator = None, replan_on_change : bool = True):
         self.perception = initial_perception
         self.project = project if project != None else Project()
+        # Valores de la función objetivo ya calculados, compartidos por todas las planificaciones
+        self.fitness_cache = FitnessCache()
+        # Tiempo máximo (segundos) de cada búsqueda del orden de las tareas
+        self.planning_time_budget = planning_time_budget
+        # Número de islas del algoritmo genético (1 usa una sola población)
+        self.n_islands = n_islands
+        # Refinamiento por búsqueda local del resultado del algoritmo genético:
+        # None, "hill_climbing", "annealing" o "memetic"
+        self.local_search = local_search
+        # Planificador del orden de las tareas: 'genetic' (algoritmo genético), 'list' (reglas de
+        # prioridad, determinista y mucho más rápido en proyectos grandes) o 'pareto' (algoritmo
+        # genético multiobjetivo, cuyo frente de Pareto sirve a cada modo de prioridad)
+        if planner not in ['genetic', 'list', 'pareto']:
+            raise Exception("El planificador debe ser 'genetic', 'list' o 'pareto'")
+        self.planner = planner
+        # Función objetivo del algoritmo genético: con resource_aware también penaliza sobregirar los
+        # recursos del proyecto y empezar las tareas antes de su inicio
+        self.resource_aware = resource_aware
+        # Con n_workers la función objetivo reparte las tareas entre ese número de trabajadores en
+        # lugar de ejecutarlas una detrás de otra (ver ParallelScheduleObjective)
+        if n_workers is not None and resource_aware:
+            raise Exception("resource_aware y n_workers no se pueden usar a la vez")
+        self.n_workers = n_workers
+        # Evaluador difuso del progreso (un CompiledFuzzySystem); None usa el compartido progress_system()
+        self.progress_evaluator = progress_evaluator
+        # Última función objetivo de planning_objective y los valores con los que se construyó: se
+        # reutiliza mientras no cambien, para que la caché de la función objetivo acierte entre
+        # planificaciones (la caché distingue las funciones por objeto)
+        self._objective_key = None
+        self._objective = None
+        self.objective_function = self.planning_objective({resource.id : resource.total for resource in self.project.resources.values()})
+        # Replanificar las tareas pendientes (ver replan) en el paso siguiente a un cambio del
+        # proyecto: una tarea fallida o con problemas, o una tarea acortada (work_on) o dividida
+        # (cooperación) por el PM
+        self.replan_on_change = replan_on_change
+        self.plan_outdated = False
+        self.failed_tasks = 0
+        # Población con el frente de Pareto (planner 'pareto') y prioridad con la que se ordenó
+        self.pareto_population = None
+        self.planned_priority = None
         self.ordered_tasks = deque(self.get_best_permutation([task for task in self.project.tasks.values()])) if ordered_tasks == None else ordered_tasks
         self.risky = risky
         self.min_motivation_team = min_motivation_team
         self.milestones_count = 0
-        self.average_time = sum([task.duration + 0.5 * task.difficulty for task in self.project.tasks.values()]) / len(self.project.tasks)
+        self.average_time = float(np.mean(self.project.task_table.duration + 0.5 * self.project.task_table.difficulty))
         self.work_prob = work_prob
         self.exploration_rate = exploration_rate
         self.generate_rules = generate_rules
@@ -204,6 +257,7 @@ class PMAgent(Agent):
         for task_id in self.perception.problems :
             if task_id not in self.beliefs['problems']:
                 self.beliefs['problems'].append(task_id)
+                self.plan_outdated = True
             if task_id in self.beliefs['solutions'].keys():
                 #print('disminuyendo probabilidad de ' + self.beliefs['solutions'][task_id] + ' al no resultar efectivo')
                 if self.beliefs['solutions'][task_id] == 'cooperation_prob' :
@@ -239,6 +293,12 @@ class PMAgent(Agent):
         if self.perception.actual_time % 150 == 0 :
             self.generate_milestones(5)
 
+        # Tareas que han fallado desde el último paso
+        failed_tasks = int(np.count_nonzero(self.project.task_table.status == -1))
+        if failed_tasks > self.failed_tasks:
+            self.plan_outdated = True
+        self.failed_tasks = failed_tasks
+
         if verbose:
             print('Creencias actualizadas del PM :')
             print("----------------------")
@@ -412,6 +472,7 @@ class PMAgent(Agent):
             if self.desires['rewards'] : priority = 'reward'
             if self.desires['on_time'] : priority = 'time'
             # Si hay mas de una prioridad se sobrescribe, este orden es arbitrario 
+            self.plan_for_priority(priority)
 
         # Mandamos a optimizar recursos que sean necesarios
         optimize = []
@@ -457,6 +518,10 @@ class PMAgent(Agent):
                 if self.beliefs['workers'][worker][0] == 1 and self.beliefs['ask_report_at'][worker] <= self.perception.actual_time:
                     ask_reports.append(worker)
 
+        # El medio acorta la tarea de work_on y divide las de las cooperaciones en este paso
+        if work_on != None or len(cooperations) > 0:
+            self.plan_outdated = True
+
         return PMAction(assignments=assignments, ask_reports=ask_reports, reassign=reassign, work_on=work_on, cooperations=cooperations, motivate=motivate, priority=priority, optimize=optimize, take_chance=opportunity_taken)
 
 
@@ -465,6 +530,10 @@ class PMAgent(Agent):
     def act(self, P : PMperception, verbose = False) -> PMAction:
         self.perception = P
         self.brf(verbose=verbose)
+        # Se reordenan las tareas pendientes con los valores actuales del proyecto
+        if self.replan_on_change and self.plan_outdated:
+            self.plan_outdated = False
+            self.replan()
         self.generate_desires(verbose=verbose)
         self.generate_intentions(verbose=verbose)
         return self.execute_intentions(verbose=verbose)
@@ -484,10 +553,142 @@ class PMAgent(Agent):
 
     # Buscamos el orden de taras mas optimo
     def get_best_permutation(self,tasks) :
-        population = Population(50, tasks )
-        population.optimize(optimization_function, 'maximize', n_generations=20 , distribution="aleatoria", mutation_pob=10)
+        # La búsqueda local solo usa el tiempo que el planificador deja de planning_time_budget
+        start = time.time()
+        if self.planner == 'list':
+            table = TaskTable(tasks)
+            order, _ = list_schedule(tasks, table)
+            return self.refine_permutation(order, table, self.remaining_budget(start))
+        if self.planner == 'pareto':
+            # Una sola optimización da el frente de Pareto del que elige cada modo de prioridad
+            population = Population(50, tasks)
+            population.optimize_multiobjective(objectives=PLANNER_OBJECTIVES, n_generations=100,
+                                               time_budget=self.planning_time_budget)
+            self.pareto_population = population
+            return population.select_from_front(None)
+        if self.n_islands > 1:
+            # Cada isla evoluciona en su propio proceso y comparte sus mejores individuos
+            # El pool de procesos se comparte entre planificaciones y, en un solo proceso, se usa la
+            # caché de la función objetivo del agente
+            islands = IslandModel(self.n_islands, 50, tasks)
+            executor = shared_island_executor(islands.n_jobs) if islands.n_jobs > 1 else None
+            islands.optimize(self.objective_function, 'maximize', n_generations=100, migration_interval=10,
+                             time_budget=self.remaining_budget(start), fitness_cache=self.fitness_cache,
+                             executor=executor, distribution="aleatoria", mutation_prob=PLANNER_MUTATION_PROB,
+                             vectorized=True)
+            return self.refine_permutation(islands.optimal_variable_values, islands.task_table,
+                                           self.remaining_budget(start))
+        population = Population(50, tasks, fitness_cache=self.fitness_cache)
+        # Se detiene al estancarse el mejor fitness, al colapsar la diversidad o al agotar el tiempo
+        population.optimize(self.objective_function, 'maximize', n_generations=100, distribution="aleatoria",
+                            mutation_prob=PLANNER_MUTATION_PROB,
+                            early_stopping=True, stopping_rounds=8, stopping_tolerance=1e-9, min_diversity=0.01,
+                            time_budget=self.planning_time_budget, vectorized=True)
         # print(population.optimal_variable_values)
-        return population.optimal_variable_values
+        return self.refine_permutation(population.optimal_variable_values, population.task_table,
+                                       self.remaining_budget(start))
+
+    def remaining_budget(self, start, time_budget=None):
+        '''
+            Segundos que quedan de `time_budget` (por defecto planning_time_budget) desde `start`
+        '''
+        if time_budget is None:
+            time_budget = self.planning_time_budget
+        return max(time_budget - (time.time() - start), 0)
+
+    def replan(self, time_budget=None, n_individuals=50, perturbation=0.05, verbose=False):
+        '''
+            Vuelve a optimizar el orden de las tareas que quedan en `ordered_tasks` partiendo del plan
+            actual: la población inicial es el plan actual, copias perturbadas de él (tres cuartas
+            partes) y permutaciones aleatorias. Con elitismo el resultado nunca es peor que el plan
+            actual. Se detiene al agotar `time_budget` segundos (por defecto la mitad de
+            `planning_time_budget`), así que puede llamarse en cada paso de la simulación
+        '''
+        tasks = [task for task in self.ordered_tasks if task.status != 1]
+        if len(tasks) < 2:
+            self.ordered_tasks = deque(tasks)
+            return tasks
+        if time_budget is None:
+            time_budget = self.planning_time_budget / 2
+        # La tabla lee los valores actuales de las tareas (duraciones reducidas, etc.) y el plan
+        # actual es la permutación identidad sobre ella
+        start = time.time()
+        table = TaskTable(tasks)
+        permutations = warm_start_permutations(np.arange(len(tasks)), table,
+                                               max(n_individuals - n_individuals // 4, 1), rate=perturbation)
+        population = Population(n_individuals, table, fitness_cache=self.fitness_cache,
+                                permutations=permutations)
+        # Se replanifica con los recursos que quedan disponibles
+        population.optimize(self.planning_objective(self.beliefs['resources'], self.known_problem_solving()), 'maximize', n_generations=100, distribution="aleatoria",
+                            mutation_prob=PLANNER_MUTATION_PROB,
+                            early_stopping=True, stopping_rounds=8, stopping_tolerance=1e-9,
+                            time_budget=time_budget, vectorized=True, verbose=verbose)
+        self.ordered_tasks = deque(self.refine_permutation(population.optimal_variable_values, table,
+                                                           self.remaining_budget(start, time_budget)))
+        return list(self.ordered_tasks)
+
+    def planning_objective(self, budget, problem_solving=None):
+        '''
+            Función objetivo de la planificación: `optimization_function`, con `resource_aware` una
+            `ResourceAwareObjective` con el presupuesto de recursos `budget`, o con `n_workers` una
+            `ParallelScheduleObjective` con las capacidades `problem_solving` de los trabajadores.
+            Devuelve la misma instancia mientras el presupuesto o las capacidades no cambien
+        '''
+        if self.n_workers is not None:
+            key = None if problem_solving is None else tuple(problem_solving)
+        elif self.resource_aware:
+            key = tuple(sorted(budget.items()))
+        else:
+            return optimization_function
+        if self._objective is None or key != self._objective_key:
+            self._objective_key = key
+            if self.n_workers is not None:
+                self._objective = ParallelScheduleObjective(self.n_workers, problem_solving)
+            else:
+                self._objective = ResourceAwareObjective(budget)
+        return self._objective
+
+    def known_problem_solving(self):
+        '''
+            Capacidad de resolver problemas de los `n_workers` trabajadores, o None si todavía no se
+            conoce la de todos
+        '''
+        if self.n_workers is None or len(self.beliefs['workers']) != self.n_workers:
+            return None
+        values = [worker[1] for worker in self.beliefs['workers'].values()]
+        if any(value is None or value <= 0 for value in values):
+            return None
+        return values
+
+    def plan_for_priority(self, priority):
+        '''
+            Reordena las tareas pendientes según el orden del frente de Pareto más adecuado para el
+            modo de prioridad ('tasks', 'priority', 'reward' o 'time'). Solo con el planificador
+            'pareto' y cuando la prioridad cambia
+        '''
+        if self.pareto_population is None or priority is None or priority == self.planned_priority:
+            return
+        self.planned_priority = priority
+        order = self.pareto_population.select_from_front(priority)
+        position = {task.id : i for i, task in enumerate(order)}
+        self.ordered_tasks = deque(sorted(self.ordered_tasks, key=lambda task: position.get(task.id, len(position))))
+
+    def refine_permutation(self, tasks, table, time_budget=None):
+        '''
+            Pule el orden de tareas del planificador con la búsqueda local `self.local_search`
+            (ver `LocalSearch`), que evalúa cada movimiento de forma incremental, durante `time_budget`
+            segundos (por defecto planning_time_budget; los planificadores pasan lo que les sobra de
+            él). Sin búsqueda local devuelve el orden tal cual
+        '''
+        # La búsqueda local optimiza optimization_function, que no tiene en cuenta los recursos ni
+        # el reparto entre varios trabajadores
+        if self.local_search is None or self.resource_aware or self.n_workers is not None or len(tasks) < 2:
+            return tasks
+        if time_budget is None:
+            time_budget = self.planning_time_budget
+        permutation, _ = LocalSearch(table).refine(table.encode(tasks), method=self.local_search,
+                                                   time_budget=time_budget)
+        return table.decode(permutation)
     
     
     def generate_milestones(self, n: int):
@@ -495,18 +696,13 @@ class PMAgent(Agent):
         Genera hitos y proyecciones para el proyecto utilizando lógica difusa para
         valorar la situación del equipo y ajustar el tipo de hitos.
         """
-        without = 0
-        with_ = 0
-        reward = 0
-        count = 0
-
         # Generamos los hitos basados en la valoración del tipo
-        for task in self.project.tasks.values():
-            if task.status == 0:
-                count += 1
-                without += task.duration
-                with_ += task.difficulty
-                reward += task.reward
+        table = self.project.task_table
+        pending = table.status == 0
+        count = int(np.count_nonzero(pending))
+        without = table.duration[pending].sum().item()
+        with_ = table.difficulty[pending].sum().item()
+        reward = table.reward[pending].sum().item()
         project_average_time = (2 * without + with_) // 2
         self.beliefs['project_average_time'] = project_average_time
         self.beliefs['max_reward'] = reward
@@ -527,17 +723,12 @@ class PMAgent(Agent):
         reward = (self.beliefs['reward'] / self.beliefs['max_reward']) * 100
         project = self.beliefs['project'] / self.beliefs['project_average_time'] * 100
         
-        # Pasamos los datos al sistema difuso
-        progress_evaluation.input['motivation'] = motivation_value
-        progress_evaluation.input['problem_solving'] = problem_solving_value
-        progress_evaluation.input['reward'] = reward
-        progress_evaluation.input['progress'] = project
-        
-        # Ejecutamos la simulación difusa para obtener como va el proyecto
-        progress_evaluation.compute()
-        if 'progress_evaluation' in progress_evaluation.output.keys():
-            progress_evaluation_value = progress_evaluation.output['progress_evaluation']
-        else: # En caso de que ninguna regla cubra el caso 
+        # Evaluamos el sistema difuso compilado para obtener como va el proyecto
+        evaluator = self.progress_evaluator if self.progress_evaluator is not None else progress_system()
+        output = evaluator.compute(motivation=motivation_value, problem_solving=problem_solving_value,
+                                   reward=reward, progress=project)
+        progress_evaluation_value = output['milestone_type']
+        if np.isnan(progress_evaluation_value): # En caso de que ninguna regla cubra el caso
             progress_evaluation_value = 50
 
         # Evaluamos las reglas creadas por el propio agente segun su efectividad al aplicarlas
@@ -862,98 +1053,117 @@ class DeleteActiveRule(Rule):
 
 # ¿Por qué no usar lógica difusa para que nuestro agente valore la situación del proyecto y genere hitos a corde?
 
-import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-
-# Definir las variables difusas 
-motivation = ctrl.Antecedent(np.arange(0, 101, 1), 'motivation')
-problem_solving = ctrl.Antecedent(np.arange(0, 101, 1), 'problem_solving')
-reward = ctrl.Antecedent(np.arange(0, 101, 1), 'reward')
-progress = ctrl.Antecedent(np.arange(0, 101, 1), 'progress')
-
-# Definir la salida difusa (tipo de hitos)
-progress_evaluation = ctrl.Consequent(np.arange(0, 101, 1), 'milestone_type')
-
-# Funciones de pertenencia para la motivación
-motivation['low'] = fuzz.trimf(motivation.universe, [0, 0, 50])
-motivation['medium'] = fuzz.trimf(motivation.universe, [30, 50, 70])
-motivation['high'] = fuzz.trimf(motivation.universe, [50, 100, 100])
-
-# Funciones de pertenencia para la capacidad de resolución de problemas
-problem_solving['low'] = fuzz.trimf(problem_solving.universe, [0, 0, 50])
-problem_solving['medium'] = fuzz.trimf(problem_solving.universe, [30, 50, 70])
-problem_solving['high'] = fuzz.trimf(problem_solving.universe, [50, 100, 100])
-
-# Funciones de pertenencia para el progreso del proyecto
-progress['low'] = fuzz.trimf(progress.universe, [0, 0, 50])
-progress['medium'] = fuzz.trimf(progress.universe, [30, 50, 70])
-progress['high'] = fuzz.trimf(progress.universe, [50, 100, 100])
-
-# Funciones de pertenencia para las recompensas del proyecto
-reward['low'] = fuzz.trimf(reward.universe, [0, 0, 50])
-reward['medium'] = fuzz.trimf(reward.universe, [30, 50, 70])
-reward['high'] = fuzz.trimf(reward.universe, [50, 100, 100])
-
-# Funciones de pertenencia para el tipo de hitos
-progress_evaluation['bad'] = fuzz.trimf(progress_evaluation.universe, [0, 0, 50])
-progress_evaluation['normal'] = fuzz.trimf(progress_evaluation.universe, [30, 50, 70])
-progress_evaluation['good'] = fuzz.trimf(progress_evaluation.universe, [50, 100, 100])
-
-# Crear reglas
-# Regla 1: Si la motivación es baja y la capacidad de resolución de problemas es baja, entonces el proyecto va mal.
-rule1 = ctrl.Rule(motivation['low'] & problem_solving['low'], progress_evaluation['bad'])
-# Regla 2: Si la motivación es media y la capacidad de resolución de problemas es media, entonces el proyecto va normal.
-rule2 = ctrl.Rule(motivation['medium'] & problem_solving['medium'], progress_evaluation['normal'])
-# Regla 3: Si la motivación es alta y la capacidad de resolución de problemas es alta, entonces el proyecto va bien.
-rule3 = ctrl.Rule(motivation['high'] & problem_solving['high'], progress_evaluation['good'])
-# Regla 4: Si el progreso del proyecto es bajo y las recompensas son bajas, el proyecto va mal.
-rule4 = ctrl.Rule(progress['low'] & reward['low'], progress_evaluation['bad'])
-# Regla 5: Si el progreso del proyecto es medio y las recompensas son medias, el proyecto va normal.
-rule5 = ctrl.Rule(progress['medium'] & reward['medium'], progress_evaluation['normal'])
-# Regla 6: Si el progreso del proyecto es alto y las recompensas son altas, el proyecto va bien.
-rule6 = ctrl.Rule(progress['high'] & reward['high'], progress_evaluation['good'])
-# Regla 7: Si la motivación es alta pero la capacidad de resolución de problemas es baja, y el progreso es bajo, el proyecto va mal (aunque haya buena motivación, se tienen problemas serios).
-rule7 = ctrl.Rule(motivation['high'] & problem_solving['low'] & progress['low'], progress_evaluation['bad'])
-# Regla 8: Si la motivación es media y la resolución de problemas es media, pero las recompensas son bajas, el proyecto va mal.
-rule8 = ctrl.Rule(motivation['medium'] & problem_solving['medium'] & reward['low'], progress_evaluation['bad'])
-# Regla 9: Si la motivación es alta y la capacidad de resolución de problemas es media, y el progreso es medio, el proyecto va normal.
-rule9 = ctrl.Rule(motivation['high'] & problem_solving['medium'] & progress['medium'], progress_evaluation['normal'])
-# Regla 10: Si la motivación es alta, la capacidad de resolución de problemas es alta y las recompensas son altas, el proyecto va bien.
-rule10 = ctrl.Rule(motivation['high'] & problem_solving['high'] & reward['high'], progress_evaluation['good'])
-# Regla 11: Si todas las variables son bajas, el proyecto va mal.
-rule11 = ctrl.Rule(motivation['low'] & problem_solving['low'] & progress['low'] & reward['low'], progress_evaluation['bad'])
-# Regla 12: Si todas las variables son medias, el proyecto va normal.
-rule12 = ctrl.Rule(motivation['medium'] & problem_solving['medium'] & progress['medium'] & reward['medium'], progress_evaluation['normal'])
-# Regla 13: Si todas las variables son altas, el proyecto va bien.
-rule13 = ctrl.Rule(motivation['high'] & problem_solving['high'] & progress['high'] & reward['high'], progress_evaluation['good'])
-# Regla 14: Si la motivación es baja y la recompensa es baja, el progreso es malo.
-rule14 = ctrl.Rule(motivation['low'] & reward['low'], progress_evaluation['bad'])
-# Regla 15: Si la motivación es media y la recompensa es alta, el progreso es normal.
-rule15 = ctrl.Rule(motivation['medium'] & reward['high'], progress_evaluation['normal'])
-# Regla 16: Si la capacidad de resolución de problemas es alta y el progreso es alto, el progreso es bueno.
-rule16 = ctrl.Rule(problem_solving['high'] & progress['high'], progress_evaluation['good'])
-# Regla 17: Si la capacidad de resolución de problemas es baja y el progreso es medio, el progreso es malo.
-rule17 = ctrl.Rule(problem_solving['low'] & progress['medium'], progress_evaluation['bad'])
-# Regla 18: Si el progreso es bajo y la recompensa es alta, el progreso es normal (compensación por recompensas).
-rule18 = ctrl.Rule(progress['low'] & reward['high'], progress_evaluation['normal'])
-# Regla 19: Si la motivación es alta, la capacidad de resolución de problemas es baja, pero la recompensa es alta, el progreso es normal.
-rule19 = ctrl.Rule(motivation['high'] & problem_solving['low'] & reward['high'], progress_evaluation['normal'])
-# Regla 20: Si la motivación es alta, el progreso es medio, y la recompensa es media, el progreso es bueno.
-rule20 = ctrl.Rule(motivation['high'] & progress['medium'] & reward['medium'], progress_evaluation['good'])
-
-# Crear el sistema de control difuso con todas las reglas
-progress_ctrl = ctrl.ControlSystem([
-    rule1, rule2, rule3, rule4, rule5, rule6, rule7, rule8, rule9, rule10,
-    rule11, rule12, rule13, rule14, rule15, rule16, rule17, rule18, rule19, rule20
-])
-progress_evaluation = ctrl.ControlSystemSimulation(progress_ctrl)
+from Tasks.fuzzy_compiler import SharedFuzzySystem
+
+def create_progress_control_system():
+    '''
+        Sistema de control difuso que valora como va el proyecto a partir de la motivación, la capacidad
+        de resolución de problemas, las recompensas y el progreso. skfuzzy solo se importa al construirlo
+    '''
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+
+    # Definir las variables difusas 
+    motivation = ctrl.Antecedent(np.arange(0, 101, 1), 'motivation')
+    problem_solving = ctrl.Antecedent(np.arange(0, 101, 1), 'problem_solving')
+    reward = ctrl.Antecedent(np.arange(0, 101, 1), 'reward')
+    progress = ctrl.Antecedent(np.arange(0, 101, 1), 'progress')
+
+    # Definir la salida difusa (tipo de hitos)
+    progress_evaluation = ctrl.Consequent(np.arange(0, 101, 1), 'milestone_type')
+
+    # Funciones de pertenencia para la motivación
+    motivation['low'] = fuzz.trimf(motivation.universe, [0, 0, 50])
+    motivation['medium'] = fuzz.trimf(motivation.universe, [30, 50, 70])
+    motivation['high'] = fuzz.trimf(motivation.universe, [50, 100, 100])
+
+    # Funciones de pertenencia para la capacidad de resolución de problemas
+    problem_solving['low'] = fuzz.trimf(problem_solving.universe, [0, 0, 50])
+    problem_solving['medium'] = fuzz.trimf(problem_solving.universe, [30, 50, 70])
+    problem_solving['high'] = fuzz.trimf(problem_solving.universe, [50, 100, 100])
+
+    # Funciones de pertenencia para el progreso del proyecto
+    progress['low'] = fuzz.trimf(progress.universe, [0, 0, 50])
+    progress['medium'] = fuzz.trimf(progress.universe, [30, 50, 70])
+    progress['high'] = fuzz.trimf(progress.universe, [50, 100, 100])
+
+    # Funciones de pertenencia para las recompensas del proyecto
+    reward['low'] = fuzz.trimf(reward.universe, [0, 0, 50])
+    reward['medium'] = fuzz.trimf(reward.universe, [30, 50, 70])
+    reward['high'] = fuzz.trimf(reward.universe, [50, 100, 100])
+
+    # Funciones de pertenencia para el tipo de hitos
+    progress_evaluation['bad'] = fuzz.trimf(progress_evaluation.universe, [0, 0, 50])
+    progress_evaluation['normal'] = fuzz.trimf(progress_evaluation.universe, [30, 50, 70])
+    progress_evaluation['good'] = fuzz.trimf(progress_evaluation.universe, [50, 100, 100])
+
+    # Crear reglas
+    # Regla 1: Si la motivación es baja y la capacidad de resolución de problemas es baja, entonces el proyecto va mal.
+    rule1 = ctrl.Rule(motivation['low'] & problem_solving['low'], progress_evaluation['bad'])
+    # Regla 2: Si la motivación es media y la capacidad de resolución de problemas es media, entonces el proyecto va normal.
+    rule2 = ctrl.Rule(motivation['medium'] & problem_solving['medium'], progress_evaluation['normal'])
+    # Regla 3: Si la motivación es alta y la capacidad de resolución de problemas es alta, entonces el proyecto va bien.
+    rule3 = ctrl.Rule(motivation['high'] & problem_solving['high'], progress_evaluation['good'])
+    # Regla 4: Si el progreso del proyecto es bajo y las recompensas son bajas, el proyecto va mal.
+    rule4 = ctrl.Rule(progress['low'] & reward['low'], progress_evaluation['bad'])
+    # Regla 5: Si el progreso del proyecto es medio y las recompensas son medias, el proyecto va normal.
+    rule5 = ctrl.Rule(progress['medium'] & reward['medium'], progress_evaluation['normal'])
+    # Regla 6: Si el progreso del proyecto es alto y las recompensas son altas, el proyecto va bien.
+    rule6 = ctrl.Rule(progress['high'] & reward['high'], progress_evaluation['good'])
+    # Regla 7: Si la motivación es alta pero la capacidad de resolución de problemas es baja, y el progreso es bajo, el proyecto va mal (aunque haya buena motivación, se tienen problemas serios).
+    rule7 = ctrl.Rule(motivation['high'] & problem_solving['low'] & progress['low'], progress_evaluation['bad'])
+    # Regla 8: Si la motivación es media y la resolución de problemas es media, pero las recompensas son bajas, el proyecto va mal.
+    rule8 = ctrl.Rule(motivation['medium'] & problem_solving['medium'] & reward['low'], progress_evaluation['bad'])
+    # Regla 9: Si la motivación es alta y la capacidad de resolución de problemas es media, y el progreso es medio, el proyecto va normal.
+    rule9 = ctrl.Rule(motivation['high'] & problem_solving['medium'] & progress['medium'], progress_evaluation['normal'])
+    # Regla 10: Si la motivación es alta, la capacidad de resolución de problemas es alta y las recompensas son altas, el proyecto va bien.
+    rule10 = ctrl.Rule(motivation['high'] & problem_solving['high'] & reward['high'], progress_evaluation['good'])
+    # Regla 11: Si todas las variables son bajas, el proyecto va mal.
+    rule11 = ctrl.Rule(motivation['low'] & problem_solving['low'] & progress['low'] & reward['low'], progress_evaluation['bad'])
+    # Regla 12: Si todas las variables son medias, el proyecto va normal.
+    rule12 = ctrl.Rule(motivation['medium'] & problem_solving['medium'] & progress['medium'] & reward['medium'], progress_evaluation['normal'])
+    # Regla 13: Si todas las variables son altas, el proyecto va bien.
+    rule13 = ctrl.Rule(motivation['high'] & problem_solving['high'] & progress['high'] & reward['high'], progress_evaluation['good'])
+    # Regla 14: Si la motivación es baja y la recompensa es baja, el progreso es malo.
+    rule14 = ctrl.Rule(motivation['low'] & reward['low'], progress_evaluation['bad'])
+    # Regla 15: Si la motivación es media y la recompensa es alta, el progreso es normal.
+    rule15 = ctrl.Rule(motivation['medium'] & reward['high'], progress_evaluation['normal'])
+    # Regla 16: Si la capacidad de resolución de problemas es alta y el progreso es alto, el progreso es bueno.
+    rule16 = ctrl.Rule(problem_solving['high'] & progress['high'], progress_evaluation['good'])
+    # Regla 17: Si la capacidad de resolución de problemas es baja y el progreso es medio, el progreso es malo.
+    rule17 = ctrl.Rule(problem_solving['low'] & progress['medium'], progress_evaluation['bad'])
+    # Regla 18: Si el progreso es bajo y la recompensa es alta, el progreso es normal (compensación por recompensas).
+    rule18 = ctrl.Rule(progress['low'] & reward['high'], progress_evaluation['normal'])
+    # Regla 19: Si la motivación es alta, la capacidad de resolución de problemas es baja, pero la recompensa es alta, el progreso es normal.
+    rule19 = ctrl.Rule(motivation['high'] & problem_solving['low'] & reward['high'], progress_evaluation['normal'])
+    # Regla 20: Si la motivación es alta, el progreso es medio, y la recompensa es media, el progreso es bueno.
+    rule20 = ctrl.Rule(motivation['high'] & progress['medium'] & reward['medium'], progress_evaluation['good'])
+
+    # Crear el sistema de control difuso con todas las reglas
+    progress_ctrl = ctrl.ControlSystem([
+        rule1, rule2, rule3, rule4, rule5, rule6, rule7, rule8, rule9, rule10,
+        rule11, rule12, rule13, rule14, rule15, rule16, rule17, rule18, rule19, rule20
+    ])
+    return progress_ctrl
+
+@functools.lru_cache(maxsize=None)
+def progress_control_system():
+    # Sistema de control difuso, construido la primera vez que se pide
+    return create_progress_control_system()
+
+# Sistema compilado a arrays que usa generate_milestones: el mismo resultado sin recorrer el grafo de skfuzzy.
+# progress_system() lo compila una sola vez y todos los agentes (y hilos) comparten el mismo, de solo lectura
+progress_system = SharedFuzzySystem(progress_control_system)
 
 
 ################################ RULES GENERATOR #########################################
 
 class RulesGenerator:
     def __init__(self, config_file='.env'):
+        # Dependencias opcionales: solo hacen falta si el agente genera reglas
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+
         load_dotenv(config_file)
         self.api_key = os.environ['GENAI_API_KEY']
         genai.configure(api_key=self.api_key)
@@ -54,6 +54,7 @@ class Environment():
 
 import csv
 import random
+import numpy as np
 from typing import List
 from PMOntologic.Opportunity import Opportunity
 from PMOntologic.Risk import Risk
@@ -173,7 +174,7 @@ class WorkCenter(Environment):
             'escalate_problem_count': self.escalate_problem_count,
             'cooperation_prob' : self.project_manager.beliefs['cooperation_prob'],
             'trust_in_agents': [(worker, t[1]) for worker,t in self.project_manager.beliefs['workers'].items()],
-            'completed_tasks' : sum([1 for task in self.project.tasks.values() if task.status == 1]),
+            'completed_tasks' : int(np.count_nonzero(self.project.task_table.status == 1)),
             # 'fail_tasks' : sum([1 for task in self.project.tasks.values() if task.status == -1]),
             'total_tasks': task_number,
             'pm_risky': pm_risky,
@@ -346,6 +347,7 @@ class WorkCenter(Environment):
                 task.duration = task.duration // 2
                 for resource in task.resources:
                     resource.total = resource.total // 2
+                self.project.task_table.refresh_resources(self.project.task_table.index[task_id])
                 for worker in self.workers:
                     if worker.id == agents[0] or worker.id == agents[1]:
                         worker.task_queue.insert(0, task)
@@ -378,11 +380,13 @@ class WorkCenter(Environment):
             if action.get_task:
                 agent.beliefs['task_progress'] = 0
                 agent.current_task = agent.task_queue.pop(0)
-                for task in agent.current_task.dependencies:
-                    if self.project.tasks[task.id].status == -1 :
+                # Estado de las dependencias de la tarea, leído de las columnas de la tabla del proyecto
+                table = self.project.task_table
+                for status in table.status[table.dependencies_of(table.index[agent.current_task.id])].tolist():
+                    if status == -1 :
                         self.project.tasks[agent.current_task.id].status = -1
                         break
-                    if self.project.tasks[task.id].status == 0:
+                    if status == 0:
                         agent.task_queue.append(agent.current_task)
                         agent.current_task = agent.task_queue.pop(0)
                 if agent.current_task.start > self.time and len(agent.task_queue) > 0:
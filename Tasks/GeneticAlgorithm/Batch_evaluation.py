@@ -0,0 +1,199 @@
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+
+
+def encode_population(individuals, table: TaskTable) -> np.ndarray:
+    """
+    Builds the 2-D index matrix of a population: row `k` holds the table
+    indices of the tasks of individual `k`, in permutation order.
+
+    Parameters
+    ----------
+    individuals : `list`
+        `Tasks_combination` individuals to encode.
+
+    table : `TaskTable`
+        table of the tasks being combined.
+
+    Returns
+    -------
+    index_matrix : `numpy.ndarray`
+        int64 array of shape (n_individuals, n_tasks).
+    """
+    if len(individuals) == 0:
+        return np.empty((0, len(table)), dtype=np.int64)
+    return np.stack([
+        individual.permutation if individual.table is table
+        else table.encode(individual.variable_values)
+        for individual in individuals
+    ]).astype(np.int64)
+
+
+def dependency_violations(index_matrix, table: TaskTable) -> np.ndarray:
+    """
+    Returns a boolean matrix with the same shape as `index_matrix` that is
+    ``True`` where the task at that position has at least one dependency that
+    is not placed before it in the permutation.
+    """
+    index_matrix = np.atleast_2d(index_matrix)
+    n_permutations, length = index_matrix.shape
+    rows = np.arange(n_permutations)[:, None]
+
+    # Position of each table task in each permutation (tasks that are not in
+    # the permutation are never completed).
+    position = np.full((n_permutations, len(table)), length, dtype=np.int64)
+    position[rows, index_matrix] = np.arange(length)
+
+    violated = np.broadcast_to(table.external_dependency, position.shape).copy()
+    tasks, dependencies = table.dependency_edges()
+    if len(tasks) > 0:
+        edge_violated = position[:, dependencies] >= position[:, tasks]
+        has_dependencies = np.flatnonzero(np.diff(table.dependency_ptr) > 0)
+        violated[:, has_dependencies] |= np.logical_or.reduceat(
+            edge_violated, table.dependency_ptr[has_dependencies], axis=1
+        )
+
+    return violated[rows, index_matrix]
+
+
+def score_terms(index_matrix, table: TaskTable, violated, start_time=0, previous_difficulty=None,
+                finish_time=None):
+    """
+    Per-position terms of `optimization_function` for the permutations (or
+    permutation suffixes) of `index_matrix`.
+
+    Parameters
+    ----------
+    index_matrix : `numpy.ndarray`
+        int array of shape (n_permutations, length).
+
+    table : `TaskTable`
+        table of the tasks being combined.
+
+    violated : `numpy.ndarray`
+        boolean array with the same shape as `index_matrix`, ``True`` where
+        the task has a dependency that is not placed before it.
+
+    start_time : `float`, optional
+        time already accumulated before the first position. (default ``0``)
+
+    previous_difficulty : `float`, optional
+        difficulty of the task placed just before the first position, ``None``
+        if the first position is the start of the permutation.
+        (default ``None``)
+
+    finish_time : `numpy.ndarray`, optional
+        finish time of the task at each position, with the same shape as
+        `index_matrix`, to use instead of the accumulated durations (for
+        example, the one of a schedule with several workers, see
+        `Schedule_decoder`). (default ``None``)
+
+    Returns
+    -------
+    rewards : `numpy.ndarray`
+        array of shape (n_permutations, 2 * length) with the reward terms, in
+        the order in which `optimization_function` adds them.
+
+    penalties : `numpy.ndarray`
+        array of shape (n_permutations, 3 * length) with the penalty terms, in
+        the order in which `optimization_function` adds them.
+
+    current_time : `numpy.ndarray`
+        accumulated time after each position.
+    """
+    n_permutations, length = index_matrix.shape
+    weight = 5 - table.priority[index_matrix]
+    deadline = table.deadline[index_matrix]
+    difficulty = table.difficulty[index_matrix]
+    if finish_time is None:
+        # The start time is the first term of the sum, as in the scalar loop
+        durations = np.column_stack([np.full(n_permutations, start_time), table.duration[index_matrix]])
+        current_time = np.cumsum(durations, axis=1)[:, 1:]
+    else:
+        current_time = np.asarray(finish_time)
+    late = current_time > deadline
+
+    variety = np.zeros((n_permutations, length), dtype=bool)
+    repeated = np.zeros((n_permutations, length), dtype=bool)
+    variety[:, 1:] = np.abs(difficulty[:, 1:] - difficulty[:, :-1]) > 10
+    repeated[:, 1:] = ~variety[:, 1:]
+    if previous_difficulty is not None and length > 0:
+        variety[:, 0] = np.abs(difficulty[:, 0] - previous_difficulty) > 10
+        repeated[:, 0] = ~variety[:, 0]
+
+    # Terms in the order optimization_function adds them at each position
+    rewards = np.stack([
+        np.where(late, 0.0, table.reward[index_matrix]),
+        np.where(variety, 5.0, 0.0),
+    ], axis=2).reshape(n_permutations, -1)
+    penalties = np.stack([
+        np.where(violated, weight * 100, 0.0),
+        np.where(late, (current_time - deadline) * weight, 0.0),
+        np.where(repeated, 2.0, 0.0),
+    ], axis=2).reshape(n_permutations, -1)
+
+    return rewards, penalties, current_time
+
+
+def batch_optimization_function(index_matrix, table: TaskTable) -> np.ndarray:
+    """
+    Vectorized version of `optimization_function`: scores every permutation of
+    `index_matrix` in a single pass over the columns of `table`.
+
+    Parameters
+    ----------
+    index_matrix : `numpy.ndarray`
+        int array of shape (n_permutations, n_tasks) with the table index of
+        the task at each position.
+
+    table : `TaskTable`
+        table of the tasks being combined.
+
+    Returns
+    -------
+    scores : `numpy.ndarray`
+        float64 array with the value of `optimization_function` for each row.
+
+    Notes
+    -----
+    Rewards and penalties are accumulated with `numpy.cumsum` over the terms
+    in the same order in which `optimization_function` adds them, so the
+    floating point result is identical to the scalar version, not just close.
+    """
+    index_matrix = np.atleast_2d(np.asarray(index_matrix, dtype=np.int64))
+    n_permutations, length = index_matrix.shape
+    if length == 0:
+        return np.zeros(n_permutations)
+
+    rewards, penalties, _ = score_terms(
+        index_matrix, table, dependency_violations(index_matrix, table)
+    )
+    return np.cumsum(rewards, axis=1)[:, -1] - np.cumsum(penalties, axis=1)[:, -1]
+
+
+# Objective functions with a vectorized counterpart
+BATCH_FUNCTIONS = {
+    optimization_function: batch_optimization_function,
+}
+
+
+def get_batch_function(objective_function):
+    """
+    Returns the vectorized counterpart of `objective_function`: the one
+    registered in `BATCH_FUNCTIONS`, or its `batch` method for callable
+    objectives that carry their own (see `ResourceAwareObjective`).
+
+    Raises
+    ------
+    Exception
+        If `objective_function` has no vectorized version.
+    """
+    if callable(getattr(objective_function, "batch", None)):
+        return objective_function.batch
+    if objective_function not in BATCH_FUNCTIONS:
+        raise Exception(
+            "The objective function " + getattr(objective_function, "__name__", str(objective_function))
+            + " has no vectorized version."
+        )
+    return BATCH_FUNCTIONS[objective_function]
@@ -0,0 +1,141 @@
+import time
+import numpy as np
+
+# Reasons why Population.optimize stops
+STOP_GENERATIONS = "n_generations"
+STOP_PLATEAU = "plateau"
+STOP_DIVERSITY = "diversity"
+STOP_TIME_BUDGET = "time_budget"
+
+
+def population_diversity(index_matrix, best_permutation) -> float:
+    """
+    Diversity of a population: mean fraction of positions in which the
+    permutations of `index_matrix` differ from `best_permutation`. It is 0
+    when every individual is a copy of the best one.
+    """
+    index_matrix = np.atleast_2d(index_matrix)
+    if index_matrix.size == 0:
+        return 0.0
+    return float(np.mean(index_matrix != np.asarray(best_permutation)[None, :]))
+
+
+class ConvergenceMonitor:
+    """
+    Stopping criteria of `Population.optimize`, checked after each
+    generation is evaluated.
+
+    Parameters
+    ----------
+    stopping_rounds : `int`, optional
+        number of consecutive generations without an improvement of the best
+        fitness greater than `stopping_tolerance` that stop the search
+        (plateau). ``None`` disables the criterion. (default ``None``)
+
+    stopping_tolerance : `float`, optional
+        minimum absolute change of the best fitness between consecutive
+        generations to count as an improvement. (default ``None``)
+
+    min_diversity : `float`, optional
+        the search stops when the diversity of the population (see
+        `population_diversity`) falls below this value. ``None`` disables the
+        criterion. (default ``None``)
+
+    time_budget : `float`, optional
+        maximum wall-clock time of the search, in seconds. ``None`` disables
+        the criterion. (default ``None``)
+
+    Attributes
+    ----------
+    stop_reason : `str`
+        reason why the search stopped, ``None`` while it has not stopped.
+
+    diversity_history : `list`
+        diversity of each generation, if `min_diversity` is set.
+    """
+
+    def __init__(self, stopping_rounds=None, stopping_tolerance=None,
+                 min_diversity=None, time_budget=None):
+        if stopping_rounds is not None and stopping_tolerance is None:
+            raise Exception(
+                "A value for stopping_tolerance must be provided with stopping_rounds."
+            )
+        self.stopping_rounds = stopping_rounds
+        self.stopping_tolerance = stopping_tolerance
+        self.min_diversity = min_diversity
+        self.time_budget = time_budget
+        self.start()
+
+    def __repr__(self):
+        return f"ConvergenceMonitor(Rounds: {self.stopping_rounds} Tolerance: {self.stopping_tolerance} " \
+            + f"Diversity: {self.min_diversity} Budget: {self.time_budget} Stop: {self.stop_reason})"
+
+    def start(self):
+        """Starts the clock of the time budget and clears the state."""
+        self.start_time = time.time()
+        self.stop_reason = None
+        self.diversity_history = []
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def check(self, generation, absolute_difference, index_matrix=None, best_permutation=None):
+        """
+        Checks the stopping criteria after evaluating `generation`.
+
+        Parameters
+        ----------
+        generation : `int`
+            index of the generation just evaluated.
+
+        absolute_difference : `list`
+            absolute difference between the best fitness of consecutive
+            generations (``None`` for the first one).
+
+        index_matrix : `numpy.ndarray`, optional
+            permutations of the population, needed if `min_diversity` is set.
+
+        best_permutation : `numpy.ndarray`, optional
+            permutation of the best individual, needed if `min_diversity` is
+            set.
+
+        Returns
+        -------
+        stop_reason : `str`
+            reason to stop, or ``None`` if the search must go on.
+        """
+        if self.stopping_rounds is not None and generation > self.stopping_rounds:
+            last_n = np.array(absolute_difference[-self.stopping_rounds:], dtype=np.float64)
+            if np.all(last_n < self.stopping_tolerance):
+                self.stop_reason = STOP_PLATEAU
+                return self.stop_reason
+
+        if self.min_diversity is not None and index_matrix is not None:
+            diversity = population_diversity(index_matrix, best_permutation)
+            self.diversity_history.append(diversity)
+            if diversity < self.min_diversity:
+                self.stop_reason = STOP_DIVERSITY
+                return self.stop_reason
+
+        if self.time_budget is not None and self.elapsed() >= self.time_budget:
+            self.stop_reason = STOP_TIME_BUDGET
+            return self.stop_reason
+
+        return None
+
+    def message(self, generation):
+        """Text explaining why the search stopped at `generation`."""
+        if self.stop_reason == STOP_PLATEAU:
+            return "Algorithm stopped at generation " + str(generation) \
+                + " due to lack of minimum absolute change of " \
+                + str(self.stopping_tolerance) + " during " \
+                + str(self.stopping_rounds) + " consecutive generations."
+        if self.stop_reason == STOP_DIVERSITY:
+            return "Algorithm stopped at generation " + str(generation) \
+                + " because the diversity of the population fell below " \
+                + str(self.min_diversity) + "."
+        if self.stop_reason == STOP_TIME_BUDGET:
+            return "Algorithm stopped at generation " + str(generation) \
+                + " after exhausting the time budget of " \
+                + str(self.time_budget) + " seconds."
+        return "Algorithm completed " + str(generation + 1) + " generations."
@@ -1,9 +1,12 @@
 import random
 import sys
+import numpy as np
 from Tasks.GeneticAlgorithm.Tasks_combination import Tasks_combination
 from Tasks.task import Task
+from Tasks.dependency_index import shared_dependency_index
+from Tasks.GeneticAlgorithm.Schedule_decoder import task_finish_times, parallel_finish_times
 
-def crossing_by_cut_off_point(parent1, parent2 , mode='aleatorio'):
+def crossing_by_cut_off_point(parent1, parent2 , mode='aleatorio', n_workers=1, problem_solving=None):
     # Validación del modo
     if mode not in ['aleatorio', 'inteligente']:
         raise ValueError("El modo debe ser 'aleatorio' o 'inteligente'.")
@@ -14,8 +17,8 @@ def crossing_by_cut_off_point(parent1, parent2 , mode='aleatorio'):
     if mode == 'aleatorio':
         cut_point = random.randint(1, len(parent1) - 1)
     else:  # modo inteligente
-        evaluation1 = find_acumulative_imposible_tasks(parent1)
-        evaluation2 = find_acumulative_imposible_tasks(parent2)
+        evaluation1 = find_acumulative_imposible_tasks(parent1, n_workers=n_workers, problem_solving=problem_solving)
+        evaluation2 = find_acumulative_imposible_tasks(parent2, n_workers=n_workers, problem_solving=problem_solving)
         total = evaluation2[len(parent2)-1]
         min = sys.maxsize
         cut_point = len(parent1)//2
@@ -27,14 +30,27 @@ def crossing_by_cut_off_point(parent1, parent2 , mode='aleatorio'):
 
     # Cruce de las permutaciones
     d1 = parent1[:cut_point]
-    d2 = [task for task in parent2 if task not in d1]
+    d1_ids = set(task.id for task in d1)
+    d2 = [task for task in parent2 if task.id not in d1_ids]
     return d1 + d2
 
-def find_acumulative_imposible_tasks(permutation):
-    # Búsqueda del punto de corte basado en el subarreglo con menos tareas imposibles
+def find_acumulative_imposible_tasks(permutation, table=None, n_workers=1, problem_solving=None):
+    # Búsqueda del punto de corte basado en el subarreglo con menos tareas imposibles.
+    # Con varios trabajadores el retraso se mide con los instantes de fin del reparto entre
+    # ellos (ver Schedule_decoder) en lugar de con el tiempo de un único trabajador
+    if table is not None:
+        return acumulative_imposible_tasks_from_table(np.asarray(permutation, dtype=np.int64), table,
+                                                      n_workers, problem_solving)
+    parallel = n_workers > 1 or problem_solving is not None
+    if parallel:
+        finish_times = task_finish_times(permutation, n_workers, problem_solving)
+
     imposible_tasks = [None] * len(permutation)
     completed_tasks = set()
     actual_time = 0
+    # Con tareas de un Project las dependencias se comprueban con su índice de dependencias
+    dependency_index = shared_dependency_index(permutation)
+    completed = 0
 
     if len(permutation[0].dependencies) > 0 : imposible_tasks[0] = 1
     else : imposible_tasks[0] = 0
@@ -42,22 +58,57 @@ def find_acumulative_imposible_tasks(permutation):
     for index in range(1,len(permutation)):
         # Verificar si todas las dependencias de la tarea están completas
         imposible = False
-        for tarea_dependiente in permutation[index].dependencies:
-            if tarea_dependiente not in completed_tasks:
-                imposible = True
-                break
+        if dependency_index is not None:
+            imposible = not dependency_index.is_ready(permutation[index]._index, completed)
+        else:
+            for tarea_dependiente in permutation[index].dependencies:
+                if tarea_dependiente not in completed_tasks:
+                    imposible = True
+                    break
 
         # Sumar la duración de la tarea al tiempo actual
         actual_time += permutation[index].duration
+        if parallel:
+            actual_time = finish_times[index]
         
         # Si la tarea finaliza después de su deadline
         if actual_time > permutation[index].deadline:
             imposible = True
         
         # Marcar la tarea como completada
-        completed_tasks.add(permutation[index])
+        if dependency_index is not None:
+            completed |= 1 << permutation[index]._index
+        else:
+            completed_tasks.add(permutation[index])
 
         if(imposible) : imposible_tasks[index] = imposible_tasks[index-1] + 1
         else : imposible_tasks[index] = imposible_tasks[index-1]
 
-    return imposible_tasks
\ No newline at end of file
+    return imposible_tasks
+
+def acumulative_imposible_tasks_from_table(permutation, table, n_workers=1, problem_solving=None):
+    '''
+        Versión de `find_acumulative_imposible_tasks` sobre una permutación de
+        índices de una `TaskTable`: mismas cuentas, calculadas sobre las
+        columnas de la tabla en lugar de recorrer los atributos de cada tarea
+    '''
+    n = len(permutation)
+    # Igual que en la versión original, la primera tarea no se marca como
+    # completada y su duración no se suma al tiempo
+    position = np.full(len(table), n, dtype=np.int64)
+    position[permutation[1:]] = np.arange(1, n)
+
+    tasks, dependencies = table.dependency_edges()
+    edge_violated = position[dependencies] >= position[tasks]
+    violated = np.bincount(tasks[edge_violated], minlength=len(table)) > 0
+    violated |= table.external_dependency
+
+    imposible = np.empty(n, dtype=bool)
+    imposible[0] = np.diff(table.dependency_ptr)[permutation[0]] > 0 or table.external_dependency[permutation[0]]
+    if n_workers > 1 or problem_solving is not None:
+        actual_time = parallel_finish_times(permutation, table, n_workers, problem_solving)[1:]
+    else:
+        actual_time = np.cumsum(table.duration[permutation[1:]])
+    imposible[1:] = violated[permutation[1:]] | (actual_time > table.deadline[permutation[1:]])
+
+    return np.cumsum(imposible)
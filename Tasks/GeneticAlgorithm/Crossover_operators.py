@@ -0,0 +1,244 @@
+import heapq
+import random
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Crossover_heuristics import acumulative_imposible_tasks_from_table
+
+# Crossover operators over permutations of table indices. All of them run in
+# O(n + E) (n tasks, E dependencies), except the topological repair used by
+# OX and PMX, which needs a heap: O((n + E) log n).
+
+
+def _missing_dependencies(table: TaskTable):
+    # Dependencies still to place for each task; an external dependency is
+    # never placed, as in the list versions of the operators.
+    return (np.diff(table.dependency_ptr) + table.external_dependency).tolist()
+
+
+def dependency_aware_crossover(parent1, parent2, table: TaskTable, segment_length=None) -> np.ndarray:
+    '''
+        Versión sobre índices de `Permutations_generator_heuristics.dependency_aware_crossover`:
+        toma un prefijo de `parent1`, añade en el orden de `parent2` las tareas cuyas dependencias
+        ya están colocadas y completa con las restantes en el orden de `parent1`. Un contador de
+        dependencias pendientes por tarea sustituye la comprobación de todas sus dependencias.
+    '''
+    parent1 = np.asarray(parent1).tolist()
+    parent2 = np.asarray(parent2).tolist()
+    if segment_length is None:
+        segment_length = random.randint(1, len(parent1) // 2)
+
+    ptr, idx = table.dependents()
+    ptr = ptr.tolist()
+    idx = idx.tolist()
+    missing = _missing_dependencies(table)
+    placed = [False] * len(table)
+    child = []
+
+    def place(task):
+        placed[task] = True
+        child.append(task)
+        for dependent in idx[ptr[task]:ptr[task + 1]]:
+            missing[dependent] -= 1
+
+    for task in parent1[:segment_length]:
+        place(task)
+    for task in parent2:
+        if not placed[task] and missing[task] == 0:
+            place(task)
+    for task in parent1:
+        if not placed[task]:
+            place(task)
+
+    return np.array(child, dtype=np.int64)
+
+
+def cut_off_point_crossover(parent1, parent2, table: TaskTable, mode='aleatorio',
+                            n_workers=1, problem_solving=None) -> np.ndarray:
+    '''
+        Versión sobre índices de `crossing_by_cut_off_point`: el hijo es el prefijo de `parent1`
+        hasta el punto de corte seguido de las tareas restantes en el orden de `parent2`. En modo
+        'inteligente' el punto de corte minimiza las tareas imposibles de ambos lados, con los
+        retrasos del reparto entre `n_workers` trabajadores.
+    '''
+    if mode not in ['aleatorio', 'inteligente']:
+        raise ValueError("El modo debe ser 'aleatorio' o 'inteligente'.")
+    if len(parent1) != len(parent2):
+        raise ValueError("Los padres deben tener la misma cantidad de genes")
+    parent1 = np.asarray(parent1, dtype=np.int64)
+    parent2 = np.asarray(parent2, dtype=np.int64)
+
+    if mode == 'aleatorio':
+        cut_point = random.randint(1, len(parent1) - 1)
+    else:
+        cut_point = len(parent1) // 2
+        if len(parent1) > 1:
+            evaluation1 = acumulative_imposible_tasks_from_table(parent1, table, n_workers, problem_solving)
+            evaluation2 = acumulative_imposible_tasks_from_table(parent2, table, n_workers, problem_solving)
+            total = evaluation2[-1]
+            # np.argmin devuelve el primer mínimo, como la comparación estricta
+            cut_point = int(np.argmin(evaluation1[:-1] + (total - evaluation2[:-1])))
+
+    in_prefix = np.zeros(len(table), dtype=bool)
+    in_prefix[parent1[:cut_point]] = True
+    return np.concatenate([parent1[:cut_point], parent2[~in_prefix[parent2]]])
+
+
+def topological_repair(permutation, table: TaskTable) -> np.ndarray:
+    '''
+        Reordena la permutación para que cada tarea quede después de sus dependencias, alterando
+        lo mínimo el orden original: entre las tareas disponibles se coloca siempre la que aparece
+        antes en la permutación. Si la permutación ya respeta las dependencias no cambia. Las
+        dependencias que no están en la permutación se ignoran.
+    '''
+    permutation = np.asarray(permutation, dtype=np.int64)
+    n = len(permutation)
+    position = np.full(len(table), n, dtype=np.int64)
+    position[permutation] = np.arange(n)
+
+    # Dependencias pendientes de cada tarea, contando solo las que están en la permutación
+    tasks, dependencies = table.dependency_edges()
+    inside = (position[tasks] < n) & (position[dependencies] < n)
+    missing = np.bincount(tasks[inside], minlength=len(table)).tolist()
+
+    ptr, idx = table.dependents()
+    ptr = ptr.tolist()
+    idx = idx.tolist()
+    position = position.tolist()
+    order = permutation.tolist()
+    heap = [position[task] for task in order if missing[task] == 0]
+    heapq.heapify(heap)
+    child = []
+    while heap:
+        task = order[heapq.heappop(heap)]
+        child.append(task)
+        for dependent in idx[ptr[task]:ptr[task + 1]]:
+            if position[dependent] < n:
+                missing[dependent] -= 1
+                if missing[dependent] == 0:
+                    heapq.heappush(heap, position[dependent])
+
+    # Tareas en un ciclo de dependencias: se mantienen en su orden
+    if len(child) < n:
+        placed = np.zeros(len(table), dtype=bool)
+        placed[child] = True
+        child = child + permutation[~placed[permutation]].tolist()
+    return np.array(child, dtype=np.int64)
+
+
+def _segment(length):
+    a, b = sorted(random.sample(range(length + 1), 2))
+    return a, b
+
+
+def order_crossover(parent1, parent2, table: TaskTable, repair=True) -> np.ndarray:
+    '''
+        Cruce OX: el hijo conserva el segmento [a, b) de `parent1` en sus mismas posiciones y el
+        resto de posiciones, empezando después del segmento, se rellenan con las tareas que faltan
+        en el orden en que aparecen en `parent2` a partir de la posición b. Con `repair` el hijo se
+        ordena con `topological_repair` para que respete las dependencias.
+    '''
+    parent1 = np.asarray(parent1, dtype=np.int64)
+    parent2 = np.asarray(parent2, dtype=np.int64)
+    n = len(parent1)
+    a, b = _segment(n)
+
+    in_segment = np.zeros(len(table), dtype=bool)
+    in_segment[parent1[a:b]] = True
+    rotated = np.roll(parent2, -b)
+    filling = rotated[~in_segment[rotated]]
+
+    child = np.empty(n, dtype=np.int64)
+    child[a:b] = parent1[a:b]
+    child[np.roll(np.arange(n), -b)[:n - (b - a)]] = filling
+    return topological_repair(child, table) if repair else child
+
+
+def partially_mapped_crossover(parent1, parent2, table: TaskTable, repair=True) -> np.ndarray:
+    '''
+        Cruce PMX: el hijo toma el segmento [a, b) de `parent1` y el resto de posiciones de
+        `parent2`; las tareas de `parent2` que ya están en el segmento se sustituyen siguiendo la
+        correspondencia parent1[i] -> parent2[i] del segmento. Con `repair` el hijo se ordena con
+        `topological_repair` para que respete las dependencias.
+    '''
+    parent1 = np.asarray(parent1, dtype=np.int64)
+    parent2 = np.asarray(parent2, dtype=np.int64)
+    n = len(parent1)
+    a, b = _segment(n)
+
+    # Correspondencia del segmento; cada cadena se recorre una sola vez
+    # gracias a que se guarda su final
+    mapping = {}
+    for task1, task2 in zip(parent1[a:b].tolist(), parent2[a:b].tolist()):
+        mapping[task1] = task2
+    end = {}
+
+    def resolve(task):
+        path = []
+        while task in mapping and task not in end:
+            path.append(task)
+            task = mapping[task]
+        task = end.get(task, task)
+        for step in path:
+            end[step] = task
+        return task
+
+    child = parent2.tolist()
+    child[a:b] = parent1[a:b].tolist()
+    for i in list(range(a)) + list(range(b, n)):
+        if child[i] in mapping:
+            child[i] = resolve(child[i])
+    child = np.array(child, dtype=np.int64)
+    return topological_repair(child, table) if repair else child
+
+
+def precedence_preserving_crossover(parent1, parent2, table: TaskTable, mask=None) -> np.ndarray:
+    '''
+        Cruce POX que preserva las precedencias: en cada posición se elige al azar uno de los
+        padres (o según `mask`) y se coloca la primera tarea de ese padre que aún no está en el
+        hijo. Si los dos padres respetan las dependencias el hijo también: cuando una tarea se
+        coloca, todas sus dependencias ya se habían encontrado antes en ese mismo padre.
+    '''
+    parent1 = np.asarray(parent1).tolist()
+    parent2 = np.asarray(parent2).tolist()
+    n = len(parent1)
+    if mask is None:
+        mask = [random.random() < 0.5 for _ in range(n)]
+
+    placed = [False] * len(table)
+    child = []
+    i1 = 0
+    i2 = 0
+    for take_first in mask:
+        if take_first:
+            while placed[parent1[i1]]:
+                i1 += 1
+            task = parent1[i1]
+        else:
+            while placed[parent2[i2]]:
+                i2 += 1
+            task = parent2[i2]
+        placed[task] = True
+        child.append(task)
+    return np.array(child, dtype=np.int64)
+
+
+# Operators available in Population.crossover_individuals
+CROSSOVER_METHODS = {
+    "dependency_aware" : dependency_aware_crossover,
+    "cut_off_point"    : lambda parent1, parent2, table: cut_off_point_crossover(parent1, parent2, table, mode='aleatorio'),
+    "smart_cut"        : lambda parent1, parent2, table: cut_off_point_crossover(parent1, parent2, table, mode='inteligente'),
+    "ox"               : order_crossover,
+    "pmx"              : partially_mapped_crossover,
+    "pox"              : precedence_preserving_crossover,
+}
+
+
+def get_crossover_method(method):
+    '''
+        Operador de cruce correspondiente a `method` (ver `CROSSOVER_METHODS`).
+    '''
+    if method not in CROSSOVER_METHODS:
+        raise Exception(
+            "The crossover method must be one of: " + ", ".join(CROSSOVER_METHODS)
+        )
+    return CROSSOVER_METHODS[method]
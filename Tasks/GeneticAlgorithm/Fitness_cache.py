@@ -0,0 +1,123 @@
+import numpy as np
+from collections import OrderedDict
+from Tasks.task_table import TaskTable
+
+# Base of the polynomial rolling hash (odd, so it is invertible modulo 2**64)
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+# HASH_BASE ** i for i = 0, 1, ..., grown on demand
+_powers = np.ones(1, dtype=np.uint64)
+
+
+def hash_powers(length) -> np.ndarray:
+    """
+    Powers ``HASH_BASE ** (length - 1), ..., HASH_BASE ** 0`` modulo 2**64.
+    """
+    global _powers
+    if len(_powers) < length:
+        factors = np.full(length, HASH_BASE, dtype=np.uint64)
+        factors[0] = 1
+        # Integer overflow of uint64 arrays wraps around, i.e. it is modulo 2**64
+        _powers = np.cumprod(factors, dtype=np.uint64)
+    return _powers[:length][::-1]
+
+
+def sequence_hash(sequence) -> int:
+    """
+    Polynomial rolling hash, modulo 2**64, of a sequence of uint64 values:
+    ``sum(sequence[i] * HASH_BASE ** (n - 1 - i))``. The hash of the
+    sequence extended by one value `v` is ``h * HASH_BASE + v``.
+    """
+    return int(np.sum(sequence * hash_powers(len(sequence)), dtype=np.uint64))
+
+
+def permutation_hash(permutation, table: TaskTable) -> int:
+    """Rolling hash of the sequence of task ids of `permutation`."""
+    return sequence_hash(table.id_hash[np.asarray(permutation)])
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of objective function values of permutations.
+
+    The entries are keyed on the objective function, the fingerprint of the
+    task table (see `TaskTable.fingerprint`) and the rolling hash of the
+    sequence of task ids of the permutation, so the cache can be shared by
+    the generations of a population and by different populations built on
+    the same tasks (for example, the successive calls to
+    `PMAgent.get_best_permutation`). If any value of the tasks changes, the
+    fingerprint changes and the old entries are no longer used. The sequence
+    of ids is stored with each entry to rule out hash collisions.
+
+    The fingerprints and the hashes are only meaningful inside one process.
+
+    Parameters
+    ----------
+    max_size : `int`, optional
+        maximum number of entries; the least recently used one is discarded
+        when it is exceeded. (default ``10000``)
+
+    Attributes
+    ----------
+    hits : `int`
+        number of lookups that found the value in the cache.
+
+    misses : `int`
+        number of lookups that did not find the value.
+    """
+
+    def __init__(self, max_size=10000):
+        if max_size < 1:
+            raise Exception("max_size must be a positive integer.")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"FitnessCache(Entries: {len(self._entries)} Hits: {self.hits} Misses: {self.misses})"
+
+    @property
+    def hit_rate(self):
+        """Fraction of the lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def key(self, permutation, table: TaskTable, objective_function):
+        """
+        Key of `permutation` in the cache, and the sequence of id hashes
+        stored with the entry to check that a hit is not a collision.
+        """
+        sequence = table.id_hash[np.asarray(permutation)]
+        return (objective_function, table.fingerprint(), len(sequence), sequence_hash(sequence)), sequence
+
+    def get(self, key, sequence):
+        """
+        Cached value for `key`, or ``None`` if it is not in the cache.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and np.array_equal(entry[0], sequence):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key, sequence, value):
+        """
+        Stores `value` for `key`, discarding the least recently used entry if
+        the cache is full.
+        """
+        self._entries[key] = (sequence, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,206 @@
+import glob
+import numpy as np
+
+# Detail levels of the optimization history
+HISTORY_NONE = "none"
+HISTORY_SUMMARY = "summary"
+HISTORY_BEST = "best"
+HISTORY_FULL = "full"
+HISTORY_LEVELS = [HISTORY_NONE, HISTORY_SUMMARY, HISTORY_BEST, HISTORY_FULL]
+
+# Rows of each chunk written to disk when a path is given without a capacity
+DEFAULT_CHUNK_SIZE = 256
+
+
+class HistoryRecorder:
+    """
+    Compact history of an optimization, stored as NumPy arrays with one row
+    per generation instead of lists of `Task` objects:
+
+    - "none": nothing is stored.
+    - "summary": ``generation``, ``best_fitness``, ``best_function_value``,
+      ``absolute_difference`` (NaN for the first generation) and the
+      ``mean_fitness``, ``std_fitness`` and ``min_fitness`` of the
+      individuals.
+    - "best": summary plus ``best_permutation``, the permutation (table
+      indices) of the best individual.
+    - "full": best plus ``permutations`` and ``fitness`` of the
+      `n_individuals` individuals of the population.
+
+    With a `capacity` the rows live in a ring buffer of that size, so the
+    memory does not grow with the number of generations: once it is full,
+    each new row overwrites the oldest one or, if a `path` is given, the
+    buffer is written to disk as the chunk ``<path>.<k>.npz`` and emptied
+    (see `load_history`).
+
+    Parameters
+    ----------
+    level : {"none", "summary", "best", "full"}, optional
+        detail level. (default ``"best"``)
+
+    capacity : `int`, optional
+        rows kept in memory. (default ``None``, all of them, or
+        `DEFAULT_CHUNK_SIZE` with a `path`)
+
+    path : `str`, optional
+        prefix of the chunks written to disk. (default ``None``)
+
+    Attributes
+    ----------
+    n_recorded : `int`
+        number of generations recorded.
+
+    n_chunks : `int`
+        number of chunks written to disk.
+    """
+
+    def __init__(self, level=HISTORY_BEST, capacity=None, path=None):
+        if level not in HISTORY_LEVELS:
+            raise Exception(
+                "The history level must be one of: " + ", ".join(HISTORY_LEVELS)
+            )
+        if capacity is not None and capacity < 1:
+            raise Exception("The history capacity must be a positive integer.")
+        if path is not None and capacity is None:
+            capacity = DEFAULT_CHUNK_SIZE
+        self.level = level
+        self.capacity = capacity
+        self.path = path
+        self.n_recorded = 0
+        self.n_chunks = 0
+        self._arrays = {}
+        # Rows in memory and position of the oldest one in the ring buffer
+        self._size = 0
+        self._first = 0
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"HistoryRecorder(Level: {self.level} Rows: {self._size} Recorded: {self.n_recorded} " \
+            + f"Chunks: {self.n_chunks})"
+
+    def record(self, generation, fitness, best_fitness, best_function_value,
+               absolute_difference=None, best_permutation=None, index_matrix=None):
+        """
+        Stores the row of a generation.
+
+        Parameters
+        ----------
+        generation : `int`
+            index of the generation.
+
+        fitness : `numpy.ndarray`
+            fitness of every individual evaluated in the generation.
+
+        best_fitness, best_function_value : `float`
+            fitness and objective function value of the best individual.
+
+        absolute_difference : `float`, optional
+            difference with the best fitness of the previous generation.
+
+        best_permutation : `numpy.ndarray`, optional
+            permutation of the best individual, needed by "best" and "full".
+
+        index_matrix : `numpy.ndarray`, optional
+            permutations of the population, needed by "full".
+        """
+        if self.level == HISTORY_NONE:
+            return
+        fitness = np.asarray(fitness, dtype=np.float64)
+        row = {
+            "generation"          : generation,
+            "best_fitness"        : best_fitness,
+            "best_function_value" : best_function_value,
+            "absolute_difference" : np.nan if absolute_difference is None else absolute_difference,
+            "mean_fitness"        : fitness.mean() if len(fitness) > 0 else np.nan,
+            "std_fitness"         : fitness.std() if len(fitness) > 0 else np.nan,
+            "min_fitness"         : fitness.min() if len(fitness) > 0 else np.nan,
+        }
+        if self.level in (HISTORY_BEST, HISTORY_FULL):
+            row["best_permutation"] = np.asarray(best_permutation, dtype=np.int32)
+        if self.level == HISTORY_FULL:
+            index_matrix = np.asarray(index_matrix, dtype=np.int32)
+            row["permutations"] = index_matrix
+            row["fitness"] = fitness[:len(index_matrix)]
+
+        if self.capacity is not None and self._size == self.capacity:
+            if self.path is not None:
+                self.flush()
+            else:
+                # The oldest row is overwritten
+                self._first = (self._first + 1) % self.capacity
+                self._size -= 1
+        position = (self._first + self._size) % self._allocated(row)
+        for field, value in row.items():
+            self._arrays[field][position] = value
+        self._size += 1
+        self.n_recorded += 1
+
+    def _allocated(self, row):
+        # Rows allocated for the buffer, allocating the arrays on the first
+        # row and doubling them when there is no capacity
+        if not self._arrays:
+            size = self.capacity if self.capacity is not None else 16
+            for field, value in row.items():
+                value = np.asarray(value)
+                dtype = np.int64 if field == "generation" else \
+                    np.int32 if value.dtype.kind in "iu" else np.float64
+                self._arrays[field] = np.empty((size,) + value.shape, dtype=dtype)
+        size = len(self._arrays["generation"])
+        if self.capacity is None and self._size == size:
+            for field, array in self._arrays.items():
+                grown = np.empty((2 * size,) + array.shape[1:], dtype=array.dtype)
+                grown[:size] = array
+                self._arrays[field] = grown
+            size *= 2
+        return size
+
+    def column(self, field) -> np.ndarray:
+        """
+        Values of `field` of the rows in memory, from the oldest generation to
+        the newest one.
+        """
+        if field not in self._arrays:
+            return np.empty(0)
+        array = self._arrays[field]
+        order = (self._first + np.arange(self._size)) % len(array)
+        return array[order]
+
+    def arrays(self) -> dict:
+        """Every field of the rows in memory (see `column`)."""
+        return {field: self.column(field) for field in self._arrays}
+
+    def flush(self):
+        """
+        Writes the rows in memory to the next chunk ``<path>.<k>.npz`` and
+        empties the buffer. Without a `path` it does nothing.
+        """
+        if self.path is None or self._size == 0:
+            return
+        np.savez_compressed(f"{self.path}.{self.n_chunks:05d}.npz", level=self.level, **self.arrays())
+        self.n_chunks += 1
+        self._first = 0
+        self._size = 0
+
+    def save(self, path):
+        """Writes the rows in memory to the npz file `path`."""
+        np.savez_compressed(path, level=self.level, **self.arrays())
+
+
+def load_history(path) -> dict:
+    """
+    Concatenates the chunks ``<path>.<k>.npz`` written by a `HistoryRecorder`.
+
+    Returns
+    -------
+    arrays : `dict`
+        field -> array with the rows of every chunk, in order.
+    """
+    chunks = [np.load(file) for file in sorted(glob.glob(glob.escape(path) + ".[0-9]*.npz"))]
+    if len(chunks) == 0:
+        return {}
+    return {
+        field: np.concatenate([chunk[field] for chunk in chunks])
+        for field in chunks[0].files if field != "level"
+    }
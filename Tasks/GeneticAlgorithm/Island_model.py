@@ -0,0 +1,366 @@
+import atexit
+import pickle
+import time
+import random
+import uuid
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Fitness_cache import FitnessCache
+from Tasks.GeneticAlgorithm.Parallel_evaluation import resolve_n_jobs
+
+# Task tables kept by each worker process, one per optimization (the most
+# recent ones), so that a pool can be reused by optimizations of different
+# tasks
+MAX_WORKER_TABLES = 4
+
+# State of each worker process: task table and objective function of each
+# optimization (sent once, see `IslandModel.optimize`), and a cache of objective values shared by all of them (its
+# entries are keyed on the table fingerprint and the objective function)
+_worker_tables = OrderedDict()
+_worker_cache = None
+
+# Pools shared by the callers of `shared_island_executor`, by number of processes
+_shared_executors = {}
+
+
+def _init_worker():
+    global _worker_cache
+    _worker_cache = FitnessCache()
+
+
+def _evolve_worker(job):
+    global _worker_cache
+    key, registration, epoch = job
+    if key not in _worker_tables:
+        if registration is None:
+            # The tasks of this optimization have not been sent to this process
+            return None
+        tasks, objective_function = pickle.loads(registration)
+        _worker_tables[key] = (TaskTable(tasks), objective_function)
+        while len(_worker_tables) > MAX_WORKER_TABLES:
+            _worker_tables.popitem(last=False)
+    else:
+        _worker_tables.move_to_end(key)
+    if _worker_cache is None:
+        _worker_cache = FitnessCache()
+    table, objective_function = _worker_tables[key]
+    return evolve_island(table, objective_function, _worker_cache, **epoch)
+
+
+def island_executor(n_jobs) -> ProcessPoolExecutor:
+    """
+    Process pool for `IslandModel.optimize`. It does not depend on the tasks
+    or the objective function, so it can be reused by any number of
+    optimizations.
+    """
+    return ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker)
+
+
+def shared_island_executor(n_jobs) -> ProcessPoolExecutor:
+    """
+    `island_executor` of `n_jobs` processes shared by every caller of the
+    process, created on first use and shut down at exit.
+    """
+    if n_jobs not in _shared_executors:
+        _shared_executors[n_jobs] = island_executor(n_jobs)
+    return _shared_executors[n_jobs]
+
+
+@atexit.register
+def _shutdown_shared_executors():
+    for executor in _shared_executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _shared_executors.clear()
+
+
+def evolve_island(table, objective_function, fitness_cache, permutations, immigrants,
+                  seed, n_individuals, optimization, n_generations, optimize_kwargs,
+                  time_budget=None):
+    """
+    Evolves one island for `n_generations` generations.
+
+    Parameters
+    ----------
+    table : `TaskTable`
+        table of the tasks being combined.
+
+    objective_function : `function`
+        function to optimize.
+
+    fitness_cache : `FitnessCache`
+        cache of objective function values of the process, or ``None``.
+
+    permutations : `numpy.ndarray`
+        permutations of the island at the start of the epoch (``None`` for a
+        random initial population).
+
+    immigrants : `numpy.ndarray`
+        permutations received from the neighbour island. They replace the
+        last individuals of the island.
+
+    seed : `int`
+        seed of the random generators for the epoch. The state of the global
+        generators of `random` and `numpy.random` is restored afterwards, so
+        evolving an island in the current process does not change the
+        random numbers drawn by the caller.
+
+    time_budget : `float`, optional
+        maximum duration of the epoch, in seconds. (default ``None``)
+
+    Returns
+    -------
+    result : `dict`
+        ``permutations`` of the island for the next epoch, best ``migrants``
+        of its last evaluated generation, and the ``fitness``,
+        ``function_value`` and ``permutation`` of the best individual of the
+        epoch.
+    """
+    random_state = random.getstate()
+    numpy_state = np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    try:
+        if permutations is not None and len(immigrants) > 0:
+            permutations = np.concatenate([permutations[:n_individuals - len(immigrants)], immigrants])
+        population = Population(n_individuals, table, fitness_cache=fitness_cache,
+                                permutations=permutations)
+        population.optimize(objective_function, optimization, n_generations=n_generations,
+                            time_budget=time_budget, **optimize_kwargs)
+    finally:
+        random.setstate(random_state)
+        np.random.set_state(numpy_state)
+
+    # Best individuals of the last evaluated generation, to migrate
+    last_generation = population.last_generation[:n_individuals]
+    order = np.argsort([-individual.fitness for individual in last_generation], kind='stable')
+    migrants = np.array([last_generation[i].permutation for i in order], dtype=np.int32)
+
+    next_permutations = np.array(
+        [individual.permutation for individual in population.individuals[:n_individuals]],
+        dtype=np.int32
+    )
+    return {
+        "permutations"   : next_permutations,
+        "migrants"       : migrants,
+        "fitness"        : population.optimal_fitness,
+        "function_value" : population.optimal_function_value,
+        "permutation"    : table.encode(population.optimal_variable_values).astype(np.int32),
+    }
+
+
+class IslandModel:
+    """
+    Algoritmo genético de islas: varias poblaciones (`Population`) evolucionan
+    de forma independiente, cada una en su propio proceso, y cada
+    `migration_interval` generaciones cada isla recibe los mejores individuos
+    de la isla anterior (topología en anillo). Las tareas y la función
+    objetivo se envían a cada proceso una sola vez por optimización; en cada
+    época solo viajan las permutaciones como arreglos de índices int32 sobre
+    la tabla de tareas.
+
+    Parameters
+    ----------
+    n_islands : `int`
+        número de islas.
+
+    n_individuals : `int`
+        número de individuos de cada isla.
+
+    tasks : `list`
+        tareas a combinar.
+
+    n_jobs : `int`, optional
+        número de procesos, -1 usa todas las CPUs y 1 evoluciona las islas en
+        el proceso actual. (default ``-1``)
+
+    seed : `int`, optional
+        semilla de las islas, para obtener resultados reproducibles.
+        (default ``None``)
+
+    Attributes
+    ----------
+    optimal_fitness : `float`
+        mejor fitness encontrado por cualquiera de las islas.
+
+    optimal_function_value : `float`
+        valor de la función objetivo del mejor individuo.
+
+    optimal_variable_values : `list`
+        tareas del mejor individuo, en el orden de su permutación.
+
+    best_fitness_history : `list`
+        mejor fitness de cada isla al final de cada época.
+
+    n_epochs : `int`
+        número de épocas (periodos entre migraciones) realizadas.
+    """
+
+    def __init__(self, n_islands, n_individuals, tasks, n_jobs=-1, seed=None):
+        if n_islands < 1:
+            raise Exception("n_islands must be a positive integer.")
+        self.n_islands = n_islands
+        self.n_individuals = n_individuals
+        self.task_table = tasks if isinstance(tasks, TaskTable) else TaskTable(tasks)
+        self.tasks = self.task_table.tasks
+        self.n_jobs = min(resolve_n_jobs(n_jobs), n_islands)
+        self.seed = seed
+        self.optimized = False
+        self.optimal_fitness = None
+        self.optimal_function_value = None
+        self.optimal_variable_values = None
+        self.best_fitness_history = []
+        self.n_epochs = 0
+
+    def __repr__(self):
+        return f"IslandModel(Islands: {self.n_islands} Individuals: {self.n_individuals} " \
+            + f"Jobs: {self.n_jobs} Optimal fitness: {self.optimal_fitness})"
+
+    def optimize(self, objective_function, optimization, n_generations=50,
+                 migration_interval=5, n_migrants=2, time_budget=None,
+                 fitness_cache=None, executor=None, verbose=False, **optimize_kwargs):
+        """
+        This method evolves the islands and keeps the best individual found.
+
+        Parameters
+        ----------
+        objective_function : `function`
+            The function to be optimized. With more than one process it must
+            be picklable (defined at module level).
+
+        optimization : {"maximize" or "minimize"}
+            Whether to maximize or minimize the function.
+
+        n_generations : `int`, optional
+            Number of generations of each island. (default ``50``)
+
+        migration_interval : `int`, optional
+            Number of generations between migrations. (default ``5``)
+
+        n_migrants : `int`, optional
+            Number of best individuals that each island sends to the next one
+            in each migration. (default ``2``)
+
+        time_budget : `float`, optional
+            Maximum wall-clock duration, in seconds. Each epoch receives the
+            time that is left (divided among the islands that evolve one
+            after another), so the islands stop within the epoch.
+            (default ``None``)
+
+        fitness_cache : `FitnessCache`, optional
+            Cache of objective function values used when the islands evolve
+            in the current process, for example the one of the caller shared
+            by its successive optimizations. (default ``None``, a new one)
+
+        executor : `ProcessPoolExecutor`, optional
+            Pool where the islands evolve with more than one process (see
+            `island_executor` and `shared_island_executor`); it is not shut
+            down. (default ``None``, a pool created for this call)
+
+        verbose : `bool`, optional
+            Display process information on the screen. (default ``False``)
+
+        **optimize_kwargs
+            Other arguments of `Population.optimize` used by every island
+            (selection_method, elitism, mutation_prob, vectorized, ...).
+
+        Returns
+        -------
+        self : `IslandModel`
+        """
+        if n_migrants >= self.n_individuals:
+            raise Exception("n_migrants must be smaller than n_individuals.")
+
+        seeds = np.random.SeedSequence(self.seed)
+        permutations = [None] * self.n_islands
+        migrants = [np.empty((0, len(self.task_table)), dtype=np.int32)] * self.n_islands
+        start = time.time()
+
+        # The workers keep the table and the objective function of this
+        # optimization under its key. They are serialized once and sent only
+        # with the first epoch, or again to a process that does not have them
+        key = uuid.uuid4().hex
+        registration = None
+        own_executor = None
+        if self.n_jobs > 1 and executor is None:
+            executor = own_executor = island_executor(self.n_jobs)
+        if self.n_jobs == 1:
+            executor = None
+            if fitness_cache is None:
+                fitness_cache = FitnessCache()
+        else:
+            registration = pickle.dumps((list(self.tasks), objective_function))
+
+        try:
+            generations_done = 0
+            while generations_done < n_generations:
+                remaining = None
+                if time_budget is not None:
+                    remaining = time_budget - (time.time() - start)
+                    if remaining <= 0 and generations_done > 0:
+                        break
+                    # Islands evolve n_jobs at a time: each round gets its share
+                    rounds = -(-self.n_islands // self.n_jobs)
+                    remaining = max(remaining, 0) / rounds
+                epoch_generations = min(migration_interval, n_generations - generations_done)
+                epoch_seeds = seeds.spawn(self.n_islands)
+                epochs = [
+                    {
+                        "permutations"    : permutations[k],
+                        # Ring topology: island k receives the migrants of island k - 1
+                        "immigrants"      : migrants[k - 1][:n_migrants] if self.n_islands > 1
+                                            else migrants[k][:0],
+                        "seed"            : int(epoch_seeds[k].generate_state(1, dtype=np.uint64)[0]),
+                        "n_individuals"   : self.n_individuals,
+                        "optimization"    : optimization,
+                        "n_generations"   : epoch_generations,
+                        "optimize_kwargs" : optimize_kwargs,
+                        "time_budget"     : remaining,
+                    }
+                    for k in range(self.n_islands)
+                ]
+                if executor is not None:
+                    first_epoch = generations_done == 0
+                    results = list(executor.map(
+                                    _evolve_worker,
+                                    [(key, registration if first_epoch else None, epoch) for epoch in epochs]
+                              ))
+                    missing = [k for k, result in enumerate(results) if result is None]
+                    if missing:
+                        retried = executor.map(_evolve_worker,
+                                               [(key, registration, epochs[k]) for k in missing])
+                        for k, result in zip(missing, retried):
+                            results[k] = result
+                else:
+                    results = [
+                        evolve_island(self.task_table, objective_function, fitness_cache, **epoch)
+                        for epoch in epochs
+                    ]
+
+                permutations = [result["permutations"] for result in results]
+                migrants = [result["migrants"] for result in results]
+                self.best_fitness_history.append([result["fitness"] for result in results])
+                for result in results:
+                    if self.optimal_fitness is None or result["fitness"] > self.optimal_fitness:
+                        self.optimal_fitness = result["fitness"]
+                        self.optimal_function_value = result["function_value"]
+                        self.optimal_variable_values = self.task_table.decode(result["permutation"])
+
+                generations_done += epoch_generations
+                self.n_epochs += 1
+                if verbose:
+                    print("Epoch " + str(self.n_epochs) + ": best fitness per island "
+                          + str(self.best_fitness_history[-1]))
+                if time_budget is not None and time.time() - start >= time_budget:
+                    if verbose:
+                        print("Island model stopped after exhausting the time budget of "
+                              + str(time_budget) + " seconds.")
+                    break
+        finally:
+            if own_executor is not None:
+                own_executor.shutdown(wait=True)
+
+        self.optimized = True
+        return self
@@ -0,0 +1,93 @@
+import heapq
+import numpy as np
+from typing import List
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Prefix_scoring import PrefixScore
+
+# Deterministic list scheduler: an alternative planner to the genetic
+# algorithm for large projects. Each task enters a heap when all its
+# dependencies of the table have been placed (Kahn over the same dependents
+# graph that `get_graph`/`topologic_order` use), so it runs in
+# O((n + E) log n) and the order always respects the dependencies.
+
+
+def priority_keys(table: TaskTable):
+    '''
+        Claves de la regla de prioridad de cada tarea, de más a menos importante:
+        - holgura: último instante en que puede empezar sin pasarse del deadline
+          (deadline - duración). Como todas las tareas disponibles empezarían en el
+          mismo instante, ordenar por holgura es ordenar por esta cantidad.
+        - recompensa por unidad de tiempo (reward / duración), de mayor a menor.
+        - peso de la penalización por retraso (5 - prioridad), de mayor a menor.
+        - índice en la tabla, para que el orden sea determinista.
+    '''
+    duration = table.duration.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.nan_to_num(table.reward / duration, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    latest_start = (table.deadline - table.duration).tolist()
+    density = (-density).tolist()
+    weight = (table.priority - 5).tolist()
+    return latest_start, density, weight
+
+
+def list_schedule_indices(table: TaskTable) -> np.ndarray:
+    '''
+        Orden de las tareas de la tabla (índices) según la regla de prioridad de `priority_keys`.
+        Cuando la tarea de menor holgura ya no puede terminar a tiempo se aparta a una segunda cola,
+        ordenada por peso de la penalización / duración (regla de Smith, que minimiza el retraso
+        ponderado), y se programa cuando no queda ninguna tarea disponible que llegue a tiempo. Las
+        tareas de un ciclo de dependencias van al final, en el orden de la tabla
+    '''
+    n = len(table)
+    latest_start, density, weight = priority_keys(table)
+    duration = table.duration.tolist()
+    deadline = table.deadline.tolist()
+    ptr, idx = table.dependents()
+    ptr = ptr.tolist()
+    idx = idx.tolist()
+    missing = np.diff(table.dependency_ptr).tolist()
+
+    on_time = [(latest_start[i], density[i], weight[i], i) for i in range(n) if missing[i] == 0]
+    heapq.heapify(on_time)
+    late = []
+    order = []
+    current_time = 0
+    while on_time or late:
+        task = None
+        while on_time:
+            task = heapq.heappop(on_time)[3]
+            if current_time + duration[task] <= deadline[task]:
+                break
+            # Ya no llega a tiempo (y el tiempo solo avanza): pasa a la cola de retrasadas
+            key = -weight[task] / duration[task] if duration[task] > 0 else np.inf
+            heapq.heappush(late, (-key, task))
+            task = None
+        if task is None:
+            task = heapq.heappop(late)[1]
+
+        order.append(task)
+        current_time += duration[task]
+        for dependent in idx[ptr[task]:ptr[task + 1]]:
+            missing[dependent] -= 1
+            if missing[dependent] == 0:
+                heapq.heappush(on_time, (latest_start[dependent], density[dependent],
+                                         weight[dependent], dependent))
+
+    # Tareas en un ciclo de dependencias
+    if len(order) < n:
+        placed = np.zeros(n, dtype=bool)
+        placed[order] = True
+        order += np.flatnonzero(~placed).tolist()
+    return np.array(order, dtype=np.int64)
+
+
+def list_schedule(tasks: List[Task], table: TaskTable = None):
+    '''
+        Planificación determinista de las tareas con `list_schedule_indices`. Devuelve el orden de
+        las tareas y su valor de `optimization_function`
+    '''
+    if table is None:
+        table = TaskTable(tasks)
+    permutation = list_schedule_indices(table)
+    return table.decode(permutation), PrefixScore(permutation, table).score
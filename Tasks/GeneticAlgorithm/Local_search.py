@@ -0,0 +1,236 @@
+import math
+import random
+import time
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Prefix_scoring import PrefixScore
+
+# Local search over permutations of table indices for `optimization_function`.
+# The moves reverse a short segment [i, j] (an adjacent swap when j = i + 1)
+# whose tasks do not depend on each other, so no dependency changes side and
+# the time after the segment does not change: only the deadline terms of the
+# segment and the difficulty terms of its borders have to be re-scored, O(k)
+# for a segment of k tasks instead of O(n).
+
+LOCAL_SEARCH_METHODS = ["hill_climbing", "annealing", "memetic"]
+
+# Minimum improvement accepted by the hill climber, so that rounding errors of
+# float columns can not make it undo and redo the same move forever
+IMPROVEMENT_TOLERANCE = 1e-9
+
+
+class LocalSearch:
+    """
+    Refinamiento por búsqueda local del orden de las tareas (por ejemplo, del
+    mejor individuo del algoritmo genético) para `optimization_function`.
+
+    - hill_climbing: aplica la primera inversión de segmento (2-opt, incluido
+      el intercambio de tareas adyacentes) que mejora la puntuación hasta que
+      ninguna la mejora.
+    - simulated_annealing: inversiones de segmentos aleatorios aceptadas con
+      el criterio de Metropolis, con un número acotado de iteraciones.
+
+    Los movimientos nunca invierten un segmento en el que una tarea depende de
+    otra, así que una permutación que respeta las dependencias las sigue
+    respetando.
+
+    Parameters
+    ----------
+    table : `TaskTable`
+        tabla de las tareas ordenadas.
+
+    max_segment : `int`, optional
+        longitud máxima de los segmentos invertidos. (default ``8``)
+    """
+
+    def __init__(self, table: TaskTable, max_segment=8):
+        if max_segment < 2:
+            raise Exception("max_segment must be at least 2.")
+        self.table = table
+        self.max_segment = max_segment
+        self._duration = table.duration.tolist()
+        self._deadline = table.deadline.tolist()
+        self._reward = table.reward.tolist()
+        self._weight = (5 - table.priority).tolist()
+        self._difficulty = table.difficulty.tolist()
+        self._dependency_ptr = table.dependency_ptr.tolist()
+        self._dependency_idx = table.dependency_idx.tolist()
+
+    def __repr__(self):
+        return f"LocalSearch(Tasks: {len(self.table)} Max segment: {self.max_segment})"
+
+    ########################### Evaluación de movimientos #####################
+
+    def _start(self, permutation):
+        # Estado de la búsqueda: orden, posición de cada tarea y tiempo de fin
+        # acumulado en cada posición
+        order = np.asarray(permutation, dtype=np.int64).tolist()
+        position = [len(order)] * len(self.table)
+        for k, task in enumerate(order):
+            position[task] = k
+        end_time = []
+        current_time = 0
+        for task in order:
+            current_time += self._duration[task]
+            end_time.append(current_time)
+        return order, position, end_time
+
+    def _depends_on_segment(self, order, position, i, j):
+        # Si la tarea de la posición j depende de alguna tarea de [i, j)
+        task = order[j]
+        for dependency in self._dependency_idx[self._dependency_ptr[task]:self._dependency_ptr[task + 1]]:
+            if i <= position[dependency] < j:
+                return True
+        return False
+
+    def _pair(self, first, second):
+        # Término de variedad de dificultad entre dos tareas consecutivas
+        return 5 if abs(self._difficulty[second] - self._difficulty[first]) > 10 else -2
+
+    def _deadline_term(self, task, end):
+        if end > self._deadline[task]:
+            return -(end - self._deadline[task]) * self._weight[task]
+        return self._reward[task]
+
+    def _segment_value(self, order, tasks, i, end_time):
+        '''
+            Puntuación de las posiciones i..i+k-1 ocupadas por `tasks`, más los términos de dificultad
+            con la tarea anterior y la siguiente. Las penalizaciones por dependencias no cambian con
+            los movimientos válidos, así que no se incluyen
+        '''
+        current_time = end_time[i - 1] if i > 0 else 0
+        value = 0
+        previous = order[i - 1] if i > 0 else None
+        for task in tasks:
+            current_time += self._duration[task]
+            value += self._deadline_term(task, current_time)
+            if previous is not None:
+                value += self._pair(previous, task)
+            previous = task
+        following = i + len(tasks)
+        if following < len(order):
+            value += self._pair(previous, order[following])
+        return value
+
+    def _reversal_delta(self, order, end_time, i, j):
+        segment = order[i:j + 1]
+        return self._segment_value(order, segment[::-1], i, end_time) \
+            - self._segment_value(order, segment, i, end_time)
+
+    def _reverse(self, order, position, end_time, i, j):
+        order[i:j + 1] = order[i:j + 1][::-1]
+        current_time = end_time[i - 1] if i > 0 else 0
+        for k in range(i, j + 1):
+            task = order[k]
+            position[task] = k
+            current_time += self._duration[task]
+            end_time[k] = current_time
+
+    def _random_segment(self, order, position):
+        # Segmento aleatorio [i, j] cuyas tareas no dependen unas de otras, o
+        # None si el primer par ya tiene una dependencia
+        n = len(order)
+        i = random.randrange(n - 1)
+        length = random.randint(2, min(self.max_segment, n - i))
+        j = i
+        while j + 1 < i + length and not self._depends_on_segment(order, position, i, j + 1):
+            j += 1
+        return (i, j) if j > i else None
+
+    ########################### Búsquedas #####################################
+
+    def hill_climbing(self, permutation, max_passes=None, time_budget=None):
+        '''
+            Aplica inversiones de segmento que mejoran la puntuación (primera mejora) hasta que ningún
+            segmento de hasta `max_segment` tareas la mejora, hasta `max_passes` pasadas o hasta agotar
+            `time_budget` segundos. Devuelve la permutación refinada y su puntuación exacta
+        '''
+        order, position, end_time = self._start(permutation)
+        n = len(order)
+        start = time.time()
+        passes = 0
+        improved = True
+        while improved and (max_passes is None or passes < max_passes):
+            improved = False
+            passes += 1
+            for i in range(n - 1):
+                for j in range(i + 1, min(i + self.max_segment, n)):
+                    if self._depends_on_segment(order, position, i, j):
+                        break
+                    if self._reversal_delta(order, end_time, i, j) > IMPROVEMENT_TOLERANCE:
+                        self._reverse(order, position, end_time, i, j)
+                        improved = True
+                if time_budget is not None and time.time() - start >= time_budget:
+                    improved = False
+                    break
+        return self._result(permutation, order)
+
+    def simulated_annealing(self, permutation, n_iterations=10000, initial_temperature=None,
+                            cooling=0.999, time_budget=None):
+        '''
+            Recocido simulado con inversiones de segmentos aleatorios: una inversión que empeora la
+            puntuación en `delta` se acepta con probabilidad exp(delta / T), y la temperatura T se
+            multiplica por `cooling` en cada iteración. Devuelve la mejor permutación encontrada y su
+            puntuación exacta
+        '''
+        order, position, end_time = self._start(permutation)
+        if len(order) < 2:
+            return self._result(permutation, order)
+        if initial_temperature is None:
+            # Del orden de las diferencias de un movimiento: la recompensa media
+            initial_temperature = max(float(np.mean(np.abs(self.table.reward))), 1.0)
+        temperature = initial_temperature
+        start = time.time()
+
+        current = 0.0
+        best = 0.0
+        best_order = list(order)
+        for iteration in range(n_iterations):
+            segment = self._random_segment(order, position)
+            if segment is not None:
+                i, j = segment
+                delta = self._reversal_delta(order, end_time, i, j)
+                if delta >= 0 or random.random() < math.exp(delta / temperature):
+                    self._reverse(order, position, end_time, i, j)
+                    current += delta
+                    if current > best:
+                        best = current
+                        best_order = list(order)
+            temperature *= cooling
+            if time_budget is not None and iteration % 256 == 0 and time.time() - start >= time_budget:
+                break
+        return self._result(permutation, best_order)
+
+    def refine(self, permutation, method="memetic", time_budget=None, **kwargs):
+        '''
+            Refina la permutación con `method`: "hill_climbing", "annealing" o "memetic" (recocido
+            simulado seguido de hill climbing). Devuelve la permutación y su puntuación exacta
+        '''
+        if method not in LOCAL_SEARCH_METHODS:
+            raise Exception(
+                "The local search method must be one of: " + ", ".join(LOCAL_SEARCH_METHODS)
+            )
+        if method == "hill_climbing":
+            return self.hill_climbing(permutation, time_budget=time_budget, **kwargs)
+        if method == "annealing":
+            return self.simulated_annealing(permutation, time_budget=time_budget, **kwargs)
+
+        start = time.time()
+        half = None if time_budget is None else time_budget / 2
+        permutation, _ = self.simulated_annealing(permutation, time_budget=half, **kwargs)
+        remaining = None if time_budget is None else max(time_budget - (time.time() - start), 0)
+        return self.hill_climbing(permutation, time_budget=remaining)
+
+    def _result(self, permutation, order):
+        # La puntuación se recalcula de forma exacta (la suma de las diferencias
+        # puede acumular errores de redondeo); si el refinamiento no mejora la
+        # permutación original se devuelve esta.
+        original = np.asarray(permutation, dtype=np.int64)
+        refined = np.array(order, dtype=np.int64)
+        original_score = PrefixScore(original, self.table)
+        if np.array_equal(original, refined):
+            return original, original_score.score
+        refined_score = original_score.rescore(refined)
+        if refined_score.score < original_score.score:
+            return original, original_score.score
+        return refined, refined_score.score
@@ -0,0 +1,180 @@
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Batch_evaluation import dependency_violations, score_terms
+
+# Objectives of the multi-objective mode (NSGA-II), all of them maximized.
+# reward + weighted_lateness + dependencies + variety is the breakdown of the
+# single score of `optimization_function`.
+OBJECTIVES = ["reward", "weighted_lateness", "tardiness", "dependencies", "variety", "on_time"]
+
+# Objectives optimized by default
+DEFAULT_OBJECTIVES = ["reward", "weighted_lateness", "dependencies", "variety"]
+
+# Objective that each priority mode of the PMAgent ('tasks', 'priority',
+# 'reward', 'time') prefers on the Pareto front
+PRIORITY_OBJECTIVES = {
+    "tasks"    : "on_time",
+    "priority" : "weighted_lateness",
+    "reward"   : "reward",
+    "time"     : "tardiness",
+}
+
+# Objectives optimized by the 'pareto' planner of the PMAgent: the default
+# ones plus the objective of every priority mode, so that the front trades
+# off the objective each mode selects by
+PLANNER_OBJECTIVES = DEFAULT_OBJECTIVES + [
+    objective for objective in PRIORITY_OBJECTIVES.values() if objective not in DEFAULT_OBJECTIVES
+]
+
+
+def objective_matrix(index_matrix, table: TaskTable) -> np.ndarray:
+    """
+    Value of every objective of `OBJECTIVES` for each permutation, in a single
+    vectorized pass (see `Batch_evaluation.score_terms`).
+
+    - reward: reward of the tasks finished before their deadline.
+    - weighted_lateness: minus the lateness of each task times its penalty
+      weight (5 - priority).
+    - tardiness: minus the total lateness, without weights.
+    - dependencies: minus the penalty of the tasks placed before one of their
+      dependencies.
+    - variety: bonus minus penalty for the difficulty of consecutive tasks.
+    - on_time: number of tasks finished before their deadline.
+
+    Returns
+    -------
+    objectives : `numpy.ndarray`
+        float64 array of shape (n_permutations, len(OBJECTIVES)).
+    """
+    index_matrix = np.atleast_2d(np.asarray(index_matrix, dtype=np.int64))
+    n_permutations, length = index_matrix.shape
+    if length == 0:
+        return np.zeros((n_permutations, len(OBJECTIVES)))
+
+    rewards, penalties, current_time = score_terms(
+        index_matrix, table, dependency_violations(index_matrix, table)
+    )
+    rewards = rewards.reshape(n_permutations, length, 2)
+    penalties = penalties.reshape(n_permutations, length, 3)
+    lateness = np.maximum(current_time - table.deadline[index_matrix], 0)
+
+    return np.column_stack([
+        rewards[:, :, 0].sum(axis=1),
+        -penalties[:, :, 1].sum(axis=1),
+        -lateness.sum(axis=1),
+        -penalties[:, :, 0].sum(axis=1),
+        rewards[:, :, 1].sum(axis=1) - penalties[:, :, 2].sum(axis=1),
+        (current_time <= table.deadline[index_matrix]).sum(axis=1),
+    ]).astype(np.float64) + 0.0
+
+
+def objective_columns(objectives):
+    """
+    Columns of `objective_matrix` of the objectives named in `objectives`.
+    """
+    for objective in objectives:
+        if objective not in OBJECTIVES:
+            raise Exception(
+                "The objectives must be some of: " + ", ".join(OBJECTIVES)
+            )
+    return [OBJECTIVES.index(objective) for objective in objectives]
+
+
+def dominance_matrix(values) -> np.ndarray:
+    """
+    Boolean matrix whose element (i, j) is ``True`` if solution `i` dominates
+    solution `j`: it is at least as good in every objective and strictly
+    better in one (all objectives are maximized).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    at_least = np.all(values[:, None, :] >= values[None, :, :], axis=2)
+    better = np.any(values[:, None, :] > values[None, :, :], axis=2)
+    return at_least & better
+
+
+def non_dominated_sort(values) -> np.ndarray:
+    """
+    Fast non-dominated sorting of NSGA-II over the (n, m) matrix `values`.
+    The dominance relation is computed at once for every pair, in O(m n^2),
+    and each front is peeled from the previous one with array operations.
+
+    Returns
+    -------
+    ranks : `numpy.ndarray`
+        int64 array with the front of each solution (0 is the Pareto front).
+    """
+    dominates = dominance_matrix(values)
+    n = len(dominates)
+    ranks = np.full(n, -1, dtype=np.int64)
+    # Number of solutions not yet ranked that dominate each solution
+    dominated_by = dominates.sum(axis=0)
+    remaining = np.ones(n, dtype=bool)
+    rank = 0
+    while remaining.any():
+        front = remaining & (dominated_by == 0)
+        ranks[front] = rank
+        remaining &= ~front
+        dominated_by -= dominates[front].sum(axis=0)
+        rank += 1
+    return ranks
+
+
+def crowding_distance(values, ranks) -> np.ndarray:
+    """
+    Crowding distance of NSGA-II: for each solution, sum over the objectives
+    of the normalized distance between its two neighbours in its front. The
+    extreme solutions of each front have infinite distance.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    distance = np.zeros(len(values))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        if len(members) <= 2:
+            distance[members] = np.inf
+            continue
+        front = values[members]
+        order = np.argsort(front, axis=0, kind='stable')
+        ordered = np.take_along_axis(front, order, axis=0)
+        span = ordered[-1] - ordered[0]
+        span[span == 0] = 1.0
+        gaps = np.zeros_like(ordered)
+        gaps[1:-1] = (ordered[2:] - ordered[:-2]) / span
+        gaps[0] = np.inf
+        gaps[-1] = np.inf
+        contribution = np.zeros_like(front)
+        np.put_along_axis(contribution, order, gaps, axis=0)
+        distance[members] = contribution.sum(axis=1)
+    return distance
+
+
+def crowded_tournament(ranks, distance, n) -> np.ndarray:
+    """
+    `n` binary tournaments of NSGA-II at once: the winner is the solution in
+    the better front and, within the same front, the less crowded one.
+    """
+    size = len(ranks)
+    first = np.random.randint(0, size, size=n)
+    second = np.random.randint(0, size, size=n)
+    first_wins = (ranks[first] < ranks[second]) \
+        | ((ranks[first] == ranks[second]) & (distance[first] >= distance[second]))
+    return np.where(first_wins, first, second)
+
+
+def select_survivors(values, n):
+    """
+    Environmental selection of NSGA-II: the `n` solutions with the best
+    front and, within the last front that fits, the largest crowding
+    distance.
+
+    Returns
+    -------
+    survivors : `numpy.ndarray`
+        indices of the selected solutions, ordered by front and crowding.
+
+    ranks, distance : `numpy.ndarray`
+        front and crowding distance of every solution of `values`.
+    """
+    ranks = non_dominated_sort(values)
+    distance = crowding_distance(values, ranks)
+    order = np.lexsort((-distance, ranks))
+    return order[:n], ranks, distance
@@ -0,0 +1,299 @@
+import heapq
+import random
+import numpy as np
+from Tasks.task_table import TaskTable
+
+# Mutation operators over permutations of table indices. They modify the
+# permutation array in place and never place a task before one of its
+# dependencies that was already before it, so a permutation that respects the
+# dependencies keeps respecting them.
+
+MUTATION_OPERATORS = ["swap", "insertion", "inversion", "scramble"]
+
+
+def check_operators(operators):
+    for operator in operators:
+        if operator not in MUTATION_OPERATORS:
+            raise Exception(
+                "The mutation operators must be: " + ", ".join(MUTATION_OPERATORS)
+            )
+
+
+class Mutator:
+    """
+    Operadores de mutación sobre permutaciones de índices de una `TaskTable`.
+    Trabajan sobre el propio arreglo de la permutación (in place) y reutilizan
+    los buffers del `Mutator`, por lo que no copian la permutación ni las
+    tareas.
+
+    - swap: intercambia dos tareas si ninguna dependencia lo impide.
+    - insertion: mueve una tarea a otra posición entre su última dependencia
+      y su primera tarea dependiente.
+    - inversion: invierte un segmento y reordena lo mínimo sus tareas para
+      respetar las dependencias entre ellas.
+    - scramble: baraja un segmento y lo reordena igual que inversion.
+
+    Parameters
+    ----------
+    table : `TaskTable`
+        tabla de las tareas combinadas.
+
+    operators : `list`, optional
+        operadores a usar, elegidos al azar en cada mutación.
+        (default todos los de `MUTATION_OPERATORS`)
+
+    weights : `list`, optional
+        peso de cada operador de `operators`. (default iguales)
+
+    max_segment : `int`, optional
+        longitud máxima de los segmentos de inversion y scramble.
+        (default ``None``, sin límite)
+    """
+
+    def __init__(self, table: TaskTable, operators=None, weights=None, max_segment=None):
+        if operators is None:
+            operators = MUTATION_OPERATORS
+        check_operators(operators)
+        self.table = table
+        self.operators = list(operators)
+        self.weights = None if weights is None else list(weights)
+        self.max_segment = max_segment
+
+        ptr, idx = table.dependents()
+        self._dependent_ptr = ptr.tolist()
+        self._dependent_idx = idx.tolist()
+        self._dependency_ptr = table.dependency_ptr.tolist()
+        self._dependency_idx = table.dependency_idx.tolist()
+        # Buffers reutilizados en cada mutación
+        self._position = np.zeros(len(table), dtype=np.int64)
+        self._arange = np.arange(len(table), dtype=np.int64)
+        self._in_segment = np.zeros(len(table), dtype=bool)
+
+    def __repr__(self):
+        return f"Mutator(Operators: {self.operators} Tasks: {len(self.table)})"
+
+    def _update_positions(self, permutation):
+        self._position[permutation] = self._arange[:len(permutation)]
+        return self._position
+
+    def _position_of(self, permutation, task):
+        # Posición de la tarea en la permutación, -1 si no está (el buffer
+        # puede guardar posiciones de otras permutaciones)
+        position = int(self._position[task])
+        if position < len(permutation) and permutation[position] == task:
+            return position
+        return -1
+
+    def _dependencies(self, task):
+        return self._dependency_idx[self._dependency_ptr[task]:self._dependency_ptr[task + 1]]
+
+    def _dependents(self, task):
+        return self._dependent_idx[self._dependent_ptr[task]:self._dependent_ptr[task + 1]]
+
+    def _segment(self, n):
+        length = n if self.max_segment is None else min(n, self.max_segment)
+        size = random.randint(2, length) if length >= 2 else length
+        start = random.randint(0, n - size)
+        return start, start + size
+
+    ########################### Operadores #####################################
+
+    def swap(self, permutation, i=None, j=None):
+        '''
+            Intercambia las tareas de las posiciones i < j si la tarea de j no depende de ninguna
+            tarea de [i, j) y ninguna tarea de (i, j] depende de la tarea de i. Devuelve si hubo cambio
+        '''
+        n = len(permutation)
+        if n < 2:
+            return False
+        if i is None or j is None:
+            i, j = random.sample(range(n), 2)
+        i, j = min(i, j), max(i, j)
+        self._update_positions(permutation)
+        first = int(permutation[i])
+        second = int(permutation[j])
+        for dependency in self._dependencies(second):
+            if i <= self._position_of(permutation, dependency) < j:
+                return False
+        for dependent in self._dependents(first):
+            if i < self._position_of(permutation, dependent) <= j:
+                return False
+        permutation[i], permutation[j] = second, first
+        return True
+
+    def insertion(self, permutation, i=None, j=None):
+        '''
+            Mueve la tarea de la posición i a la posición j. Si no se indica j, se elige al azar entre
+            las posiciones que quedan después de sus dependencias y antes de sus tareas dependientes
+        '''
+        n = len(permutation)
+        if n < 2:
+            return False
+        if i is None:
+            i = random.randrange(n)
+        self._update_positions(permutation)
+        task = int(permutation[i])
+        low = 0
+        high = n - 1
+        for dependency in self._dependencies(task):
+            position = self._position_of(permutation, dependency)
+            if 0 <= position < i:
+                low = max(low, position + 1)
+        for dependent in self._dependents(task):
+            position = self._position_of(permutation, dependent)
+            if position > i:
+                high = min(high, position - 1)
+        if j is None:
+            if low >= high:
+                return False
+            j = random.randint(low, high)
+        j = min(max(j, low), high)
+        if j == i:
+            return False
+        # Desplazamiento in place del tramo entre i y j
+        if j > i:
+            permutation[i:j] = permutation[i + 1:j + 1]
+        else:
+            permutation[j + 1:i + 1] = permutation[j:i]
+        permutation[j] = task
+        return True
+
+    def inversion(self, permutation, start=None, end=None):
+        '''
+            Invierte el segmento [start, end) y después lo reordena para que respete las
+            dependencias entre sus tareas (ver `_repair_segment`)
+        '''
+        if start is None or end is None:
+            start, end = self._segment(len(permutation))
+        if end - start < 2:
+            return False
+        permutation[start:end] = permutation[start:end][::-1]
+        self._repair_segment(permutation, start, end)
+        return True
+
+    def scramble(self, permutation, start=None, end=None):
+        '''
+            Baraja el segmento [start, end) y después lo reordena para que respete las dependencias
+            entre sus tareas (ver `_repair_segment`)
+        '''
+        if start is None or end is None:
+            start, end = self._segment(len(permutation))
+        if end - start < 2:
+            return False
+        np.random.shuffle(permutation[start:end])
+        self._repair_segment(permutation, start, end)
+        return True
+
+    def _repair_segment(self, permutation, start, end):
+        '''
+            Reordena el segmento de forma estable (Kahn con un heap que toma siempre la primera tarea
+            disponible del segmento) para que cada tarea quede después de sus dependencias del propio
+            segmento.
+            Las dependencias de fuera del segmento no cambian de lado, así que siguen cumpliéndose
+        '''
+        segment = permutation[start:end].tolist()
+        in_segment = self._in_segment
+        in_segment[segment] = True
+        missing = {}
+        for task in segment:
+            missing[task] = sum(1 for dependency in self._dependencies(task) if in_segment[dependency])
+        if any(missing.values()):
+            heap = [k for k, task in enumerate(segment) if missing[task] == 0]
+            local = {task: k for k, task in enumerate(segment)}
+            order = []
+            while heap:
+                task = segment[heapq.heappop(heap)]
+                order.append(task)
+                for dependent in self._dependents(task):
+                    if in_segment[dependent]:
+                        missing[dependent] -= 1
+                        if missing[dependent] == 0:
+                            heapq.heappush(heap, local[dependent])
+            # Ciclo de dependencias: se conserva el orden del resto
+            if len(order) < len(segment):
+                placed = set(order)
+                order += [task for task in segment if task not in placed]
+            permutation[start:end] = order
+        in_segment[segment] = False
+
+    ########################################################################
+
+    def mutate(self, permutation, rate, operators=None):
+        '''
+            Aplica a la permutación (in place) un número de mutaciones con distribución binomial
+            (una oportunidad por posición con probabilidad `rate`), eligiendo cada vez un operador.
+            `operators` sustituye solo en esta llamada a los operadores del Mutator (sin sus pesos),
+            de modo que un mismo Mutator y sus buffers sirven para cualquier lista de operadores.
+            Devuelve el número de mutaciones que cambiaron la permutación
+        '''
+        weights = self.weights
+        if operators is None:
+            operators = self.operators
+        elif list(operators) != self.operators:
+            check_operators(operators)
+            weights = None
+        n_mutations = np.random.binomial(len(permutation), rate) if len(permutation) > 0 else 0
+        changes = 0
+        for _ in range(n_mutations):
+            operator = random.choices(operators, weights=weights)[0]
+            if getattr(self, operator)(permutation):
+                changes += 1
+        return changes
+
+
+class AdaptiveRate:
+    """
+    Probabilidad de mutación adaptativa. En cada generación se multiplica
+    por `factor` si el mejor fitness no mejoró, para explorar más, y se
+    divide por `factor` si mejoró, para explotar la región encontrada. La
+    decisión se toma con el resultado de cada generación, sin calcular una
+    tasa de éxito sobre una ventana de generaciones (no es la regla del 1/5).
+
+    Parameters
+    ----------
+    rate : `float`
+        probabilidad inicial.
+
+    min_rate, max_rate : `float`, optional
+        límites de la probabilidad. (default ``0.001`` y ``0.5``)
+
+    factor : `float`, optional
+        factor por el que se multiplica o divide la probabilidad.
+        (default ``1.5``)
+    """
+
+    def __init__(self, rate, min_rate=0.001, max_rate=0.5, factor=1.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.factor = factor
+
+    def __repr__(self):
+        return f"AdaptiveRate(Rate: {self.rate})"
+
+    def update(self, improved):
+        '''
+            Actualiza la probabilidad según si la última generación mejoró el mejor fitness
+        '''
+        if improved:
+            self.rate = max(self.min_rate, self.rate / self.factor)
+        else:
+            self.rate = min(self.max_rate, self.rate * self.factor)
+        return self.rate
+
+
+def warm_start_permutations(permutation, table: TaskTable, n, rate=0.05, operators=None):
+    '''
+        Población inicial a partir de una permutación ya conocida (por ejemplo, el plan actual):
+        la propia permutación seguida de n - 1 copias mutadas con `Mutator.mutate`. Si la
+        permutación respeta las dependencias, las copias también
+    '''
+    permutation = np.asarray(permutation, dtype=np.int64)
+    mutator = Mutator(table, operators=operators)
+    permutations = np.empty((n, len(permutation)), dtype=np.int32)
+    for k in range(n):
+        copy = permutation.copy()
+        if k > 0:
+            mutator.mutate(copy, rate)
+        permutations[k] = copy
+    return permutations
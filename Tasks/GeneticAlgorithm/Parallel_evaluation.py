@@ -0,0 +1,123 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Batch_evaluation import get_batch_function
+
+# State of each worker process, set once by the pool initializer
+_worker_table = None
+_worker_function = None
+_worker_vectorized = False
+
+
+def _init_worker(tasks, objective_function, vectorized):
+    global _worker_table, _worker_function, _worker_vectorized
+    _worker_table = TaskTable(tasks)
+    _worker_function = objective_function
+    _worker_vectorized = vectorized
+
+
+def _evaluate_chunk(chunk):
+    if _worker_vectorized:
+        return get_batch_function(_worker_function)(chunk, _worker_table)
+    return np.array([_worker_function(_worker_table.decode(permutation)) for permutation in chunk],
+                    dtype=np.float64)
+
+
+def resolve_n_jobs(n_jobs):
+    """
+    Number of worker processes for `n_jobs`: ``None`` or 1 means serial
+    evaluation, -1 means one process per CPU.
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+    if n_jobs < 1:
+        raise Exception("n_jobs must be a positive integer or -1.")
+    return int(n_jobs)
+
+
+class ParallelEvaluator:
+    """
+    Persistent process pool that evaluates the objective function over
+    permutations of a fixed list of tasks.
+
+    The tasks and the objective function are sent once to each worker when the
+    pool starts. After that only compact integer permutations (indices into
+    the task list) travel to the workers, and only the fitness values come
+    back.
+
+    Parameters
+    ----------
+    tasks : `list`
+        Tasks combined by the permutations. The index of each task in this
+        list is the value used in the permutations.
+
+    objective_function : `function`
+        Function to evaluate. Must be picklable (defined at module level).
+
+    n_jobs : `int`, optional
+        Number of worker processes, -1 uses all the CPUs. (default ``-1``)
+
+    vectorized : `bool`, optional
+        Each worker scores its chunk with the vectorized version of
+        `objective_function`. (default ``False``)
+
+    Attributes
+    ----------
+    n_jobs : `int`
+        Number of worker processes of the pool.
+    """
+
+    def __init__(self, tasks, objective_function, n_jobs=-1, vectorized=False):
+        if vectorized:
+            # Fail early if there is no vectorized version of the function
+            get_batch_function(objective_function)
+        self.tasks = tasks
+        self.objective_function = objective_function
+        self.vectorized = vectorized
+        self.n_jobs = resolve_n_jobs(n_jobs)
+        self._executor = ProcessPoolExecutor(
+                            max_workers = self.n_jobs,
+                            initializer = _init_worker,
+                            initargs    = (list(tasks), objective_function, vectorized)
+                        )
+
+    def __repr__(self):
+        return f"ParallelEvaluator(Tasks: {len(self.tasks)} Jobs: {self.n_jobs})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def matches(self, tasks, objective_function, vectorized):
+        """Whether the pool was started for these tasks and objective function."""
+        return self.tasks is tasks and self.objective_function is objective_function \
+            and self.vectorized == vectorized
+
+    def evaluate(self, index_matrix):
+        """
+        Evaluates every row of `index_matrix` in the pool.
+
+        Parameters
+        ----------
+        index_matrix : `numpy.ndarray`
+            int array of shape (n_permutations, n_tasks).
+
+        Returns
+        -------
+        function_values : `numpy.ndarray`
+            value of the objective function for each row, in row order.
+        """
+        index_matrix = np.asarray(index_matrix, dtype=np.int32)
+        if len(index_matrix) == 0:
+            return np.empty(0)
+        chunks = np.array_split(index_matrix, min(self.n_jobs, len(index_matrix)))
+        return np.concatenate(list(self._executor.map(_evaluate_chunk, chunks)))
+
+    def shutdown(self):
+        """Stops the worker processes."""
+        self._executor.shutdown(wait=True)
@@ -1,5 +1,8 @@
-from collections import deque
+import heapq
+import numpy as np
 from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.dependency_index import shared_dependency_index
 import random
 from typing import List, Dict
 
@@ -7,22 +10,8 @@ def generate_permutation(tasks: List[Task], verbose=False) -> List[Task]:
     '''
         Generar una permutation con un grado de aleatoriedad, utilizando orden topologico y una funcion de ponderacion
     '''
-    graph = get_graph(tasks)
-    if verbose:
-        print("Estructura del grafo: ")
-        print(graph)
-    
-    order = topologic_order(graph)
-    if verbose:
-        print("Orden topologico: ")
-        print(order)
-    
-    order = mutation(graph, order)
-    if verbose:
-        print("Orden topologico mutado: ")
-        print(order)
-    
-    return pondered_order(order, tasks)
+    table = TaskTable(tasks)
+    return table.decode(generate_permutation_indices(table, verbose=verbose))
 
 def get_graph(tasks: List[Task]) -> Dict[int, List[Task]]:
     '''
@@ -41,40 +30,42 @@ def get_graph(tasks: List[Task]) -> Dict[int, List[Task]]:
 
 def topologic_order(graph: Dict[int, List[Task]]) -> List[List[int]]:
     '''
-        Ordenar un grafo topologicamente
+        Ordenar un grafo topologicamente. Kahn aleatorio: la tarea a procesar se elige al azar
+        entre las disponibles y se extrae intercambiándola con la última (O(1)), y el nivel de
+        cada tarea es el del camino de dependencias más largo que termina en ella
     '''
     
     indegree = {}
     level = {}
     for key in graph:
         indegree[key] = 0
+        level[key] = 0
     
     for key in graph:
         for task in graph[key]:
             indegree[task.id] += 1
     
-    queue = deque()
-    for key in indegree:
-        if indegree[key] == 0:
-            queue.append(key)
-            level[key] = 0
+    ready = [key for key in graph if indegree[key] == 0]
     
     max_level = 0
-    while queue:
-        key = random.choice(queue)
-        queue.remove(key)
+    processed = []
+    while ready:
+        i = random.randrange(len(ready))
+        ready[i], ready[-1] = ready[-1], ready[i]
+        key = ready.pop()
+        processed.append(key)
         max_level = max(max_level, level[key])
         
         for task in graph[key]:
             indegree[task.id] -= 1
+            level[task.id] = max(level[task.id], level[key] + 1)
             
             if indegree[task.id] == 0:
-                queue.append(task.id)
-                level[task.id] = level[key] + 1
+                ready.append(task.id)
     
     order = [[] for _ in range(max_level + 1)]
     
-    for key in level:
+    for key in processed:
         order[level[key]].append(key)
     
     return order
@@ -107,72 +98,149 @@ def pondered_order(order: List[List[int]], tasks: List[Task]) -> List[Task]:
     for task in tasks:
         dict[task.id] = task
 
-    for i in range(len(order)):
-        order[i].sort(key=lambda x:random.random()*dict[x].reward/(dict[x].duration * dict[x].duration * dict[x].difficulty * dict[x].problems_probability * (dict[x].deadline-dict[x].start)), reverse=True)
-    
     permutation = []
     for level in order:
-        permutation += level
+        # Claves de todo el nivel calculadas de una vez
+        level_tasks = [dict[x] for x in level]
+        keys = pondered_keys(
+            np.array([task.reward for task in level_tasks], dtype=np.float64),
+            np.array([task.duration for task in level_tasks], dtype=np.float64),
+            np.array([task.difficulty for task in level_tasks], dtype=np.float64),
+            np.array([task.problems_probability for task in level_tasks], dtype=np.float64),
+            np.array([task.deadline - task.start for task in level_tasks], dtype=np.float64)
+        )
+        permutation += [level[i] for i in np.argsort(-keys, kind='stable')]
     
     return [dict[x] for x in permutation]
 
+def pondered_keys(reward, duration, difficulty, problems_probability, window):
+    '''
+        Clave aleatoria ponderada de cada tarea: las tareas con más recompensa y menos duración,
+        dificultad, probabilidad de problemas y margen tienden a ir primero. Un denominador nulo
+        da clave infinita (la tarea va primero) en lugar de un error
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keys = np.random.random(len(reward)) * reward / (duration * duration * difficulty * problems_probability * window)
+    return np.nan_to_num(keys, nan=0.0, posinf=np.inf, neginf=-np.inf)
 
-import random
-from collections import deque
-from typing import Dict, List
 
 def mutation(graph: Dict[int, List['Task']], order: List[List[int]]) -> List[List[int]]:
     '''
-        Dado un orden topologico y una lista de tareas, empuja una tarea al siguiente nivel junto con todas las tareas que dependen de esta
+        Dado un orden topologico y una lista de tareas, empuja una tarea al siguiente nivel junto con las tareas que dependen de esta
     '''
     
-    # Crear una nueva lista de orden con tamaño len(order) + 2
-    new_order = [[] for _ in range(len(order) + 2)]
-    
-    # Selecciona un índice aleatorio dentro de los límites del grafo
-    task_index = random.randint(0, len(graph) - 1)
+    # Nivel de cada tarea (una sola pasada sobre el orden)
+    level = {}
+    for i, tasks in enumerate(order):
+        for task in tasks:
+            level[task] = i
     
-    # Obtener la clave correcta del grafo (que es el id de la tarea) basándose en el índice seleccionado
-    for i, k in enumerate(graph.keys()):
-        if i == task_index:
-            task_index = k
-            break
+    # Selecciona una tarea aleatoria del grafo
+    task_index = list(graph.keys())[random.randint(0, len(graph) - 1)]
 
-    # Inicializar el nivel de la tarea seleccionada
-    task_level = 0
-    for level, tasks in enumerate(order):
-        if task_index in tasks:
-            task_level = level
-            break  # Una vez encontrada la tarea, salimos del bucle
+    new_level = push_down(level, task_index, lambda key: [task.id for task in graph[key]])
 
-    # Cola para propagar las dependencias
-    queue = deque()
-    queue.append((task_index, task_level + 1))
-    processed_tasks = set()
+    new_order = [[] for _ in range(max(new_level.values(), default=0) + 1)]
+    for tasks in order:
+        for task in tasks:
+            new_order[new_level[task]].append(task)
 
-    # Mientras haya tareas en la cola
-    while queue:
-        current_task, current_level = queue.popleft()
+    return new_order
 
-        # Asegurarse de que el current_level no exceda el tamaño de new_order
-        if current_level < len(new_order):
-            new_order[current_level].append(current_task)
-        
-        processed_tasks.add(current_task)
+def push_down(level, task, dependents):
+    '''
+        Baja `task` un nivel y propaga el cambio a las tareas que dependen de ella: cada tarea
+        queda al menos un nivel por debajo de todas sus dependencias, por lo que el orden por
+        niveles sigue respetando las dependencias. `level` es un diccionario o un arreglo con el
+        nivel de cada tarea y `dependents(t)` devuelve las tareas que dependen de `t`. Las tareas
+        se procesan por nivel con un heap, de modo que cada una se actualiza una sola vez
+    '''
+    level = level.copy()
+    level[task] += 1
+    heap = [(level[task], task)]
+    while heap:
+        current_level, current = heapq.heappop(heap)
+        if current_level != level[current]:
+            continue
+        for dependent in dependents(current):
+            if level[dependent] <= current_level:
+                level[dependent] = current_level + 1
+                heapq.heappush(heap, (level[dependent], dependent))
+    return level
 
-        # Agregar las tareas dependientes al siguiente nivel
-        for task in graph[current_task]:
-            if task.id not in processed_tasks:
-                queue.append((task.id, current_level + 1))
+####################### Versión sobre TaskTable #############################
 
-    # Añadir las tareas que no fueron procesadas
-    for i in range(len(order)):
-        for task in order[i]:
-            if task not in processed_tasks:
-                new_order[i].append(task)
+def random_topological_order(table: TaskTable) -> np.ndarray:
+    '''
+        Orden topologico aleatorio de los índices de la tabla con Kahn: la tarea a procesar se
+        elige al azar entre las disponibles y se extrae intercambiándola con la última del arreglo
+        (O(1)), por lo que el coste total es O(n + E)
+    '''
+    ptr, idx = table.dependents()
+    ptr = ptr.tolist()
+    idx = idx.tolist()
+    indegree = np.diff(table.dependency_ptr).tolist()
+    ready = [i for i in range(len(table)) if indegree[i] == 0]
+    order = []
+    while ready:
+        i = random.randrange(len(ready))
+        ready[i], ready[-1] = ready[-1], ready[i]
+        task = ready.pop()
+        order.append(task)
+        for dependent in idx[ptr[task]:ptr[task + 1]]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    # Tareas en un ciclo de dependencias
+    if len(order) < len(table):
+        placed = np.zeros(len(table), dtype=bool)
+        placed[order] = True
+        order += np.flatnonzero(~placed).tolist()
+    return np.array(order, dtype=np.int64)
 
-    return new_order
+def table_mutation(table: TaskTable, levels=None, task=None) -> np.ndarray:
+    '''
+        Versión de `mutation` sobre los niveles de la tabla (ver `TaskTable.levels`): baja una
+        tarea aleatoria un nivel junto con las tareas que dependen de ella
+    '''
+    if levels is None:
+        levels = table.levels()
+    if task is None:
+        task = random.randint(0, len(table) - 1)
+    ptr, idx = table.dependents()
+    return push_down(levels, task, lambda i: idx[ptr[i]:ptr[i + 1]].tolist())
+
+def table_pondered_order(table: TaskTable, levels) -> np.ndarray:
+    '''
+        Versión de `pondered_order` sobre la tabla: ordena los índices por nivel y, dentro de cada
+        nivel, por la clave ponderada de mayor a menor, con una sola ordenación de NumPy
+    '''
+    keys = pondered_keys(
+        table.reward.astype(np.float64),
+        table.duration.astype(np.float64),
+        table.difficulty.astype(np.float64),
+        table.problems_probability.astype(np.float64),
+        (table.deadline - table.start).astype(np.float64)
+    )
+    return np.lexsort((-keys, levels)).astype(np.int64)
+
+def generate_permutation_indices(table: TaskTable, verbose=False) -> np.ndarray:
+    '''
+        Versión de `generate_permutation` sobre una `TaskTable`: niveles topológicos exactos
+        (calculados una vez por tabla), mutación de un nivel y orden ponderado en cada nivel
+    '''
+    levels = table.levels()
+    if verbose:
+        print("Niveles topologicos: ")
+        print(levels)
+
+    if len(table) > 0:
+        levels = table_mutation(table, levels)
+    if verbose:
+        print("Niveles topologicos mutados: ")
+        print(levels)
 
+    return table_pondered_order(table, levels)
 
 def dependency_aware_crossover(parent1: List[Task], parent2: List[Task], verbose =False) -> List[Task]:
     '''
@@ -181,18 +249,31 @@ def dependency_aware_crossover(parent1: List[Task], parent2: List[Task], verbose
     '''
     child = []
     placed_tasks = set()
+    # Con tareas de un Project las dependencias colocadas se llevan también como máscara de bits
+    # de su índice de dependencias
+    index = shared_dependency_index(parent1)
+    if index is not None and shared_dependency_index(parent2) is not index:
+        index = None
+    placed = 0
 
     segment_length = random.randint(1, len(parent1) // 2) 
     for task in parent1[:segment_length]:
         child.append(task)
         placed_tasks.add(task.id)
+        if index is not None:
+            placed |= 1 << task._index
     
     for task in parent2:
         if task.id not in placed_tasks:
-            dependencies_satisfied = all(dependency.id in placed_tasks for dependency in task.dependencies)
+            if index is not None:
+                dependencies_satisfied = index.is_ready(task._index, placed)
+            else:
+                dependencies_satisfied = all(dependency.id in placed_tasks for dependency in task.dependencies)
             if dependencies_satisfied:
                 child.append(task)
                 placed_tasks.add(task.id)
+                if index is not None:
+                    placed |= 1 << task._index
     
     for task in parent1:
         if task.id not in placed_tasks:
@@ -6,10 +6,20 @@ import random
 import copy
 import pandas as pd
 import time
+from collections import deque
 from datetime import datetime
-from Tasks.GeneticAlgorithm.Permutations_generator_heuristics import dependency_aware_crossover
 from Tasks.GeneticAlgorithm.Tasks_combination import Tasks_combination
-from Tasks.GeneticAlgorithm.Crossover_heuristics import crossing_by_cut_off_point
+from Tasks.GeneticAlgorithm.Crossover_operators import get_crossover_method
+from Tasks.GeneticAlgorithm.Selection import fitness_vector, select_indices
+from Tasks.GeneticAlgorithm.Batch_evaluation import encode_population, get_batch_function
+from Tasks.GeneticAlgorithm.Parallel_evaluation import ParallelEvaluator, resolve_n_jobs
+from Tasks.GeneticAlgorithm.Convergence import ConvergenceMonitor, STOP_GENERATIONS
+from Tasks.GeneticAlgorithm.Prefix_scoring import check_incremental_function, incremental_function_value
+from Tasks.GeneticAlgorithm.Mutation_operators import Mutator, AdaptiveRate
+from Tasks.GeneticAlgorithm.History import HistoryRecorder, HISTORY_BEST, HISTORY_FULL
+from Tasks.GeneticAlgorithm.Multi_objective import objective_matrix, objective_columns, select_survivors, \
+    crowded_tournament, DEFAULT_OBJECTIVES, OBJECTIVES, PRIORITY_OBJECTIVES
+from Tasks.task_table import TaskTable
 
 import warnings
 warnings.filterwarnings('ignore')
@@ -26,6 +36,17 @@ class Population:
     verbose : `bool`, optional
         mostrar información del proceso por pantalla. (default ``False``)
 
+    fitness_cache : `FitnessCache`, optional
+        caché de valores de la función objetivo. Se consulta antes de evaluar
+        cada individuo, de modo que las permutaciones repetidas (élite,
+        individuos iguales) no se vuelven a evaluar. Puede compartirse entre
+        varias poblaciones de las mismas tareas. (default ``None``, sin caché)
+
+    permutations : `numpy.ndarray`, optional
+        permutaciones (índices de la tabla de tareas) de los individuos
+        iniciales, una por fila. Si hay menos filas que `n_individuos`, el
+        resto de individuos se genera de forma aleatoria. (default ``None``)
+
     Attributes
     ----------
     individuos : `list`
@@ -51,21 +72,24 @@ class Population:
         valor de las variables del mejor individuo de la población en su estado
         actual.
 
-    historico_individuos : `list`
-        lista con la información de todos los individuos en cada una de las 
-        generaciones que ha tenido la población.
+    history : `HistoryRecorder`
+        histórico de la última optimización, con el nivel de detalle elegido
+        en `optimize` (ver `HistoryRecorder`).
+
+    last_generation : `list`
+        individuos de la última generación evaluada.
 
     historico_mejor_individuo_variables : `list`
         lista con valor de las variables del mejor individuo en cada una de las 
-        generaciones que ha tenido la población.
+        generaciones del histórico (niveles "best" y "full").
 
     historico_mejor_fitness : `list`
-        lista con el mejor fitness en cada una de las generaciones que ha tenido
-        la población.
+        lista con el mejor fitness en cada una de las generaciones del
+        histórico.
 
     historico_mejor_function_value : `list`
         lista con valor de la función objetivo del mejor individuo en cada una
-        de las generaciones que ha tenido la población.
+        de las generaciones del histórico.
 
     diferencia_abs : `list`
         diferencia absoluta entre el mejor fitness de generaciones consecutivas.
@@ -91,18 +115,36 @@ class Population:
     iter_optimizacion : `int`
         número de iteraciones de optimización (generaciones).
 
+    stop_reason : `str`
+        motivo por el que terminó la optimización: "n_generations", "plateau",
+        "diversity" o "time_budget" (ver `Convergence`).
+
+    mutation_rate : `AdaptiveRate`
+        probabilidad de mutación adaptativa de la última optimización con
+        `adaptive_mutation=True`.
+
+    pareto_front : `list`
+        individuos del frente de Pareto de la última optimización
+        multiobjetivo (ver `optimize_multiobjective`).
+
+    pareto_objectives : `numpy.ndarray`
+        valor de cada objetivo de `OBJECTIVES` para cada individuo de
+        `pareto_front`.
+
 
 
     """
 
-    def __init__(self, n_individuals, tasks, verbose=False):
+    def __init__(self, n_individuals, tasks, verbose=False, fitness_cache=None, permutations=None):
 
         # Number of individuals in the population
         self.n_individuals = n_individuals
+        # Array-backed table of the tasks, shared by all the individuals
+        self.task_table = tasks if isinstance(tasks, TaskTable) else TaskTable(tasks)
         # Number of variables for each individual
         self.n_variables = len(tasks)
         # Tasks to combine for the individuals
-        self.tasks = tasks
+        self.tasks = self.task_table.tasks
         # List of the individuals in the population
         self.individuals = []
         # Flag to know if the population has been optimized
@@ -117,16 +159,12 @@ class Population:
         self.best_function_value = None
         # Variable values of the best individual in the population
         self.best_variable_values = None
-        # Information of all the individuals in the population at each generation
-        self.individuals_history = []
-        # Variable values of the best individual in each generation
-        self.best_variable_values_history = []
-        # Fitness of the best individual in each generation
-        self.best_fitness_history = []
-        # Objective function value of the best individual in each generation
-        self.best_function_value_history = []
-        # Absolute difference between the best fitness of consecutive generations
-        self.absolute_difference = []
+        # History of the last optimization, stored as NumPy arrays (see
+        # HistoryRecorder). The best_*_history and absolute_difference
+        # properties read it.
+        self.history = None
+        # Individuals of the last evaluated generation
+        self.last_generation = None
         # DataFrame with the information of the best fitness and variable values found
         # in each generation, as well as the difference from the previous generation.
         self.results_df = None
@@ -136,14 +174,30 @@ class Population:
         self.optimal_variable_values = None
         # Objective function value of the best individual across all generations
         self.optimal_function_value = None
+        # Reason why the last optimization stopped
+        self.stop_reason = None
+        # Process pool started by the population for parallel evaluation
+        self.evaluator = None
+        # Cache of objective function values (None if the population has no cache)
+        self.fitness_cache = fitness_cache
+        # Mutation operators over the shared task table, created on first use
+        self.mutator = None
+        # Adaptive mutation probability (None if the mutation rate is fixed)
+        self.mutation_rate = None
+        # Pareto front of the last multi-objective optimization
+        self.pareto_front = None
+        self.pareto_objectives = None
 
         # INDIVIDUALS OF THE POPULATION ARE CREATED AND STORED
         # ----------------------------------------------------------------------
+        if permutations is None:
+            permutations = []
         for i in np.arange(n_individuals):
             individual_i = Tasks_combination(
                             n_variables = self.n_variables,
-                            tasks = tasks,
-                            verbose = verbose
+                            tasks = self.task_table,
+                            verbose = verbose,
+                            permutation = permutations[i] if i < len(permutations) else None
                         )
             self.individuals.append(individual_i)
 
@@ -192,6 +246,32 @@ class Population:
             
         return text
 
+    # HISTORY OF THE LAST OPTIMIZATION
+    # --------------------------------------------------------------------------
+    # Views over the arrays of `self.history`, empty if nothing was recorded.
+
+    @property
+    def best_fitness_history(self):
+        return [] if self.history is None else self.history.column("best_fitness").tolist()
+
+    @property
+    def best_function_value_history(self):
+        return [] if self.history is None else self.history.column("best_function_value").tolist()
+
+    @property
+    def best_variable_values_history(self):
+        if self.history is None:
+            return []
+        return [self.task_table.decode(permutation)
+                for permutation in self.history.column("best_permutation")]
+
+    @property
+    def absolute_difference(self):
+        if self.history is None:
+            return []
+        return [None if np.isnan(difference) else difference
+                for difference in self.history.column("absolute_difference").tolist()]
+
 
     def show_individuals(self, n=None):
         """
@@ -214,10 +294,14 @@ class Population:
         return None
 
 
-    def evaluate_population(self, objective_function, optimization, verbose=False):
+    def evaluate_population(self, objective_function, optimization, verbose=False,
+                            vectorized=False, n_jobs=None, evaluator=None,
+                            incremental=False):
         """
         This method calculates the fitness of all individuals in the population,
-        updates their values, and identifies the best one.
+        updates their values, and identifies the best one. If the population
+        has a `fitness_cache`, only the individuals whose permutation is not
+        in the cache are evaluated.
 
         Parameters
         ----------
@@ -229,26 +313,106 @@ class Population:
 
         verbose : `bool`, optional
             Display process information on the screen. (default is ``False``)
+
+        vectorized : `bool`, optional
+            Score the whole population in a single pass with the vectorized
+            version of `objective_function` (see `Batch_evaluation`). The
+            scores are the same as the ones of the per-individual evaluation.
+            (default is ``False``)
+
+        n_jobs : `int`, optional
+            Number of processes used to evaluate the population, -1 uses all
+            the CPUs. The pool is started on the first call and reused by the
+            following ones until `shutdown_evaluator` is called.
+            (default is ``None``, serial evaluation)
+
+        evaluator : `ParallelEvaluator`, optional
+            Already started pool to use instead of the one of the population,
+            for example to share it among several optimizations of the same
+            tasks. It must have been created with the tasks of the population.
+            (default is ``None``)
+
+        incremental : `bool`, optional
+            Score each individual from the accumulated values of the prefix it
+            shares with the permutation it comes from (see `Prefix_scoring`),
+            so only the positions from the first change onward are evaluated.
+            The scores are the same as the ones of the per-individual
+            evaluation. It is only used when the population is evaluated
+            serially and not vectorized. (default is ``False``)
         """
 
+        individuals = self.individuals[:self.n_individuals]
+
+        # CACHED VALUES
+        # ----------------------------------------------------------------------
+        # Only the individuals whose permutation is not in the cache are evaluated.
+        function_values = [None] * len(individuals)
+        if self.fitness_cache is not None:
+            keys = [
+                self.fitness_cache.key(individual.permutation, self.task_table, objective_function)
+                for individual in individuals
+            ]
+            function_values = [self.fitness_cache.get(key, sequence) for key, sequence in keys]
+        pending = [i for i, value in enumerate(function_values) if value is None]
+        pending_individuals = [individuals[i] for i in pending]
+
+        # VECTORIZED OR PARALLEL EVALUATION OF THE WHOLE POPULATION
+        # ----------------------------------------------------------------------
+        pending_values = None
+        if len(pending) == 0:
+            pending_values = []
+        elif evaluator is not None or resolve_n_jobs(n_jobs) > 1:
+            evaluator = self.get_evaluator(
+                            objective_function = objective_function,
+                            n_jobs             = n_jobs,
+                            evaluator          = evaluator,
+                            vectorized         = vectorized
+                        )
+            index_matrix = encode_population(pending_individuals, self.task_table)
+            pending_values = evaluator.evaluate(index_matrix)
+        elif vectorized:
+            batch_function = get_batch_function(objective_function)
+            index_matrix = encode_population(pending_individuals, self.task_table)
+            pending_values = batch_function(index_matrix, self.task_table)
+        elif incremental:
+            check_incremental_function(objective_function)
+            pending_values = [
+                incremental_function_value(individual, self.task_table)
+                for individual in pending_individuals
+            ]
+
         # EVALUATE EACH INDIVIDUAL IN THE POPULATION
         # ----------------------------------------------------------------------
+        for k, i in enumerate(pending):
+            if pending_values is None:
+                individuals[i].calculate_fitness(
+                    objective_function = objective_function,
+                    optimization       = optimization,
+                    verbose            = verbose
+                )
+                function_values[i] = individuals[i].function_value
+            else:
+                function_values[i] = float(pending_values[k])
+            if self.fitness_cache is not None:
+                self.fitness_cache.put(keys[i][0], keys[i][1], function_values[i])
+
         # BEST INDIVIDUAL IN THE POPULATION
         # ----------------------------------------------------------------------
         # The best individual in the entire population is identified, 
         # the one with the highest fitness.
         # Initially, select the first individual as the best.
-        self.best_individual = copy.deepcopy(self.individuals[0])
+        # Individuals only hold an immutable permutation over the shared task
+        # table, so a shallow copy is enough to detach them.
+        self.best_individual = copy.copy(self.individuals[0])
         if optimization == "maximize" : self.best_individual.fitness = - sys.maxsize - 1
         else : self.best_individual.fitness = sys.maxsize
         for i in np.arange(self.n_individuals):
-            self.individuals[i].calculate_fitness(
-                objective_function = objective_function,
-                optimization       = optimization,
-                verbose            = verbose
+            self.individuals[i].set_function_value(
+                function_value = function_values[i],
+                optimization   = optimization
             )
             if self.individuals[i].fitness > self.best_individual.fitness:
-                self.best_individual = copy.deepcopy(self.individuals[i])
+                self.best_individual = copy.copy(self.individuals[i])
             
 
         # Extract the information of the best individual in the population.
@@ -267,10 +431,62 @@ class Population:
             print("Best variable values found: " + str(self.best_variable_values))
             print("")
 
-    def crossover_individuals(self, parent_1, parent_2, verbose=False, method="smart_cut"):
+    def get_evaluator(self, objective_function, n_jobs=None, evaluator=None, vectorized=False):
+        """
+        This method returns the process pool used to evaluate the population,
+        starting it if needed.
+
+        Parameters
+        ----------
+        objective_function : `function`
+            The function to be optimized.
+
+        n_jobs : `int`, optional
+            Number of processes of the pool. (default is ``None``)
+
+        evaluator : `ParallelEvaluator`, optional
+            External pool to validate and return. (default is ``None``)
+
+        vectorized : `bool`, optional
+            Whether the workers use the vectorized objective function.
+            (default is ``False``)
+
+        Raises
+        ------
+        Exception
+            If `evaluator` was created for other tasks.
+        """
+        if evaluator is not None:
+            if [task.id for task in evaluator.tasks] != self.task_table.ids:
+                raise Exception(
+                    "The evaluator must be created with the tasks of the population."
+                )
+            return evaluator
+
+        if self.evaluator is None \
+            or not self.evaluator.matches(self.tasks, objective_function, vectorized) \
+            or self.evaluator.n_jobs != resolve_n_jobs(n_jobs):
+            self.shutdown_evaluator()
+            self.evaluator = ParallelEvaluator(
+                                tasks              = self.tasks,
+                                objective_function = objective_function,
+                                n_jobs             = n_jobs,
+                                vectorized         = vectorized
+                            )
+        return self.evaluator
+
+    def shutdown_evaluator(self):
+        """
+        This method stops the process pool started by the population, if any.
+        """
+        if self.evaluator is not None:
+            self.evaluator.shutdown()
+            self.evaluator = None
+
+    def crossover_individuals(self, parent_1, parent_2, verbose=False, method="dependency_aware"):
         """
         This method generates a new individual from two parent individuals
-        using the uniform crossover method.
+        using the crossover operator `method`.
 
         Parameters
         ----------
@@ -285,11 +501,19 @@ class Population:
         verbose : `bool`, optional
             Display process information on the screen. (default ``False``)
 
+        method : {"dependency_aware", "cut_off_point", "smart_cut", "ox", "pmx", "pox"}
+            Crossover operator of `Crossover_operators`. "ox" and "pmx" repair
+            the offspring so that it respects the dependencies, and "pox"
+            keeps them if both parents do. (default "dependency_aware")
+
         Raises
         ------
         Exception
             If the indices parent_1 or parent_2 are not valid indices.
 
+        Exception
+            If `method` is not a known crossover operator.
+
         Returns
         ------
         offspring : `Individual`
@@ -323,12 +547,12 @@ class Population:
 
         # INITIAL CHECKS: EXCEPTIONS AND WARNINGS
         # ----------------------------------------------------------------------
-        if parent_1 not in np.arange(self.n_individuals):
+        if not 0 <= parent_1 < self.n_individuals:
             raise Exception(
                 "The index of parent_1 must be a value between 0 and " +
                 "the number of individuals in the population."
             )
-        if parent_2 not in np.arange(self.n_individuals):
+        if not 0 <= parent_2 < self.n_individuals:
             raise Exception(
                 "The index of parent_2 must be a value between 0 and " +
                 "the number of individuals in the population."
@@ -339,11 +563,6 @@ class Population:
         # Extract the parents according to the specified indices.
         parent_1 = self.individuals[parent_1]
         parent_2 = self.individuals[parent_2]
-        
-        # Clone one of the parents to use as a template for the new individual.
-        offspring = copy.deepcopy(parent_1)
-        offspring.variable_values = np.repeat(None, offspring.n_variables)
-        offspring.fitness = None
 
         # # Randomly select the positions inherited from parent_1 and parent_2.
         # inheritance_parent_1 = np.random.choice(
@@ -360,12 +579,21 @@ class Population:
         #     else :
         #         offspring.variable_values[index] = parent_2.variable_values[index]
 
-        #offspring.variable_values = crossing_by_cut_off_point(parent_1.variable_values, parent_2.variable_values, mode="inteligente")
-        offspring.variable_values = dependency_aware_crossover(parent_1.variable_values, parent_2.variable_values)
-
-        # Create a deepcopy to make the new individual independent of the parents.
-        # This prevents issues if the offspring is later mutated.
-        offspring = copy.deepcopy(offspring)
+        # The operators work on the permutations of table indices, so no task
+        # list is built for the parents or the offspring.
+        crossover = get_crossover_method(method)
+        offspring_permutation = crossover(parent_1.permutation, parent_2.permutation, self.task_table)
+
+        # The new individual only owns its permutation of the shared task table,
+        # so it is independent of the parents without copying any task.
+        offspring = Tasks_combination(
+                        n_variables = parent_1.n_variables,
+                        tasks       = self.task_table,
+                        permutation = offspring_permutation
+                    )
+        # The offspring usually keeps a prefix of parent_1, so it can be scored
+        # from the accumulated values of parent_1.
+        offspring.parent_score = parent_1.prefix_score
 
         # PROCESS INFORMATION (VERBOSE)
         # ----------------------------------------------------------------------
@@ -378,7 +606,8 @@ class Population:
         return offspring
 
     def select_individual(self, n, return_indices=True,
-                        selection_method="tournament", verbose=False):
+                        selection_method="tournament", truncation_ratio=0.5,
+                        verbose=False):
         """
         This method selects the indices of n individuals from a population,
         where the probability of selection is related to the fitness of each 
@@ -387,24 +616,30 @@ class Population:
 
         Parameters
         ----------
-        n : `int`
-            Number of individuals to be selected from the population.
+        n : `int` or `tuple`
+            Number of individuals to be selected from the population, or shape
+            of the array of selected indices (e.g. ``(n_pairs, 2)``).
 
         return_indices : `bool`, optional
             When True, the indices of the selected individuals are returned.
             When False, a list containing copies of the selected individuals is returned. 
             (default ``True``)
 
-        selection_method : {"roulette", "rank", "tournament"}
+        selection_method : {"roulette", "rank", "tournament", "truncation"}
             Selection method, see notes for more information. (default `tournament`)
 
+        truncation_ratio : `float`, optional
+            Fraction of the best individuals among which the "truncation"
+            method selects. (default ``0.5``)
+
         verbose : `bool`, optional
             Display process information on the screen. (default ``False``)
         
         Raises
         ------
         Exception
-            If the `selection_method` argument is not 'roulette', 'rank', or 'tournament'.
+            If the `selection_method` argument is not 'roulette', 'rank',
+            'tournament' or 'truncation'.
 
         Returns
         -------
@@ -447,78 +682,24 @@ class Population:
 
         - Truncated selection: Random selections of individuals are made, 
         having first discarded the n individuals with the lowest fitness 
-        from the population.
+        from the population (all but the `truncation_ratio` best ones).
 
-        """
+        The roulette needs non-negative fitness values, so the fitness is
+        shifted when some of them are negative.
 
-        # INITIAL CHECKS: EXCEPTIONS AND WARNINGS
-        # ----------------------------------------------------------------------
-        if selection_method not in ["roulette", "rank", "tournament"]:
-            raise Exception(
-                "The selection method must be 'roulette', 'rank', or 'tournament'"
-            )
+        """
 
         # INDIVIDUAL SELECTION
         # ----------------------------------------------------------------------
-        # Create an array with the fitness of each individual in the population.
-        fitness_array = np.repeat(None, self.n_individuals)
-        for i in np.arange(self.n_individuals):
-            fitness_array[i] = copy.copy(self.individuals[i].fitness)
-        
-        # Calculate the selection probability of each individual based on fitness.
-        if selection_method == "roulette":
-            selection_probability = fitness_array / np.sum(fitness_array)
-            selected_indices = np.random.choice(
-                                a       = np.arange(self.n_individuals),
-                                size    = n,
-                                p       = list(selection_probability),
-                                replace = True
-                            )
-        elif selection_method == "rank":
-            # The probability with this method is inversely proportional to the 
-            # position after sorting individuals from lowest to highest fitness.
-            order = np.flip(np.argsort(a=fitness_array) + 1)
-            ranks = np.argsort(order) + 1
-            selection_probability = 1 / ranks
-            selection_probability = selection_probability / np.sum(selection_probability)
-            selected_indices = np.random.choice(
-                                a       = np.arange(self.n_individuals),
-                                size    = n,
-                                p       = list(selection_probability),
-                                replace = True
-                            )
-        elif selection_method == "tournament":
-            selected_indices = np.repeat(None, n)
-            for i in np.arange(n):
-                # Randomly select two pairs of individuals.
-                candidates_a = np.random.choice(
-                                a       = np.arange(self.n_individuals),
-                                size    = 2,
-                                replace = False
-                            )
-                candidates_b = np.random.choice(
-                                a       = np.arange(self.n_individuals),
-                                size    = 2,
-                                replace = False
+        # All the selections are drawn at once over a float64 fitness vector
+        # (see `Selection.select_indices`).
+        fitness_array = fitness_vector(self.individuals[:self.n_individuals])
+        selected_indices = select_indices(
+                                fitness          = fitness_array,
+                                n                = n,
+                                selection_method = selection_method,
+                                truncation_ratio = truncation_ratio
                             )
-                # Select the one with the higher fitness from each pair.
-                if fitness_array[candidates_a[0]] > fitness_array[candidates_a[1]]:
-                    winner_a = candidates_a[0]
-                else:
-                    winner_a = candidates_a[1]
-
-                if fitness_array[candidates_b[0]] > fitness_array[candidates_b[1]]:
-                    winner_b = candidates_b[0]
-                else:
-                    winner_b = candidates_b[1]
-
-                # Compare the two winners from each pair.
-                if fitness_array[winner_a] > fitness_array[winner_b]:
-                    final_index = winner_a
-                else:
-                    final_index = winner_b
-                
-                selected_indices[i] = final_index
 
         # PROCESS INFORMATION (VERBOSE)
         # ----------------------------------------------------------------------
@@ -532,16 +713,18 @@ class Population:
         if return_indices:
             return selected_indices
         else:
-            if n == 1:
-                return copy.deepcopy(self.individuals[int(selected_indices)])
-            if n > 1:
-                return [
-                    copy.deepcopy(self.individuals[i]) for i in selected_indices
-                ]
+            if np.isscalar(n) and n == 1:
+                return copy.copy(self.individuals[int(selected_indices[0])])
+            return [
+                copy.copy(self.individuals[i]) for i in np.ravel(selected_indices)
+            ]
 
     def create_new_generation(self, selection_method="tournament",
-                            elitism=0.1, mutation_pob=10,
-                            distribution="uniform",
+                            elitism=0.1, mutation_pob=None,
+                            distribution="uniform", crossover_method="dependency_aware",
+                            truncation_ratio=0.5, mutation_prob=None,
+                            mutation_operators=None, mean_distribution=1,
+                            sd_distribution=1, min_distribution=-1, max_distribution=1,
                             verbose=False, verbose_selection=False,
                             verbose_crossover=False, verbose_mutation=False):
         """
@@ -549,7 +732,7 @@ class Population:
 
         Parameters
         ----------
-        selection_method : {"roulette", "rank", "tournament"}
+        selection_method : {"roulette", "rank", "tournament", "truncation"}
             Selection method, see notes for more information. (default `tournament`)
 
         elitism : `float`, optional
@@ -557,14 +740,39 @@ class Population:
             directly passed to the next generation. This ensures that the next 
             generation is never worse. (default `0.1`)
 
-        mutation_prob : `float`, optional
-            Probability that each position in the individual will mutate.
-            (default 0.01)
+        mutation_pob : `int`, optional
+            Deprecated and ignored. It added new random individuals after the
+            first `n_individuals`, which are never evaluated nor selected; the
+            offspring are mutated instead (see `mutation_prob`).
+            (default ``None``)
 
         distribution : {"normal", "uniform", "random"}, optional
             Distribution from which to obtain the mutation factor.
             (default "uniform")
 
+        crossover_method : `str`, optional
+            Crossover operator, see `crossover_individuals`.
+            (default "dependency_aware")
+
+        truncation_ratio : `float`, optional
+            Fraction of the best individuals among which the "truncation"
+            selection method selects. (default ``0.5``)
+
+        mutation_prob : `float`, optional
+            Probability that each position in the offspring will mutate.
+            ``None`` disables the mutation of the offspring. (default ``None``)
+
+        mutation_operators : `list`, optional
+            Operators of `Mutation_operators` used instead of `distribution`
+            ("swap", "insertion", "inversion", "scramble"). (default ``None``)
+
+        mean_distribution, sd_distribution : `float`, optional
+            Mean and standard deviation of the "normal" distribution.
+            (default 1 and 1)
+
+        min_distribution, max_distribution : `float`, optional
+            Limits of the "uniform" distribution. (default -1 and +1)
+
         verbose : `bool`, optional
             Display process information on the screen. (default ``False``)
         
@@ -592,11 +800,9 @@ class Population:
             n_elitism = int(np.ceil(self.n_individuals * elitism))
 
             # Identify the n_elitism individuals with the highest fitness (elite).
-            fitness_array = np.repeat(None, self.n_individuals)
-            for i in np.arange(self.n_individuals):
-                fitness_array[i] = copy.copy(self.individuals[i].fitness)
+            fitness_array = fitness_vector(self.individuals[:self.n_individuals])
             rank = np.flip(np.argsort(fitness_array))
-            elite = [copy.deepcopy(self.individuals[i]) for i in rank[:n_elitism]]
+            elite = [copy.copy(self.individuals[i]) for i in rank[:n_elitism]]
             # Add elite individuals to the list of new individuals.
             new_individuals = new_individuals + elite
         else:
@@ -604,40 +810,44 @@ class Population:
             
         # CREATION OF NEW INDIVIDUALS THROUGH CROSSOVER
         # ----------------------------------------------------------------------
+        # The parents of the whole generation are selected in a single call.
+        parent_indices = self.select_individual(
+                            n                = (self.n_individuals - n_elitism, 2),
+                            return_indices   = True,
+                            selection_method = selection_method,
+                            truncation_ratio = truncation_ratio,
+                            verbose          = verbose_selection
+                        )
         for i in np.arange(self.n_individuals - n_elitism):
-            # Select parents
-            parent_indices = self.select_individual(
-                                n                = 2,
-                                return_indices   = True,
-                                selection_method = selection_method,
-                                verbose          = verbose_selection
-                            )
-            
             # Crossover parents to obtain offspring
             offspring = self.crossover_individuals(
-                            parent_1 = parent_indices[0],
-                            parent_2 = parent_indices[1],
-                            verbose  = verbose_crossover
+                            parent_1 = parent_indices[i, 0],
+                            parent_2 = parent_indices[i, 1],
+                            verbose  = verbose_crossover,
+                            method   = crossover_method
                         )
-            # Mutate the offspring
-            # offspring.mutate(
-            #     mutation_prob     = mutation_prob,
-            #     distribution      = distribution,
-            #     min_distribution  = min_distribution,
-            #     max_distribution  = max_distribution,
-            #     verbose           = verbose_mutation
-            # )
+            # Mutate the offspring. The Mutator of the population is shared by
+            # every offspring (whatever the operators), so its buffers are reused.
+            if mutation_prob is not None:
+                if self.mutator is None:
+                    self.mutator = Mutator(self.task_table, operators=mutation_operators)
+                offspring.mutate(
+                    mutation_prob      = mutation_prob,
+                    distribution       = distribution,
+                    media_distribucion = mean_distribution,
+                    sd_distribucion    = sd_distribution,
+                    min_distribution   = min_distribution,
+                    max_distribution   = max_distribution,
+                    operators          = mutation_operators,
+                    mutator            = self.mutator,
+                    verbose            = verbose_mutation
+                )
             # Add offspring to the list of new individuals. 
             new_individuals = new_individuals + [offspring]
 
-        for i in range(mutation_pob):
-            new_individual = Tasks_combination(new_individuals[0].n_variables, new_individuals[0].variable_values)
-            new_individuals = new_individuals + [new_individual]
-
-
         # UPDATE POPULATION INFORMATION
         # ----------------------------------------------------------------------
-        self.individuals = copy.deepcopy(new_individuals)
+        self.individuals = new_individuals
         self.best_individual = None
         self.best_fitness = None
         self.best_variable_values = None
@@ -656,11 +866,16 @@ class Population:
             print("")
 
     def optimize(self, objective_function, optimization, n_generations=50,
-                selection_method="tournament", elitism=0.1, mutation_pob=10,
-                distribution="uniform", mean_distribution=1,
+                selection_method="tournament", elitism=0.1, mutation_pob=None,
+                distribution="uniform", crossover_method="dependency_aware",
+                truncation_ratio=0.5, mean_distribution=1,
                 sd_distribution=1, min_distribution=-1, max_distribution=1,
-                early_stopping=False, stopping_rounds=None,
-                stopping_tolerance=None, verbose=False,
+                mutation_prob=None, mutation_operators=None,
+                adaptive_mutation=False, early_stopping=False, stopping_rounds=None,
+                stopping_tolerance=None, min_diversity=None, time_budget=None,
+                vectorized=False, n_jobs=None,
+                evaluator=None, incremental=False, history=HISTORY_BEST,
+                history_capacity=None, history_path=None, verbose=False,
                 verbose_new_generation=False,
                 verbose_selection=False, verbose_crossover=False,
                 verbose_mutation=False, verbose_evaluation=False):
@@ -678,7 +893,7 @@ class Population:
         n_generations : `int`, optional
             Number of optimization generations. (default ``50``)
 
-        selection_method : {"roulette", "rank", "tournament"}
+        selection_method : {"roulette", "rank", "tournament", "truncation"}
             Selection method, see notes for more information. (default `tournament`)
 
         elitism : `float`, optional
@@ -686,14 +901,22 @@ class Population:
             directly passed to the next generation. This ensures that the next 
             generation is never worse. (default `0.1`)
 
-        mutation_prob : `float`, optional
-            Probability that each position in the individual will mutate.
-            (default 0.01)
+        mutation_pob : `int`, optional
+            Deprecated and ignored, see `create_new_generation`.
+            (default ``None``)
 
         distribution : {"normal", "uniform", "random"}, optional
             Distribution from which to obtain the mutation factor.
             (default "uniform")
 
+        crossover_method : `str`, optional
+            Crossover operator, see `crossover_individuals`.
+            (default "dependency_aware")
+
+        truncation_ratio : `float`, optional
+            Fraction of the best individuals among which the "truncation"
+            selection method selects. (default ``0.5``)
+
         mean_distribution : `float`, optional
             Mean of the distribution if `distribution = "normal"` is selected.
             (default 1)
@@ -709,6 +932,19 @@ class Population:
         max_distribution : `float`, optional
             Maximum of the distribution if `distribution = "uniform"` is selected.
             (default +1)
+
+        mutation_prob : `float`, optional
+            Probability that each position in the offspring will mutate.
+            ``None`` disables the mutation of the offspring. (default ``None``)
+
+        mutation_operators : `list`, optional
+            Mutation operators used instead of `distribution`, see
+            `create_new_generation`. (default ``None``)
+
+        adaptive_mutation : `bool`, optional
+            Adapt `mutation_prob` after each generation: it decreases when
+            the best fitness improves and increases when it stagnates (see
+            `AdaptiveRate`). (default ``False``)
         
         early_stopping : `bool`, optional
             If during the last `stopping_rounds` generations the absolute difference
@@ -724,6 +960,50 @@ class Population:
             Minimum difference value between consecutive generations to consider 
             a change. (default ``None``)
 
+        min_diversity : `float`, optional
+            The algorithm stops when the mean fraction of positions in which
+            the individuals differ from the best one falls below this value
+            (the population has collapsed onto one permutation).
+            (default ``None``)
+
+        time_budget : `float`, optional
+            Maximum wall-clock duration of the optimization, in seconds. It is
+            checked after each generation is evaluated, so at least one
+            generation is always evaluated. (default ``None``)
+
+        vectorized : `bool`, optional
+            Evaluate each generation with the vectorized version of
+            `objective_function` instead of one call per individual.
+            (default ``False``)
+
+        n_jobs : `int`, optional
+            Number of processes used to evaluate each generation, -1 uses all
+            the CPUs. The same pool is used by every generation and it is
+            stopped when the optimization ends. The results are the same as
+            the ones of the serial evaluation. (default ``None``)
+
+        evaluator : `ParallelEvaluator`, optional
+            Already started pool to evaluate the generations with. It is not
+            stopped when the optimization ends. (default ``None``)
+
+        incremental : `bool`, optional
+            Score the offspring of each generation from the accumulated values
+            of the prefix they share with their first parent, and the elite
+            individuals from their cached values. (default ``False``)
+
+        history : {"none", "summary", "best", "full"}, optional
+            Detail of the history stored in `self.history`, see
+            `HistoryRecorder`. The optimal individual is tracked at every
+            level. (default ``"best"``)
+
+        history_capacity : `int`, optional
+            Generations kept in memory by the history, in a ring buffer.
+            (default ``None``, all of them)
+
+        history_path : `str`, optional
+            Prefix of the npz chunks the history is written to (see
+            `History.load_history`). (default ``None``)
+
         verbose : `bool`, optional
             Display process information on the screen. (default ``False``)
         
@@ -750,7 +1030,8 @@ class Population:
             `stopping_tolerance` are ``None``.
 
         Exception
-            If the `selection_method` argument is not 'roulette', 'rank', or 'tournament'.
+            If the `selection_method` argument is not 'roulette', 'rank', 'tournament'
+            or 'truncation'.
 
         Exception
             If the `optimization` argument is not 'maximize' or 'minimize'.
@@ -769,94 +1050,147 @@ class Population:
         # ITERATIONS (GENERATIONS)
         # ----------------------------------------------------------------------
         start = time.time()
-
-        for i in np.arange(n_generations):
-            if verbose:
-                print("-------------")
-                print("Generation: " + str(i))
-                print("-------------")
-            
-            # EVALUATE POPULATION INDIVIDUALS
-            # ------------------------------------------------------------------
-            self.evaluate_population(
-                objective_function = objective_function,
-                optimization       = optimization,
-                verbose            = verbose_evaluation
-            )
-
-            # STORE GENERATION INFORMATION IN HISTORY
-            # ------------------------------------------------------------------
-            self.individuals_history.append(copy.deepcopy(self.individuals))
-            self.best_fitness_history.append(copy.deepcopy(self.best_fitness))
-            self.best_variable_values_history.append(
-                copy.deepcopy(self.best_variable_values)
-            )
-            self.best_function_value_history.append(
-                copy.deepcopy(self.best_function_value)
+        monitor = ConvergenceMonitor(
+                    stopping_rounds    = stopping_rounds if early_stopping else None,
+                    stopping_tolerance = stopping_tolerance,
+                    min_diversity      = min_diversity,
+                    time_budget        = time_budget
+                  )
+        self.stop_reason = STOP_GENERATIONS
+        if adaptive_mutation and mutation_prob is None:
+            raise Exception(
+                "A value for mutation_prob must be provided with adaptive_mutation."
             )
-
-            # CALCULATE THE ABSOLUTE DIFFERENCE COMPARED TO THE PREVIOUS GENERATION
-            # ------------------------------------------------------------------
-            # The difference can only be calculated starting from the second generation.
-            if i == 0:
-                self.absolute_difference.append(None)
-            else:
-                difference = abs(self.best_fitness_history[i] \
-                                - self.best_fitness_history[i - 1])
-                self.absolute_difference.append(difference)
-
-            # STOPPING CRITERION
-            # ------------------------------------------------------------------
-            # If during the last n generations, the absolute difference between 
-            # the best individuals is not greater than the stopping_tolerance value, 
-            # the algorithm stops and no new generations are created.
-            if early_stopping and i > stopping_rounds:
-                last_n = np.array(self.absolute_difference[-stopping_rounds:])
-                if all(last_n < stopping_tolerance):
-                    print("Algorithm stopped at generation " 
-                        + str(i) \
-                        + " due to lack of minimum absolute change of " \
-                        + str(stopping_tolerance) \
-                        + " during " \
-                        + str(stopping_rounds) \
-                        + " consecutive generations.")
+        self.mutation_rate = AdaptiveRate(mutation_prob) if adaptive_mutation else None
+        self.history = HistoryRecorder(history, capacity=history_capacity, path=history_path)
+        # Differences of the last generations, for the early stopping
+        recent_differences = deque(maxlen=max(stopping_rounds or 1, 1))
+        previous_fitness = None
+        previous_max = None
+
+        try:
+            for i in np.arange(n_generations):
+                if verbose:
+                    print("-------------")
+                    print("Generation: " + str(i))
+                    print("-------------")
+            
+                # EVALUATE POPULATION INDIVIDUALS
+                # ------------------------------------------------------------------
+                self.evaluate_population(
+                    objective_function = objective_function,
+                    optimization       = optimization,
+                    verbose            = verbose_evaluation,
+                    vectorized         = vectorized,
+                    n_jobs             = n_jobs,
+                    evaluator          = evaluator,
+                    incremental        = incremental
+                )
+
+                # CALCULATE THE ABSOLUTE DIFFERENCE COMPARED TO THE PREVIOUS GENERATION
+                # ------------------------------------------------------------------
+                # The difference can only be calculated starting from the second generation.
+                difference = None
+                if i > 0:
+                    difference = abs(self.best_fitness - previous_fitness)
+                    if self.mutation_rate is not None:
+                        self.mutation_rate.update(self.best_fitness > previous_max)
+                recent_differences.append(difference)
+                previous_fitness = self.best_fitness
+                previous_max = self.best_fitness if previous_max is None \
+                               else max(previous_max, self.best_fitness)
+
+                # BEST INDIVIDUAL OF THE ENTIRE PROCESS
+                # ------------------------------------------------------------------
+                if self.optimal_fitness is None or self.best_fitness > self.optimal_fitness:
+                    self.optimal_fitness = self.best_fitness
+                    self.optimal_function_value = self.best_function_value
+                    self.optimal_variable_values = self.best_variable_values
+
+                # STORE GENERATION INFORMATION IN HISTORY
+                # ------------------------------------------------------------------
+                # Only NumPy arrays are stored (see HistoryRecorder), so the
+                # memory does not depend on the number of generations when the
+                # history has a capacity.
+                self.last_generation = self.individuals
+                index_matrix = None
+                if min_diversity is not None or history == HISTORY_FULL:
+                    index_matrix = encode_population(
+                                        self.individuals[:self.n_individuals],
+                                        self.task_table
+                                    )
+                self.history.record(
+                    generation          = i,
+                    fitness             = fitness_vector(self.individuals[:self.n_individuals]),
+                    best_fitness        = self.best_fitness,
+                    best_function_value = self.best_function_value,
+                    absolute_difference = difference,
+                    best_permutation    = self.best_individual.permutation,
+                    index_matrix        = index_matrix
+                )
+
+                # STOPPING CRITERION
+                # ------------------------------------------------------------------
+                # Plateau of the best fitness (early stopping), collapse of the
+                # diversity of the population or exhausted time budget.
+                stop_reason = monitor.check(
+                                generation          = i,
+                                absolute_difference = list(recent_differences),
+                                index_matrix        = index_matrix,
+                                best_permutation    = self.best_individual.permutation
+                              )
+                if stop_reason is not None:
+                    self.stop_reason = stop_reason
+                    if verbose:
+                        print(monitor.message(i))
                     break
             
-            # CREATE A NEW GENERATION
-            # ------------------------------------------------------------------         
-            self.create_new_generation(
-                selection_method   = selection_method,
-                elitism            = elitism,
-                mutation_pob      = mutation_pob,
-                distribution       = distribution,
-                verbose            = verbose_new_generation,
-                verbose_selection  = verbose_selection,
-                verbose_crossover  = verbose_crossover,
-                verbose_mutation   = verbose_mutation
-            )
+                # CREATE A NEW GENERATION
+                # ------------------------------------------------------------------         
+                self.create_new_generation(
+                    selection_method   = selection_method,
+                    elitism            = elitism,
+                    distribution       = distribution,
+                    crossover_method   = crossover_method,
+                    truncation_ratio   = truncation_ratio,
+                    mutation_prob      = mutation_prob if self.mutation_rate is None
+                                         else self.mutation_rate.rate,
+                    mutation_operators = mutation_operators,
+                    mean_distribution  = mean_distribution,
+                    sd_distribution    = sd_distribution,
+                    min_distribution   = min_distribution,
+                    max_distribution   = max_distribution,
+                    verbose            = verbose_new_generation,
+                    verbose_selection  = verbose_selection,
+                    verbose_crossover  = verbose_crossover,
+                    verbose_mutation   = verbose_mutation
+                )
+        finally:
+            # The pool of the population is stopped, an external evaluator is not.
+            self.shutdown_evaluator()
+            # The rows still in memory are written to the last chunk.
+            self.history.flush()
 
         end = time.time()
         self.optimized = True
         self.optimization_iter = i
         
-        # IDENTIFY THE BEST INDIVIDUAL OF THE ENTIRE PROCESS
-        # ----------------------------------------------------------------------
-        optimal_index  = np.argmax(np.array(self.best_fitness_history))
-        self.optimal_fitness  = self.best_fitness_history[optimal_index]
-        self.optimal_function_value = self.best_function_value_history[optimal_index]
-        self.optimal_variable_values = self.best_variable_values_history[optimal_index]
-        
         # CREATE A DATAFRAME WITH THE RESULTS
         # ----------------------------------------------------------------------
-        self.results_df = pd.DataFrame(
-            {
+        # Rows of the history still in memory (none with history="none" or
+        # history_path).
+        results = {
             "best_fitness"         : self.best_fitness_history,
             "best_function_value"  : self.best_fitness_history,
-            "best_variable_values" : self.best_variable_values_history,
-            "absolute_difference"  : self.absolute_difference
-            }
-        )
-        self.results_df["generation"] = self.results_df.index
+        }
+        if history in (HISTORY_BEST, HISTORY_FULL):
+            results["best_variable_values"] = self.best_variable_values_history
+        results["absolute_difference"] = self.absolute_difference
+        self.results_df = pd.DataFrame(results)
+        if len(self.results_df) > 0:
+            self.results_df["generation"] = self.history.column("generation")
+        else:
+            self.results_df["generation"] = self.results_df.index
         
         if verbose :
             print("-------------------------------------------")
@@ -865,6 +1199,135 @@ class Population:
             print("-------------------------------------------")
             print("Optimization duration: " + str(end - start))
             print("Number of generations: " + str(self.optimization_iter))
+            print("Stop reason: " + str(self.stop_reason))
             print("Optimal variable values: " + str(self.optimal_variable_values))
             print("Objective function value: " + str(self.optimal_function_value))
             print("")
+
+    def optimize_multiobjective(self, objectives=None, n_generations=50,
+                                crossover_method="dependency_aware", mutation_prob=None,
+                                mutation_operators=None, time_budget=None, verbose=False):
+        """
+        This method performs an NSGA-II multi-objective optimization of the
+        population and keeps the Pareto front of the orderings.
+
+        Parameters
+        ----------
+        objectives : `list`, optional
+            Objectives to maximize, some of `Multi_objective.OBJECTIVES`.
+            (default `DEFAULT_OBJECTIVES`: the terms of
+            `optimization_function` as separate objectives)
+
+        n_generations : `int`, optional
+            Number of generations. (default ``50``)
+
+        crossover_method : `str`, optional
+            Crossover operator, see `crossover_individuals`.
+            (default "dependency_aware")
+
+        mutation_prob : `float`, optional
+            Probability that each position in the offspring will mutate,
+            ``None`` disables the mutation. (default ``None``)
+
+        mutation_operators : `list`, optional
+            Mutation operators, see `create_new_generation`. (default ``None``)
+
+        time_budget : `float`, optional
+            Maximum wall-clock duration, in seconds. (default ``None``)
+
+        verbose : `bool`, optional
+            Display process information on the screen. (default ``False``)
+
+        Returns
+        -------
+        pareto_front : `list`
+            Individuals of the Pareto front, without repeated permutations.
+
+        Notes
+        -----
+        Each generation creates `n_individuals` offspring from parents chosen
+        by binary tournaments on (front, crowding distance), and the next
+        population is the best `n_individuals` of parents and offspring by
+        front and crowding distance. The objectives of the whole population
+        are computed in a single vectorized pass (see `objective_matrix`).
+        """
+        if objectives is None:
+            objectives = DEFAULT_OBJECTIVES
+        columns = objective_columns(objectives)
+        start = time.time()
+
+        population = self.individuals[:self.n_individuals]
+        values = objective_matrix(encode_population(population, self.task_table), self.task_table)
+        survivors, ranks, distance = select_survivors(values[:, columns], self.n_individuals)
+
+        for generation in np.arange(n_generations):
+            # OFFSPRING: crowded tournament, crossover and mutation
+            # ------------------------------------------------------------------
+            self.individuals = population
+            parents = crowded_tournament(ranks, distance, (self.n_individuals, 2))
+            offspring = []
+            for parent_1, parent_2 in parents:
+                child = self.crossover_individuals(parent_1, parent_2, method=crossover_method)
+                if mutation_prob is not None:
+                    if self.mutator is None:
+                        self.mutator = Mutator(self.task_table, operators=mutation_operators)
+                    child.mutate(mutation_prob=mutation_prob, operators=mutation_operators,
+                                 mutator=self.mutator)
+                offspring.append(child)
+
+            # SURVIVORS: best fronts of parents and offspring
+            # ------------------------------------------------------------------
+            offspring_values = objective_matrix(encode_population(offspring, self.task_table),
+                                                self.task_table)
+            combined = population + offspring
+            combined_values = np.concatenate([values, offspring_values])
+            survivors, ranks, distance = select_survivors(combined_values[:, columns], self.n_individuals)
+            population = [combined[i] for i in survivors]
+            values = combined_values[survivors]
+            ranks = ranks[survivors]
+            distance = distance[survivors]
+
+            if verbose:
+                print("Generation " + str(generation) + ": " + str(int(np.sum(ranks == 0)))
+                      + " individuals in the Pareto front.")
+            if time_budget is not None and time.time() - start >= time_budget:
+                break
+
+        self.individuals = population
+        self.optimized = True
+        self.optimization_iter = generation if n_generations > 0 else None
+
+        # PARETO FRONT WITHOUT REPEATED PERMUTATIONS
+        # ----------------------------------------------------------------------
+        front = np.flatnonzero(ranks == 0)
+        _, unique = np.unique(encode_population([population[i] for i in front], self.task_table),
+                              axis=0, return_index=True)
+        front = front[np.sort(unique)]
+        self.pareto_front = [population[i] for i in front]
+        self.pareto_objectives = values[front]
+        return self.pareto_front
+
+    def select_from_front(self, priority):
+        """
+        This method returns the ordering of the Pareto front that is best for
+        a priority mode of the PMAgent ('tasks', 'priority', 'reward' or
+        'time', see `PRIORITY_OBJECTIVES`) or for an objective of
+        `OBJECTIVES`. Ties are broken by the sum of the objectives that make
+        up `optimization_function`; with `priority=None` only that sum is
+        used.
+
+        Returns
+        -------
+        variable_values : `list`
+            Tasks of the selected individual, in order.
+        """
+        if self.pareto_front is None:
+            raise Exception("The population has no Pareto front, see optimize_multiobjective.")
+        total = self.pareto_objectives[:, objective_columns(DEFAULT_OBJECTIVES)].sum(axis=1)
+        if priority is None:
+            best = int(np.argmax(total))
+        else:
+            objective = PRIORITY_OBJECTIVES.get(priority, priority)
+            column = objective_columns([objective])[0]
+            best = np.lexsort((-total, -self.pareto_objectives[:, column]))[0]
+        return self.pareto_front[best].variable_values
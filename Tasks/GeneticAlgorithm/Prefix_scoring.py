@@ -0,0 +1,176 @@
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.Batch_evaluation import score_terms
+
+# Objective functions that can be re-scored from a cached prefix
+INCREMENTAL_FUNCTIONS = [optimization_function]
+
+
+def first_difference(permutation_a, permutation_b) -> int:
+    """
+    Index of the first position where the two permutations differ, or the
+    length of the shortest one if it is a prefix of the other.
+    """
+    length = min(len(permutation_a), len(permutation_b))
+    different = np.flatnonzero(permutation_a[:length] != permutation_b[:length])
+    return int(different[0]) if len(different) > 0 else length
+
+
+class PrefixScore:
+    """
+    Value of `optimization_function` for a permutation of a `TaskTable`,
+    together with the state of the sum after each position: accumulated
+    time, reward and penalty. Another permutation that shares the first `k`
+    positions can be scored from that state, re-evaluating only the
+    positions from `k` onward (see `rescore`).
+
+    Parameters
+    ----------
+    permutation : `numpy.ndarray`
+        table index of the task at each position.
+
+    table : `TaskTable`
+        table of the tasks being combined.
+
+    Attributes
+    ----------
+    position : `numpy.ndarray`
+        position of each table task in the permutation (the length of the
+        permutation for the tasks that are not in it).
+
+    time, reward_total, penalty_total : `numpy.ndarray`
+        accumulated time, reward and penalty after each position.
+
+    score : `float`
+        value of `optimization_function` for the permutation.
+
+    Notes
+    -----
+    The terms are added in the same order as in `optimization_function`,
+    starting from the accumulated values of the shared prefix, so the score
+    of a re-scored permutation is identical to the one of a full evaluation.
+    """
+
+    def __init__(self, permutation, table: TaskTable, parent=None, start=0):
+        self.permutation = np.asarray(permutation, dtype=np.int64)
+        self.table = table
+        if parent is None:
+            start = 0
+        self._score_from(parent, start)
+
+    def __repr__(self):
+        return f"PrefixScore(Tasks: {len(self.permutation)} Score: {self.score})"
+
+    def rescore(self, permutation, start=None):
+        """
+        Scores `permutation` reusing the accumulated values of the prefix it
+        shares with this one.
+
+        Parameters
+        ----------
+        permutation : `numpy.ndarray`
+            permutation of the same table to score.
+
+        start : `int`, optional
+            first position that may differ from this permutation, if it is
+            already known (for example, the first mutated position). If it is
+            ``None`` it is found by comparing both permutations.
+            (default ``None``)
+
+        Returns
+        -------
+        prefix_score : `PrefixScore`
+            state of the sum for `permutation`.
+        """
+        permutation = np.asarray(permutation, dtype=np.int64)
+        if start is None:
+            start = first_difference(self.permutation, permutation)
+        start = min(start, len(self.permutation), len(permutation))
+        return PrefixScore(permutation, self.table, parent=self, start=start)
+
+    def _score_from(self, parent, start):
+        table = self.table
+        length = len(self.permutation)
+        suffix = self.permutation[start:]
+
+        # Positions of the tasks: the prefix keeps the positions of the parent
+        if parent is None:
+            self.position = np.full(len(table), length, dtype=np.int64)
+        else:
+            self.position = parent.position.copy()
+            self.position[parent.permutation[start:]] = length
+            if len(parent.permutation) != length:
+                self.position[self.position == len(parent.permutation)] = length
+        self.position[suffix] = np.arange(start, length)
+
+        # Only the dependencies of the tasks of the suffix can change: the
+        # tasks of the prefix have the same tasks before them as in the parent.
+        counts = np.diff(table.dependency_ptr)[suffix]
+        edges = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) \
+            + np.repeat(table.dependency_ptr[suffix], counts)
+        edge_violated = self.position[table.dependency_idx[edges]] \
+            >= np.repeat(np.arange(start, length), counts)
+        violated = np.bincount(np.repeat(np.arange(len(suffix)), counts),
+                               weights=edge_violated, minlength=len(suffix)) > 0
+        violated |= table.external_dependency[suffix]
+
+        if start == 0:
+            start_time, previous_difficulty, reward, penalty = 0, None, 0, 0
+        else:
+            start_time = parent.time[start - 1]
+            previous_difficulty = table.difficulty[self.permutation[start - 1]]
+            reward = parent.reward_total[start - 1]
+            penalty = parent.penalty_total[start - 1]
+
+        rewards, penalties, current_time = score_terms(
+            suffix[None, :], table, violated[None, :], start_time, previous_difficulty
+        )
+        reward_total = np.cumsum(np.concatenate([[reward], rewards[0]]))[2::2]
+        penalty_total = np.cumsum(np.concatenate([[penalty], penalties[0]]))[3::3]
+
+        if start == 0:
+            self.time = current_time[0]
+            self.reward_total = reward_total
+            self.penalty_total = penalty_total
+        else:
+            self.time = np.concatenate([parent.time[:start], current_time[0]])
+            self.reward_total = np.concatenate([parent.reward_total[:start], reward_total])
+            self.penalty_total = np.concatenate([parent.penalty_total[:start], penalty_total])
+
+        if length == 0:
+            self.score = 0.0
+        else:
+            self.score = float(self.reward_total[-1] - self.penalty_total[-1])
+
+
+def check_incremental_function(objective_function):
+    """
+    Raises
+    ------
+    Exception
+        If `objective_function` can not be re-scored from a cached prefix.
+    """
+    if objective_function not in INCREMENTAL_FUNCTIONS:
+        raise Exception(
+            "The objective function " + getattr(objective_function, "__name__", str(objective_function))
+            + " has no incremental version."
+        )
+
+
+def incremental_function_value(individual, table: TaskTable) -> float:
+    """
+    Value of `optimization_function` for a `Tasks_combination`. The
+    individual keeps the `PrefixScore` of its permutation; if it does not have
+    one yet, it is computed from the one of the permutation it comes from
+    (the parent it was crossed from, or itself before mutating) when there
+    is one.
+    """
+    if individual.prefix_score is None or individual.prefix_score.table is not table:
+        parent = individual.parent_score
+        if parent is not None and parent.table is table:
+            individual.prefix_score = parent.rescore(individual.permutation)
+        else:
+            individual.prefix_score = PrefixScore(individual.permutation, table)
+        individual.parent_score = None
+    return individual.prefix_score.score
@@ -0,0 +1,127 @@
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.Batch_evaluation import batch_optimization_function
+
+
+class ResourceAwareObjective:
+    """
+    Función objetivo que añade a `optimization_function` las restricciones
+    de recursos y de inicio de las tareas:
+
+    - sobregiro: una tarea cuyo consumo acumulado de algún recurso (sumando
+      el de las tareas anteriores de la permutación) supera el presupuesto
+      del proyecto se penaliza con (5 - prioridad) * `overdraft_penalty`,
+      como una tarea con dependencias sin completar.
+    - inicio temprano: una tarea que empieza antes de su `start` se penaliza
+      con (start - inicio) * (5 - prioridad) * `early_start_penalty`.
+
+    Se llama con una permutación de tareas, como `optimization_function`, y
+    `batch` evalúa toda una población de una vez sobre la matriz tarea x
+    recurso de la tabla (ver `Batch_evaluation.get_batch_function`). Ambas
+    versiones suman los términos en el mismo orden y dan el mismo valor.
+
+    Parameters
+    ----------
+    budget : `dict`
+        recurso -> cantidad disponible. Los recursos que no aparecen no
+        tienen límite.
+
+    overdraft_penalty : `float`, optional
+        penalización por unidad de peso de una tarea que sobregira algún
+        recurso. (default ``100``)
+
+    early_start_penalty : `float`, optional
+        penalización por unidad de tiempo y de peso de un inicio temprano.
+        (default ``1``)
+    """
+
+    def __init__(self, budget, overdraft_penalty=100, early_start_penalty=1):
+        self.budget = dict(budget)
+        self.overdraft_penalty = overdraft_penalty
+        self.early_start_penalty = early_start_penalty
+        # Presupuesto alineado con los recursos de cada tabla ya evaluada
+        self._budgets = {}
+
+    def __repr__(self):
+        return f"ResourceAwareObjective(Budget: {self.budget})"
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_budgets'] = {}
+        return state
+
+    def __call__(self, permutacion):
+        penalizacion_total = 0
+        tiempo_actual = 0
+        consumo = {}
+
+        for task in permutacion:
+            peso = 5 - task.priority
+            # Consumo acumulado de los recursos de la tarea
+            sobregiro = False
+            for resource in task.resources:
+                consumo[resource.id] = consumo.get(resource.id, 0) + resource.total
+                if resource.id in self.budget and consumo[resource.id] > self.budget[resource.id]:
+                    sobregiro = True
+            if sobregiro:
+                penalizacion_total += peso * self.overdraft_penalty
+            # La tarea no puede empezar antes de su inicio
+            if tiempo_actual < task.start:
+                penalizacion_total += (task.start - tiempo_actual) * peso * self.early_start_penalty
+            tiempo_actual += task.duration
+
+        return optimization_function(permutacion) - penalizacion_total
+
+    def table_budget(self, table: TaskTable) -> np.ndarray:
+        """
+        Presupuesto de cada recurso de la tabla (infinito si no tiene límite).
+        """
+        key = (id(table), tuple(table.resource_ids))
+        if key not in self._budgets:
+            self._budgets[key] = np.array(
+                [self.budget.get(resource, np.inf) for resource in table.resource_ids],
+                dtype=np.float64
+            )
+        return self._budgets[key]
+
+    def penalty_terms(self, index_matrix, table: TaskTable) -> np.ndarray:
+        """
+        Términos de penalización de sobregiro e inicio temprano de cada
+        posición, en el orden en que los suma la versión escalar: array de
+        forma (n_permutations, 2 * length).
+        """
+        n_permutations, length = index_matrix.shape
+        weight = 5 - table.priority[index_matrix]
+
+        # Consumo acumulado de cada recurso a lo largo de la permutación; una
+        # tarea solo sobregira los recursos que usa
+        resources = table.resource_matrix()
+        uses = np.zeros(resources.shape, dtype=bool)
+        uses[np.repeat(np.arange(len(table)), np.diff(table.resource_ptr)), table.resource_idx] = True
+        consumption = np.cumsum(resources[index_matrix], axis=1)
+        overdraft = np.any((consumption > self.table_budget(table)) & uses[index_matrix], axis=2)
+
+        # Instante de inicio de cada tarea: tiempo acumulado antes de ella
+        durations = np.column_stack([np.zeros(n_permutations, dtype=table.duration.dtype),
+                                     table.duration[index_matrix]])
+        start_time = np.cumsum(durations, axis=1)[:, :-1]
+        release = table.start[index_matrix]
+        early = start_time < release
+
+        return np.stack([
+            np.where(overdraft, weight * self.overdraft_penalty, 0.0),
+            np.where(early, (release - start_time) * weight * self.early_start_penalty, 0.0),
+        ], axis=2).reshape(n_permutations, -1)
+
+    def batch(self, index_matrix, table: TaskTable) -> np.ndarray:
+        """
+        Versión vectorizada: valor de la función para cada fila de
+        `index_matrix`.
+        """
+        index_matrix = np.atleast_2d(np.asarray(index_matrix, dtype=np.int64))
+        n_permutations, length = index_matrix.shape
+        if length == 0:
+            return np.zeros(n_permutations)
+        penalties = self.penalty_terms(index_matrix, table)
+        return batch_optimization_function(index_matrix, table) - np.cumsum(penalties, axis=1)[:, -1]
@@ -0,0 +1,131 @@
+import heapq
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Batch_evaluation import dependency_violations, score_terms
+
+# Decoding of a permutation into a schedule with several workers. Each task,
+# in permutation order, goes to the worker that becomes available first (a
+# min-heap of availability times) and starts when that worker is free and
+# its dependencies placed before it have finished: O(n log w + E) for n
+# tasks, w workers and E dependencies. With one worker the finish times are
+# the accumulated durations of `optimization_function`.
+
+
+def decode_schedule(durations, difficulties, dependencies, n_workers, problem_solving=None):
+    '''
+        Instante de fin de la tarea de cada posición.
+        - durations, difficulties: duración y dificultad de la tarea de cada posición.
+        - dependencies: posiciones (anteriores) de las dependencias de la tarea de cada posición.
+        - problem_solving: capacidad de cada trabajador; una tarea más difícil que la capacidad de
+          su trabajador dura duración * dificultad / capacidad. Sin capacidades todas las tareas
+          duran lo mismo con cualquier trabajador
+    '''
+    heap = [(0, worker) for worker in range(n_workers)]
+    finish = []
+    for k in range(len(durations)):
+        available, worker = heapq.heappop(heap)
+        start = available
+        for position in dependencies[k]:
+            if finish[position] > start:
+                start = finish[position]
+        duration = durations[k]
+        if problem_solving is not None and difficulties[k] > problem_solving[worker]:
+            duration = duration * difficulties[k] / problem_solving[worker]
+        end = start + duration
+        finish.append(end)
+        heapq.heappush(heap, (end, worker))
+    return finish
+
+
+def task_finish_times(tasks, n_workers, problem_solving=None) -> list:
+    '''
+        Versión de `decode_schedule` sobre una lista de tareas
+    '''
+    position = {task.id: k for k, task in enumerate(tasks)}
+    dependencies = []
+    for k, task in enumerate(tasks):
+        dependencies.append([position[dependency.id] for dependency in task.dependencies
+                             if position.get(dependency.id, k) < k])
+    return decode_schedule([task.duration for task in tasks], [task.difficulty for task in tasks],
+                           dependencies, n_workers, problem_solving)
+
+
+def parallel_finish_times(permutation, table: TaskTable, n_workers, problem_solving=None) -> np.ndarray:
+    '''
+        Versión de `decode_schedule` sobre una permutación de índices de una `TaskTable`
+    '''
+    order = np.asarray(permutation, dtype=np.int64).tolist()
+    position = {task: k for k, task in enumerate(order)}
+    ptr = table.dependency_ptr.tolist()
+    idx = table.dependency_idx.tolist()
+    dependencies = []
+    for k, task in enumerate(order):
+        dependencies.append([position[dependency] for dependency in idx[ptr[task]:ptr[task + 1]]
+                             if position.get(dependency, k) < k])
+    durations = table.duration[order].tolist()
+    difficulties = table.difficulty[order].tolist()
+    return np.array(decode_schedule(durations, difficulties, dependencies, n_workers, problem_solving))
+
+
+class ParallelScheduleObjective:
+    """
+    Función objetivo con los términos de `optimization_function`, pero con
+    los instantes de fin de un equipo de `n_workers` trabajadores (ver
+    `decode_schedule`) en lugar de ejecutar todas las tareas una detrás de
+    otra. Las penalizaciones por deadline dejan así de ser las de un único
+    trabajador.
+
+    Se llama con una permutación de tareas y `batch` evalúa toda una
+    población sobre la tabla de tareas (ver
+    `Batch_evaluation.get_batch_function`). Ambas dan el mismo valor.
+
+    Parameters
+    ----------
+    n_workers : `int`
+        número de trabajadores.
+
+    problem_solving : `list`, optional
+        capacidad de cada trabajador. (default ``None``, todos iguales)
+    """
+
+    def __init__(self, n_workers, problem_solving=None):
+        if n_workers < 1:
+            raise Exception("n_workers must be a positive integer.")
+        if problem_solving is not None:
+            problem_solving = list(problem_solving)
+            if len(problem_solving) != n_workers or min(problem_solving) <= 0:
+                raise Exception("problem_solving must have a positive value for each worker.")
+        self.n_workers = n_workers
+        self.problem_solving = problem_solving
+
+    def __repr__(self):
+        return f"ParallelScheduleObjective(Workers: {self.n_workers})"
+
+    def __call__(self, permutacion):
+        table = TaskTable(permutacion)
+        return float(self.batch(np.arange(len(table))[None, :], table)[0])
+
+    def finish_times(self, index_matrix, table: TaskTable) -> np.ndarray:
+        """
+        Instantes de fin de cada posición de cada permutación de
+        `index_matrix`.
+        """
+        return np.array([
+            parallel_finish_times(permutation, table, self.n_workers, self.problem_solving)
+            for permutation in index_matrix
+        ]).reshape(index_matrix.shape)
+
+    def batch(self, index_matrix, table: TaskTable) -> np.ndarray:
+        """
+        Versión vectorizada: valor de la función para cada fila de
+        `index_matrix`.
+        """
+        index_matrix = np.atleast_2d(np.asarray(index_matrix, dtype=np.int64))
+        n_permutations, length = index_matrix.shape
+        if length == 0:
+            return np.zeros(n_permutations)
+        rewards, penalties, _ = score_terms(
+            index_matrix, table, dependency_violations(index_matrix, table),
+            finish_time=self.finish_times(index_matrix, table)
+        )
+        return np.cumsum(rewards, axis=1)[:, -1] - np.cumsum(penalties, axis=1)[:, -1]
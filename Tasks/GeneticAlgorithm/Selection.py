@@ -0,0 +1,128 @@
+import numpy as np
+
+SELECTION_METHODS = ["roulette", "rank", "tournament", "truncation"]
+
+
+def fitness_vector(individuals) -> np.ndarray:
+    """
+    float64 array with the fitness of each individual.
+    """
+    return np.fromiter((individual.fitness for individual in individuals),
+                       dtype=np.float64, count=len(individuals))
+
+
+def selection_probabilities(fitness, selection_method, truncation_ratio=0.5) -> np.ndarray:
+    """
+    Probability of each individual of being selected by the "roulette",
+    "rank" or "truncation" methods.
+
+    Parameters
+    ----------
+    fitness : `numpy.ndarray`
+        float64 array with the fitness of each individual.
+
+    selection_method : {"roulette", "rank", "truncation"}
+        selection method, see `Population.select_individual`.
+
+    truncation_ratio : `float`, optional
+        fraction of the best individuals that can be selected with the
+        "truncation" method. (default ``0.5``)
+
+    Notes
+    -----
+    The roulette needs non-negative weights; if some fitness is negative
+    (the scores of `optimization_function` usually are), the fitness is
+    shifted so that the worst individual has weight 0. If every weight is 0
+    the selection is uniform.
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    n_individuals = len(fitness)
+
+    if selection_method == "roulette":
+        weights = fitness - min(fitness.min(), 0.0)
+    elif selection_method == "rank":
+        # Inversely proportional to the position after sorting from highest
+        # to lowest fitness (the best individual has rank 1).
+        ranks = np.empty(n_individuals, dtype=np.float64)
+        ranks[np.argsort(-fitness, kind='stable')] = np.arange(1, n_individuals + 1)
+        weights = 1 / ranks
+    elif selection_method == "truncation":
+        n_kept = min(max(int(np.ceil(n_individuals * truncation_ratio)), 1), n_individuals)
+        weights = np.zeros(n_individuals)
+        weights[np.argsort(-fitness, kind='stable')[:n_kept]] = 1.0
+    else:
+        raise Exception(
+            "The selection method must be 'roulette', 'rank' or 'truncation'"
+        )
+
+    total = weights.sum()
+    if not total > 0:
+        return np.full(n_individuals, 1 / n_individuals)
+    return weights / total
+
+
+def tournament(fitness, n) -> np.ndarray:
+    """
+    `n` tournaments at once: each one draws two pairs of different
+    individuals, keeps the fitter of each pair and then the fitter of the
+    two winners (on ties the second one wins, as in the original loop).
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    n_individuals = len(fitness)
+    if n_individuals < 2:
+        return np.zeros(n, dtype=np.int64)
+
+    # Two different individuals per pair: the second draw skips the first
+    first = np.random.randint(0, n_individuals, size=(n, 2))
+    second = np.random.randint(0, n_individuals - 1, size=(n, 2))
+    second += second >= first
+
+    winners = np.where(fitness[first] > fitness[second], first, second)
+    return np.where(fitness[winners[:, 0]] > fitness[winners[:, 1]], winners[:, 0], winners[:, 1])
+
+
+def select_indices(fitness, n, selection_method="tournament", truncation_ratio=0.5) -> np.ndarray:
+    """
+    Indices of `n` individuals selected with `selection_method`, drawn in a
+    single vectorized call.
+
+    Parameters
+    ----------
+    fitness : `numpy.ndarray`
+        float64 array with the fitness of each individual.
+
+    n : `int` or `tuple`
+        number (or shape) of the selections, e.g. ``(n_pairs, 2)`` to select
+        the parents of a whole generation.
+
+    selection_method : {"roulette", "rank", "tournament", "truncation"}
+        selection method, see `Population.select_individual`.
+        (default "tournament")
+
+    truncation_ratio : `float`, optional
+        fraction of the best individuals that can be selected with the
+        "truncation" method. (default ``0.5``)
+
+    Returns
+    -------
+    indices : `numpy.ndarray`
+        int64 array of shape `n` with the selected indices.
+    """
+    if selection_method not in SELECTION_METHODS:
+        raise Exception(
+            "The selection method must be 'roulette', 'rank', 'tournament' or 'truncation'"
+        )
+    fitness = np.asarray(fitness, dtype=np.float64)
+    shape = (n,) if np.isscalar(n) else tuple(n)
+    size = int(np.prod(shape))
+
+    if selection_method == "tournament":
+        indices = tournament(fitness, size)
+    else:
+        probabilities = selection_probabilities(fitness, selection_method, truncation_ratio)
+        # Inverse transform sampling over the cumulative probabilities
+        cumulative = np.cumsum(probabilities)
+        indices = np.searchsorted(cumulative, np.random.random(size) * cumulative[-1], side='right')
+        indices = np.minimum(indices, len(fitness) - 1)
+
+    return indices.astype(np.int64).reshape(shape)
@@ -6,8 +6,11 @@ import copy
 import pandas as pd
 import time
 from datetime import datetime
-from Tasks.GeneticAlgorithm.Permutations_generator_heuristics import generate_permutation
+from Tasks.GeneticAlgorithm.Permutations_generator_heuristics import generate_permutation_indices
+from Tasks.GeneticAlgorithm.Mutation_operators import Mutator
 from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.dependency_index import shared_dependency_index
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -19,19 +22,32 @@ class Tasks_combination:
     
     Parameters
     ----------
-    tasks : `list`
-        lista de tareas a combinar
+    tasks : `list` o `TaskTable`
+        lista de tareas a combinar, o tabla de tareas compartida por toda la
+        población (evita construir una tabla por individuo).
 
     verbose : `bool`, optional
         mostrar información del Tasks_combination creado. (default ``False``)
 
+    permutation : `numpy.ndarray`, optional
+        permutación de índices de la tabla a usar en lugar de generar una
+        nueva. (default ``None``)
+
     Attributes
     ----------
     n_variables : `int`
         número de variables que definen al Tasks_combination.
 
-    variable_values : `numpy.ndarray`
-        array con el valor de cada una de las variables o tareas asignadas a cada etapa de tiempo.
+    table : `TaskTable`
+        tabla de tareas sobre la que se define la permutación.
+
+    permutation : `numpy.ndarray`
+        array inmutable con el índice en `table` de la tarea asignada a cada
+        posición. Los individuos comparten la tabla, por lo que copiar un
+        individuo solo copia (o comparte) este array de enteros.
+
+    variable_values : `list`
+        tareas asignadas a cada etapa de tiempo, en el orden de la permutación.
 
     fitness : `float`
         valor de fitness del Tasks_combination.
@@ -39,6 +55,16 @@ class Tasks_combination:
     function_value : `float`
         valor de la función objetivo para el Tasks_combination.
 
+    prefix_score : `PrefixScore`
+        valores acumulados de la función objetivo en cada posición de la
+        permutación, si se ha evaluado de forma incremental (ver
+        `Prefix_scoring`).
+
+    parent_score : `PrefixScore`
+        valores acumulados de una permutación de la que procede esta (el padre
+        del cruce o el propio individuo antes de mutar), desde los que se puede
+        evaluar solo la parte que cambia.
+
     Raises
     ------
     raise Exception
@@ -79,12 +105,20 @@ class Tasks_combination:
         return tasks_copy
 
     
-    def __init__(self, n_variables, tasks={}, verbose=False):
+    def __init__(self, n_variables, tasks={}, verbose=False, permutation=None):
 
         # Número de variables del Tasks_combination
         self.n_variables = n_variables
+        # Tabla de tareas compartida sobre la que se define la permutación
+        self.table = tasks if isinstance(tasks, TaskTable) else TaskTable(list(tasks))
+        # Valores acumulados de la función objetivo (evaluación incremental)
+        self.prefix_score = None
+        self.parent_score = None
         # Valor de las variables del Tasks_combination
-        self.variable_values = generate_permutation(tasks)
+        if permutation is None:
+            self.permutation = generate_permutation_indices(self.table)
+        else:
+            self.permutation = permutation
         # Fitness del Tasks_combination
         self.fitness = None
         # Valor de la función objetivo
@@ -101,6 +135,29 @@ class Tasks_combination:
             print("Fitness: " + str(self.fitness))
             print("")
 
+    @property
+    def permutation(self):
+        return self._permutation
+
+    @permutation.setter
+    def permutation(self, permutation):
+        permutation = np.array(permutation, dtype=np.int32)
+        permutation.flags.writeable = False
+        self._permutation = permutation
+        # Los valores acumulados de la permutación anterior sirven para evaluar
+        # la nueva desde la primera posición que cambia
+        if self.prefix_score is not None:
+            self.parent_score = self.prefix_score
+            self.prefix_score = None
+
+    @property
+    def variable_values(self):
+        return self.table.decode(self._permutation)
+
+    @variable_values.setter
+    def variable_values(self, tasks):
+        self.permutation = self.table.encode(tasks)
+
     def __repr__(self):
         """
         Información que se muestra cuando se imprime un objeto Tasks_combination.
@@ -174,11 +231,7 @@ class Tasks_combination:
         # EVALUACIÓN DE LA FUNCIÓN OBJETIVO CON LAS VARIABLES DEL Tasks_combination Y
         # CÁLCULO DEL FITNESS
         # ----------------------------------------------------------------------
-        self.function_value = objective_function(self.variable_values)
-        if optimization == "maximize":
-            self.fitness = self.function_value
-        elif optimization == "minimize":
-            self.fitness = -self.function_value
+        self.set_function_value(objective_function(self.variable_values), optimization)
 
         # INFORMACIÓN DEL PROCESO (VERBOSE)
         # ----------------------------------------------------------------------
@@ -189,9 +242,34 @@ class Tasks_combination:
             print("Fitness: " + str(self.fitness))
             print("")
 
+    def set_function_value(self, function_value, optimization):
+        """
+        Este método asigna al Tasks_combination un valor de la función objetivo
+        ya calculado (por ejemplo, por una evaluación vectorizada de toda la
+        población) y obtiene su fitness a partir de él.
+
+        Parameters
+        ----------
+        function_value : `float`
+            valor de la función objetivo para las variables del Tasks_combination.
+
+        optimization : {'maximize', 'minimize'}
+            ver notas de `calculate_fitness`.
+        """
+        if not optimization in ["maximize", "minimize"]:
+            raise Exception(
+                "El argumento optimizacion debe ser: 'maximize' o 'minimize'"
+                )
+
+        self.function_value = function_value
+        if optimization == "maximize":
+            self.fitness = self.function_value
+        elif optimization == "minimize":
+            self.fitness = -self.function_value
+
     def mutate(self, mutation_prob=0.01, distribution="aleatoria", media_distribucion=1,
               sd_distribucion=1, min_distribution=-1, max_distribution=1,
-              verbose=False):
+              operators=None, mutator=None, verbose=False):
         """
         Este método somete al Tasks_combination a un proceso de mutación en el que, cada
         una de sus posiciones, puede verse modificada con una probabilidad 
@@ -205,8 +283,8 @@ class Tasks_combination:
             (default 0.01)
 
         distribucion : {"normal", "uniforme", "aleatoria"}, optional
-            distribución de la que obtener el factor de mutación.
-            (default "uniforme")
+            distribución de la que obtener el factor de mutación. También se
+            aceptan "uniform" y "random". (default "aleatoria")
 
         media_distribucion : `float`, optional
             media de la distribución si se selecciona `distribucion = "normal"`
@@ -223,6 +301,16 @@ class Tasks_combination:
         max_distribucion : `float`, optional
             máximo de la distribución si se selecciona 
             `distribucion = "uniforme"`. (default +1)
+
+        operators : `list`, optional
+            operadores de `Mutation_operators` ("swap", "insertion",
+            "inversion", "scramble") a aplicar en lugar de la distribución.
+            Se aplican en media `prob_mut` * n_variables mutaciones.
+            (default ``None``)
+
+        mutator : `Mutator`, optional
+            `Mutator` de la tabla de tareas, para reutilizarlo entre
+            individuos. (default ``None``, se crea uno)
         
         verbose : `bool`, optional
             mostrar información del proceso por pantalla. (default ``False``)
@@ -242,12 +330,12 @@ class Tasks_combination:
         estrategias para controlar la magnitud del cambio que puede provocar una
         mutación.
 
-        - Distribución uniforme: la mutación de la posición i se consigue
-        sumándole al valor de i un valor extraído de una distribución uniforme,
-        por ejemplo una entre [-1,+1].
+        - Distribución uniforme: la tarea de la posición i se desplaza un número
+        de posiciones extraído de una distribución uniforme, por ejemplo una
+        entre [-1,+1] (redondeado).
 
-        - Distribución normal: la mutación de la posición i se consigue sumándole
-         al valor de i un valor extraído de una distribución normal, comúnmente
+        - Distribución normal: la tarea de la posición i se desplaza un número
+         de posiciones extraído de una distribución normal, comúnmente
          centrada en 0 y con una determinada desviación estándar. Cuanto mayor
          la desviación estándar, con mayor probabilidad la mutación introducirá
          cambios grandes.
@@ -257,36 +345,58 @@ class Tasks_combination:
         variable. Esta estrategia suele conllevar mayores variaciones que las dos
         anteriores.
 
-        Hay que tener en cuenta que, debido a las mutaciones, un valor que
-        inicialmente estaba dentro del rango permitido puede salirse de él.
-        Una forma de evitarlo es: si el valor tras la mutación excede alguno de
-        los límites acotados, se sobrescribe con el valor del límite. Es decir,
-        se permite que los valores se alejen como máximo hasta el límite impuesto.
+        Los desplazamientos de las distribuciones uniforme y normal y los
+        `operators` no colocan una tarea delante de sus dependencias: el
+        desplazamiento se acota entre la última dependencia de la tarea y su
+        primera tarea dependiente (ver `Mutator.insertion`).
 
         """
 
         # COMPROBACIONES INICIALES: EXCEPTIONS Y WARNINGS
         # ----------------------------------------------------------------------
+        distribution = {"uniform": "uniforme", "random": "aleatoria"}.get(distribution, distribution)
         if not distribution in ["normal", "uniforme", "aleatoria"]:
             raise Exception(
                 "El argumento distribucion debe ser: 'normal', 'uniforme' o " \
                 + "'aleatoria'"
                 )
 
+        # La permutación es inmutable: se muta una copia y se asigna al final
+        permutation = self.permutation.copy()
+
+        # MUTACIÓN CON LOS OPERADORES DE Mutation_operators
+        #-----------------------------------------------------------------------
+        if operators is not None:
+            if mutator is None:
+                mutator = Mutator(self.table, operators=operators)
+            n_mutations = mutator.mutate(permutation, mutation_prob, operators=operators)
+            if n_mutations > 0:
+                self.permutation = permutation
+                self.fitness = None
+                self.function_value = None
+            if verbose:
+                print("El Tasks_combination ha sido mutado")
+                print("---------------------------")
+                print("Total mutaciones: " + str(n_mutations))
+                print("Valor variables: " + str(self.variable_values))
+                print("")
+            return
+
         # SELECCIÓN PROBABILISTA DE POSICIONES (VARIABLES) QUE MUTAN
         #-----------------------------------------------------------------------
         posiciones_mutadas = np.random.uniform(
                                 low=0,
                                 high=1,
-                                size=self.n_variables
+                                size=len(permutation)
                              )
         posiciones_mutadas = posiciones_mutadas < mutation_prob
 
         # MODIFICACIÓN DE LOS VALORES DE LAS VARIABLES SELECCIONADAS
         #-----------------------------------------------------------------------
         # Si la distribución seleccionada es "uniforme" o "normal", se extrae un
-        # valor aleatorio de la distribución elegida que se suma para modificar
-        # la/las posiciones mutadas.
+        # valor aleatorio de la distribución elegida y la tarea de la posición
+        # mutada se desplaza ese número de posiciones (sin adelantar a sus
+        # dependencias ni retrasarse tras sus tareas dependientes).
 
         if distribution in ["normal", "uniforme"]:
             if distribution == "normal":
@@ -301,8 +411,10 @@ class Tasks_combination:
                                 high = max_distribution,
                                 size = np.sum(posiciones_mutadas)
                              )
-            self.variable_values[posiciones_mutadas] = \
-                self.variable_values[posiciones_mutadas] + factor_mut
+            if mutator is None:
+                mutator = Mutator(self.table)
+            for i, factor in zip(np.flatnonzero(posiciones_mutadas), np.rint(factor_mut)):
+                mutator.insertion(permutation, int(i), int(i + factor))
 
 
         # Si la distribución seleccionada es "aleatoria", se sobreescribe el
@@ -313,11 +425,9 @@ class Tasks_combination:
             for i in np.flatnonzero(posiciones_mutadas):
                 indices.append(i)
             random.shuffle(indices)
-            valor_copy = copy.deepcopy(self.variable_values)
-            count = 0
-            for i in np.flatnonzero(posiciones_mutadas):
-                self.variable_values[i] = valor_copy[indices[count]]
-                count += 1
+            permutation[np.flatnonzero(posiciones_mutadas)] = self.permutation[indices]
+
+        self.permutation = permutation
 
 
         # REINICIO DEL VALOR Y DEL FITNESS
@@ -377,13 +487,26 @@ def optimization_function(permutacion):
     tareas_completadas = set()
     dificultad_anterior = None
 
+    # Si todas las tareas son vistas sobre la misma tabla (las de un Project) las dependencias se
+    # comprueban con el índice de dependencias compartido: máscara de bits de las completadas
+    index = shared_dependency_index(permutacion)
+    if index is not None:
+        mascaras = index.dependency_mask
+        externas = index.external
+        completadas = 0
+
     for i, task in enumerate(permutacion):
         # Verificar si las dependencias de la tarea están completas
-        for tarea_dependiente in task.dependencies:
-            if tarea_dependiente not in tareas_completadas:
+        if index is not None:
+            if externas[task._index] or mascaras[task._index] & ~completadas:
                 # Penalización alta si se intenta realizar una tarea antes de completar sus dependencias
                 penalizacion_total += (5 - task.priority) * 100  # Penalización basada en la prioridad
-                break  # Salimos, ya que no se puede completar la tarea debido a la dependencia
+        else:
+            for tarea_dependiente in task.dependencies:
+                if tarea_dependiente not in tareas_completadas:
+                    # Penalización alta si se intenta realizar una tarea antes de completar sus dependencias
+                    penalizacion_total += (5 - task.priority) * 100  # Penalización basada en la prioridad
+                    break  # Salimos, ya que no se puede completar la tarea debido a la dependencia
         
         # Sumar la duración de la tarea al tiempo actual
         tiempo_actual += task.duration
@@ -409,7 +532,10 @@ def optimization_function(permutacion):
         dificultad_anterior = task.difficulty
         
         # Marcar la tarea como completada
-        tareas_completadas.add(task)
+        if index is not None:
+            completadas |= 1 << task._index
+        else:
+            tareas_completadas.add(task)
     
     # Calcular la puntuación final
     puntuacion_final = reward_total - penalizacion_total
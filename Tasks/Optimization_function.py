@@ -1,9 +1,21 @@
+import functools
+import weakref
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-import matplotlib.pyplot as plt
+from Tasks.fuzzy_compiler import CompiledFuzzySystem
+
+# Valores máximos del sistema por defecto (ver default_fuzzy_system)
+DEFAULT_MAX_VALUES = {
+    'max_num_tasks': 100,
+    'max_total_time': 500,
+    'max_total_resources': 50,
+    'max_total_rewards': 10000,
+    'max_high_priority_tasks': 80,
+}
 
 def create_fuzzy_system(max_num_tasks, max_total_time, max_total_resources, max_total_rewards, max_high_priority_tasks):
+    # skfuzzy (y con él scipy) solo se importa al construir un sistema, no al importar el módulo
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
 
     # Definir el rango de valores para cada variable usando el valor máximo proporcionado
     num_tasks = ctrl.Antecedent(np.arange(0, max_num_tasks + 1, 1), 'num_tasks')
@@ -65,6 +77,11 @@ def create_fuzzy_system(max_num_tasks, max_total_time, max_total_resources, max_
 
     return quality_eval
 
+@functools.lru_cache(maxsize=None)
+def default_fuzzy_system():
+    # Sistema con los valores de DEFAULT_MAX_VALUES, construido la primera vez que se pide
+    return create_fuzzy_system(**DEFAULT_MAX_VALUES)
+
 def evaluate_permutation(quality_eval, num_tasks_val, total_time_val, total_resources_val, total_rewards_val, high_priority_tasks_val):
     
     # Proveer las entradas al sistema de control difuso seleccionado
@@ -81,18 +98,37 @@ def evaluate_permutation(quality_eval, num_tasks_val, total_time_val, total_reso
         print(f"Error computing the system: {e}")
         return None
 
-    return quality_eval.output['quality']
+    # Sin salida si ninguna regla se activa
+    return quality_eval.output.get('quality')
+
+# Columnas de los valores que recibe evaluate_permutations
+QUALITY_INPUTS = ['num_tasks', 'total_time', 'total_resources', 'total_rewards', 'high_priority_tasks']
+
+# Sistema compilado de cada sistema de control ya evaluado por lotes
+_compiled_systems = weakref.WeakKeyDictionary()
+
+def compile_fuzzy_system(quality_eval):
+    # Sistema compilado a arrays (ver Tasks.fuzzy_compiler) de una simulación creada por
+    # create_fuzzy_system; se compila una sola vez por sistema de control
+    if isinstance(quality_eval, CompiledFuzzySystem):
+        return quality_eval
+    control_system = quality_eval.ctrl
+    if control_system not in _compiled_systems:
+        _compiled_systems[control_system] = CompiledFuzzySystem(control_system)
+    return _compiled_systems[control_system]
+
+def evaluate_permutations(quality_eval, values):
+    # Versión por lotes de evaluate_permutation: values es un array (N, 5) con las columnas de
+    # QUALITY_INPUTS (una fila por permutación) y devuelve las N calidades con una sola
+    # defuzzificación vectorizada. NaN donde ninguna regla se activa (evaluate_permutation
+    # devuelve None)
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    if values.shape[1] != len(QUALITY_INPUTS):
+        raise Exception("values must have one column for each of: " + ", ".join(QUALITY_INPUTS))
+    quality_system = compile_fuzzy_system(quality_eval)
+    return quality_system.evaluate(**{label: values[:, k] for k, label in enumerate(QUALITY_INPUTS)})['quality']
 
 # Ejemplo de uso:
-max_values = {
-    'max_num_tasks': 100,
-    'max_total_time': 500,
-    'max_total_resources': 50,
-    'max_total_rewards': 10000,
-    'max_high_priority_tasks': 80,
-}
-
-quality_eval = create_fuzzy_system(**max_values)
-
-quality_score = evaluate_permutation(quality_eval, 100, 500, 10, 10000, 79)
-print(f"Quality Score: {quality_score}")
+if __name__ == '__main__':
+    quality_score = evaluate_permutation(default_fuzzy_system(), 100, 500, 10, 10000, 79)
+    print(f"Quality Score: {quality_score}")
@@ -0,0 +1,196 @@
+import numpy as np
+
+# Class representing the dependencies of a TaskTable as bitsets
+class DependencyIndex:
+    """
+    Índice de las dependencias de una `TaskTable` como conjuntos de bits: la
+    máscara de la tarea `i` es un entero de Python cuyo bit `j` indica que
+    `i` depende de la tarea de índice `j`. Comprobar si una tarea puede
+    empezar dado el conjunto de tareas ya completadas (otra máscara) es una
+    sola operación sobre enteros, en lugar de recorrer sus dependencias y
+    buscarlas en un `set`.
+
+    La clausura transitiva (ancestros y descendientes de cada tarea) se
+    calcula la primera vez que se consulta, en orden topológico, y las
+    tareas de un ciclo de dependencias se resuelven iterando hasta un punto
+    fijo. Las dependencias no cambian, por lo que el índice se construye una
+    sola vez por tabla (ver `TaskTable.dependency_index`).
+
+    Parameters
+    ----------
+    table : `TaskTable`
+        tabla de las tareas.
+
+    Attributes
+    ----------
+    dependency_mask : `list`
+        máscara de las dependencias directas de cada tarea.
+
+    external : `list`
+        `True` para las tareas con alguna dependencia fuera de la tabla, que
+        nunca pueden empezar con todas sus dependencias completadas.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        ptr = table.dependency_ptr.tolist()
+        idx = table.dependency_idx.tolist()
+        self.dependency_mask = []
+        for i in range(len(table)):
+            mask = 0
+            for dependency in idx[ptr[i]:ptr[i + 1]]:
+                mask |= 1 << dependency
+            self.dependency_mask.append(mask)
+        self.external = table.external_dependency.tolist()
+        self._ancestors = None
+        self._descendants = None
+
+    def __len__(self):
+        return len(self.dependency_mask)
+
+    def __repr__(self):
+        return f"DependencyIndex(Tasks: {len(self)})"
+
+    ####################### Conjuntos de bits #############################
+
+    def mask(self, indices) -> int:
+        """Máscara con los bits de las tareas de `indices`."""
+        mask = 0
+        for i in np.asarray(indices, dtype=np.int64).tolist():
+            mask |= 1 << i
+        return mask
+
+    def indices(self, mask) -> np.ndarray:
+        """Índices (ordenados) de las tareas de la máscara `mask`."""
+        n_bytes = (len(self) + 7) // 8
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes(n_bytes, 'little'), dtype=np.uint8),
+                             bitorder='little')
+        return np.flatnonzero(bits).astype(np.int64)
+
+    ####################### Clausura transitiva ###########################
+
+    def _closure(self, masks, order, unresolved, unresolved_first):
+        # Unión de las máscaras de los vecinos de cada tarea, en un orden en
+        # el que los vecinos se procesan antes. Las tareas de `unresolved`
+        # (las del último nivel, donde quedan los ciclos) se repasan hasta que
+        # ninguna máscara cambia: antes que el resto para los descendientes
+        # (sus dependientes están en el mismo grupo) y después para los
+        # ancestros
+        closure = [0] * len(masks)
+
+        def extend(i):
+            pending = masks[i]
+            value = pending
+            while pending:
+                low = pending & -pending
+                value |= closure[low.bit_length() - 1]
+                pending ^= low
+            return value
+
+        def fixed_point():
+            changed = True
+            while changed:
+                changed = False
+                for i in unresolved:
+                    value = extend(i)
+                    if value != closure[i]:
+                        closure[i] = value
+                        changed = True
+
+        if unresolved_first:
+            fixed_point()
+        for i in order:
+            closure[i] = extend(i)
+        if not unresolved_first:
+            fixed_point()
+        return closure
+
+    def _build_closure(self):
+        levels = self.table.levels()
+        last = levels.max() if len(levels) > 0 else 0
+        order = np.argsort(levels, kind='stable')
+        resolved = order[levels[order] < last].tolist()
+        unresolved = np.flatnonzero(levels == last).tolist()
+        self._ancestors = self._closure(self.dependency_mask, resolved, unresolved, False)
+
+        ptr, idx = self.table.dependents()
+        ptr = ptr.tolist()
+        idx = idx.tolist()
+        dependent_mask = []
+        for i in range(len(self)):
+            mask = 0
+            for dependent in idx[ptr[i]:ptr[i + 1]]:
+                mask |= 1 << dependent
+            dependent_mask.append(mask)
+        self._descendants = self._closure(dependent_mask, resolved[::-1], unresolved, True)
+
+    def ancestor_mask(self, i) -> int:
+        """Máscara de las tareas de las que depende la tarea `i`, directa o indirectamente."""
+        if self._ancestors is None:
+            self._build_closure()
+        return self._ancestors[i]
+
+    def descendant_mask(self, i) -> int:
+        """Máscara de las tareas que dependen de la tarea `i`, directa o indirectamente."""
+        if self._descendants is None:
+            self._build_closure()
+        return self._descendants[i]
+
+    def ancestors(self, i) -> np.ndarray:
+        """Índices de las tareas de las que depende la tarea `i`, directa o indirectamente."""
+        return self.indices(self.ancestor_mask(i))
+
+    def descendants(self, i) -> np.ndarray:
+        """Índices de las tareas que dependen de la tarea `i`, directa o indirectamente."""
+        return self.indices(self.descendant_mask(i))
+
+    def depends_on(self, i, j) -> bool:
+        """Si la tarea `i` depende de la tarea `j`, directa o indirectamente."""
+        return bool(self.ancestor_mask(i) >> j & 1)
+
+    ####################### Consultas #############################
+
+    def is_ready(self, i, done) -> bool:
+        """
+        Si todas las dependencias de la tarea `i` están en la máscara `done` de
+        tareas completadas.
+        """
+        return not self.external[i] and self.dependency_mask[i] & ~done == 0
+
+    def feasible_prefix(self, permutation) -> np.ndarray:
+        """
+        Para cada posición de `permutation` (índices de la tabla), si todas las
+        dependencias de su tarea están en las posiciones anteriores.
+        """
+        masks = self.dependency_mask
+        external = self.external
+        done = 0
+        feasible = []
+        for i in np.asarray(permutation, dtype=np.int64).tolist():
+            feasible.append(not external[i] and masks[i] & ~done == 0)
+            done |= 1 << i
+        return np.array(feasible, dtype=bool)
+
+    def is_feasible(self, permutation) -> bool:
+        """Si `permutation` respeta todas las dependencias de sus tareas."""
+        return bool(self.feasible_prefix(permutation).all())
+
+    def blocked_by(self, mask) -> np.ndarray:
+        """Para cada tarea, si alguna de sus dependencias directas está en `mask`."""
+        return np.array([dependencies & mask != 0 for dependencies in self.dependency_mask], dtype=bool)
+
+
+def shared_dependency_index(tasks):
+    '''
+        Índice de dependencias de la tabla a la que están ligadas todas las tareas de `tasks` (por
+        ejemplo, las de un `Project`), o None si alguna no está ligada a esa tabla
+    '''
+    if len(tasks) == 0:
+        return None
+    table = tasks[0]._table
+    if table is None:
+        return None
+    for task in tasks:
+        if task._table is not table:
+            return None
+    return table.dependency_index()
@@ -0,0 +1,451 @@
+import itertools
+import threading
+import numpy as np
+
+# Compiler of skfuzzy control systems into NumPy arrays. The Mamdani inference
+# of `ctrl.ControlSystemSimulation` (membership by linear interpolation, AND /
+# OR / NOT of each rule, min implication, accumulation per term and centroid
+# defuzzification) is evaluated for many inputs at once, with no graph walk
+# and no state shared between calls. skfuzzy is only imported to compile a
+# system, not to import this module or to evaluate a compiled one.
+
+# Inputs evaluated at once when a lookup table is built
+GRID_CHUNK_SIZE = 4096
+
+
+def _compile_expression(antecedent, columns, and_func, or_func):
+    # Antecedent of a rule as nested tuples over the columns of the
+    # membership matrix (see `CompiledFuzzySystem.memberships`)
+    from skfuzzy.control.term import Term, TermAggregate
+    if isinstance(antecedent, Term):
+        key = (antecedent.parent.label, antecedent.label)
+        if key not in columns:
+            raise Exception(f"The rule term {key} is not a term of an antecedent.")
+        return ("term", columns[key])
+    if isinstance(antecedent, TermAggregate):
+        first = _compile_expression(antecedent.term1, columns, and_func, or_func)
+        if antecedent.kind == "not":
+            return ("not", first)
+        second = _compile_expression(antecedent.term2, columns, and_func, or_func)
+        return (antecedent.kind, and_func if antecedent.kind == "and" else or_func, first, second)
+    raise Exception("Unsupported rule antecedent: " + repr(antecedent))
+
+
+def _flat_terms(expression, kind):
+    # Columns of an expression that only combines terms with `kind` through
+    # fmin (and) or fmax (or), or None
+    if expression[0] == "term":
+        return [expression[1]]
+    if expression[0] != kind or expression[1] is not (np.fmin if kind == "and" else np.fmax):
+        return None
+    first = _flat_terms(expression[2], kind)
+    second = _flat_terms(expression[3], kind)
+    return None if first is None or second is None else first + second
+
+
+def _evaluate_expression(expression, memberships):
+    kind = expression[0]
+    if kind == "term":
+        return memberships[:, expression[1]]
+    if kind == "not":
+        return 1. - _evaluate_expression(expression[1], memberships)
+    return expression[1](_evaluate_expression(expression[2], memberships),
+                         _evaluate_expression(expression[3], memberships))
+
+
+class CompiledFuzzySystem:
+    """
+    A `ctrl.ControlSystem` compiled into membership arrays, with a vectorized
+    Mamdani inference and centroid defuzzification. The result is the one of
+    `ctrl.ControlSystemSimulation` (up to rounding): the output membership is
+    sampled on the universe of the consequent plus the points where each
+    term crosses its cut, as skfuzzy does, and its centroid is the exact one
+    of the piecewise linear function.
+
+    The memberships of all the antecedent terms form one matrix, the rules
+    that are plain fmin (AND) or fmax (OR) combinations of terms are
+    evaluated together with a single reduction, and the accumulation of the
+    rules on each consequent term is one ``maximum.reduceat``. The compiled
+    system has no mutable state (its arrays are read-only and every
+    evaluation works on its own arrays), so one instance can be shared by
+    any number of callers and threads; copying it returns the same instance.
+
+    Parameters
+    ----------
+    control_system : `ctrl.ControlSystem`
+        fuzzy system to compile. The consequents must use the "centroid"
+        defuzzification method and the rules can only use antecedents.
+
+    Attributes
+    ----------
+    inputs : `list`
+        labels of the antecedents, in the order of the columns of
+        `evaluate_matrix`.
+
+    outputs : `list`
+        labels of the consequents.
+    """
+
+    def __init__(self, control_system):
+        from skfuzzy import control as ctrl
+        # Antecedents: universe and membership functions of their terms, whose
+        # memberships are the columns of the membership matrix
+        self.inputs = []
+        self.universes = {}
+        self.membership_functions = {}
+        columns = {}
+        for antecedent in control_system.antecedents:
+            self.inputs.append(antecedent.label)
+            self.universes[antecedent.label] = np.asarray(antecedent.universe, dtype=np.float64)
+            for label in antecedent.terms:
+                columns[(antecedent.label, label)] = len(columns)
+            self.membership_functions[antecedent.label] = np.array(
+                [term.mf for term in antecedent.terms.values()], dtype=np.float64
+            ).reshape(len(antecedent.terms), len(antecedent.universe))
+        self.n_terms = len(columns)
+        # Slope of each segment of each membership function; the last column
+        # (zero) is used by the inputs at the upper bound of the universe
+        self._slopes = {
+            label: np.column_stack([np.diff(mfs, axis=1) / np.diff(self.universes[label]), np.zeros(len(mfs))])
+            for label, mfs in self.membership_functions.items()
+        }
+        # Two extra columns, always 1 and 0, pad the flat AND and OR rules
+        one, zero = self.n_terms, self.n_terms + 1
+
+        # Rules: the flat ones as padded column matrices, the rest as trees
+        expressions = []
+        and_rules, or_rules, tree_rules = [], [], []
+        activations = {}
+        for position, rule in enumerate(control_system.rules):
+            expression = _compile_expression(rule.antecedent, columns, rule.and_func, rule.or_func)
+            expressions.append(expression)
+            if _flat_terms(expression, "and") is not None:
+                and_rules.append(position)
+            elif _flat_terms(expression, "or") is not None:
+                or_rules.append(position)
+            else:
+                tree_rules.append(position)
+            for weighted_term in rule.consequent:
+                term = weighted_term.term
+                activations.setdefault(term.parent.label, []).append((position, term.label, weighted_term.weight))
+        self.n_rules = len(expressions)
+
+        def padded(rules, kind, fill):
+            terms = [_flat_terms(expressions[position], kind) for position in rules]
+            width = max([len(t) for t in terms], default=1)
+            return np.array([t + [fill] * (width - len(t)) for t in terms], dtype=np.int64).reshape(len(terms), width)
+
+        self.and_rules = np.array(and_rules, dtype=np.int64)
+        self.and_columns = padded(and_rules, "and", one)
+        self.or_rules = np.array(or_rules, dtype=np.int64)
+        self.or_columns = padded(or_rules, "or", zero)
+        self.tree_rules = [(position, expressions[position]) for position in tree_rules]
+
+        # Consequents: only the terms used by some rule take part in the
+        # output. The activations (rule, weight) are sorted by term
+        self.outputs = []
+        self.output_terms = {}
+        self.output_mfs = {}
+        self.accumulation = {}
+        self.activations = {}
+        for consequent in control_system.consequents:
+            if consequent.defuzzify_method != "centroid":
+                raise Exception("Only the centroid defuzzification method can be compiled.")
+            if consequent.label not in activations:
+                raise Exception(f"No rule uses the consequent '{consequent.label}'.")
+            used = {label for _, label, _ in activations[consequent.label]}
+            labels = [label for label in consequent.terms if label in used]
+            entries = sorted(activations[consequent.label], key=lambda entry: labels.index(entry[1]))
+            terms = np.array([labels.index(label) for _, label, _ in entries], dtype=np.int64)
+            self.outputs.append(consequent.label)
+            self.universes[consequent.label] = np.asarray(consequent.universe, dtype=np.float64)
+            self.output_terms[consequent.label] = labels
+            self.output_mfs[consequent.label] = np.array([consequent.terms[label].mf for label in labels],
+                                                         dtype=np.float64)
+            # None stands for the maximum, reduced in one operation
+            accumulation = consequent.accumulation_method
+            self.accumulation[consequent.label] = None \
+                if accumulation is np.fmax or accumulation is ctrl.accumulation_max else accumulation
+            self.activations[consequent.label] = (
+                np.array([position for position, _, _ in entries], dtype=np.int64),
+                np.array([weight for _, _, weight in entries], dtype=np.float64),
+                terms,
+                np.searchsorted(terms, np.arange(len(labels))),
+            )
+
+        # Read-only rule base
+        arrays = [self.and_rules, self.and_columns, self.or_rules, self.or_columns]
+        arrays += list(self.universes.values()) + list(self.membership_functions.values())
+        arrays += list(self._slopes.values()) + list(self.output_mfs.values())
+        arrays += [array for activations in self.activations.values() for array in activations]
+        for array in arrays:
+            array.setflags(write=False)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"CompiledFuzzySystem(Inputs: {self.inputs} Outputs: {self.outputs} Rules: {self.n_rules})"
+
+    ######################## Inference ############################
+
+    def memberships(self, inputs) -> np.ndarray:
+        """
+        Membership of each input value in each antecedent term, plus a column
+        of ones and a column of zeros: array of shape (N, terms + 2). The
+        inputs are clipped to the bounds of their universe.
+        """
+        values = [np.clip(np.asarray(inputs[label], dtype=np.float64).ravel(),
+                          self.universes[label][0], self.universes[label][-1])
+                  for label in self.inputs]
+        n = max(len(value) for value in values)
+        memberships = np.empty((n, self.n_terms + 2))
+        column = 0
+        for label, value in zip(self.inputs, values):
+            # Linear interpolation of every term at once, computed as np.interp
+            universe = self.universes[label]
+            mfs, slopes = self.membership_functions[label], self._slopes[label]
+            segment = np.searchsorted(universe, value, side='right') - 1
+            memberships[:, column:column + len(mfs)] = (slopes[:, segment] * (value - universe[segment])
+                                                        + mfs[:, segment]).T
+            column += len(mfs)
+        memberships[:, -2] = 1.
+        memberships[:, -1] = 0.
+        return memberships
+
+    def firing(self, memberships) -> np.ndarray:
+        """Firing strength of each rule: array of shape (N, rules)."""
+        firing = np.empty((len(memberships), self.n_rules))
+        if len(self.and_rules) > 0:
+            firing[:, self.and_rules] = memberships[:, self.and_columns].min(axis=2)
+        if len(self.or_rules) > 0:
+            firing[:, self.or_rules] = memberships[:, self.or_columns].max(axis=2)
+        for position, expression in self.tree_rules:
+            firing[:, position] = _evaluate_expression(expression, memberships)
+        return firing
+
+    def cuts(self, output, firing) -> np.ndarray:
+        """
+        Activation of each term of the consequent `output`, accumulated over
+        the rules: array of shape (N, terms).
+        """
+        rules, weights, terms, starts = self.activations[output]
+        values = firing[:, rules] * weights
+        accumulation = self.accumulation[output]
+        if accumulation is None:
+            return np.maximum.reduceat(values, starts, axis=1)
+        cuts = np.empty((len(firing), len(starts)))
+        for k, term in enumerate(terms):
+            cuts[:, term] = values[:, k] if k == starts[term] else accumulation(values[:, k], cuts[:, term])
+        return cuts
+
+    def defuzzify(self, output, cuts) -> np.ndarray:
+        """
+        Centroid of the output membership of `output` for each row of `cuts`
+        (see `cuts`). ``NaN`` where no rule fires.
+        """
+        universe = self.universes[output]
+        mfs = self.output_mfs[output]
+        n = len(cuts)
+
+        # Points between two values of the universe where a term crosses its
+        # cut (skfuzzy's _interp_universe_fast). There are few of them, so
+        # they are gathered per row. The points of a zero cut, which skfuzzy
+        # also adds, are values of the universe and do not change the result
+        above = mfs[None] >= cuts[:, :, None]
+        rows, terms, segments = np.nonzero(above[:, :, 1:] != above[:, :, :-1])
+        points = universe[segments] + (cuts[rows, terms] - mfs[terms, segments]) \
+            * (universe[segments + 1] - universe[segments]) / (mfs[terms, segments + 1] - mfs[terms, segments])
+        counts = np.bincount(rows, minlength=n)
+        extra = np.full((n, counts.max() if n > 0 else 0), np.nan)
+        extra[rows, np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)] = points
+        nodes = np.sort(np.concatenate([np.broadcast_to(universe, (n, len(universe))), extra], axis=1), axis=1)
+
+        # Output membership at the nodes: maximum over the terms of the cut
+        # membership function of each term
+        membership = np.zeros(nodes.shape)
+        for k in range(len(mfs)):
+            np.maximum(membership, np.minimum(cuts[:, k:k + 1], np.interp(nodes, universe, mfs[k])), out=membership)
+
+        # Centroid of the piecewise linear function (skfuzzy.defuzzify.centroid)
+        width = nodes[:, 1:] - nodes[:, :-1]
+        y1, y2 = membership[:, :-1], membership[:, 1:]
+        height = y1 + y2
+        area = 0.5 * width * height
+        valid = area > 0
+        moment = np.divide(2.0 / 3.0 * width * (y2 + 0.5 * y1), height, out=np.zeros(area.shape), where=valid)
+        total_area = np.where(valid, area, 0.0).sum(axis=1)
+        moment_area = np.where(valid, (moment + nodes[:, :-1]) * area, 0.0).sum(axis=1)
+        return np.divide(moment_area, total_area, out=np.full(n, np.nan), where=total_area > 0)
+
+    def evaluate(self, **inputs) -> dict:
+        """
+        Outputs of the system for arrays of inputs (one keyword per
+        antecedent): consequent -> array. ``NaN`` where no rule fires.
+        """
+        missing = [label for label in self.inputs if label not in inputs]
+        if missing:
+            raise Exception("All antecedents must have input values: " + ", ".join(missing))
+        firing = self.firing(self.memberships(inputs))
+        return {output: self.defuzzify(output, self.cuts(output, firing)) for output in self.outputs}
+
+    def evaluate_matrix(self, values, output=None) -> np.ndarray:
+        """
+        Output `output` (by default the first consequent) for each row of the
+        (N, len(inputs)) array `values`, whose columns follow `inputs`.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        result = self.evaluate(**{label: values[:, k] for k, label in enumerate(self.inputs)})
+        return result[output if output is not None else self.outputs[0]]
+
+    def compute(self, **inputs) -> dict:
+        """
+        Outputs for a single set of crisp inputs: consequent -> `float`, as in
+        the ``output`` of a `ctrl.ControlSystemSimulation` (``NaN`` where no
+        rule fires).
+        """
+        return {output: float(value[0]) for output, value in self.evaluate(**inputs).items()}
+
+    def lookup_table(self, grid_points=21, output=None):
+        """Tabulates `output` on a dense grid, see `FuzzyLookupTable`."""
+        return FuzzyLookupTable(self, grid_points=grid_points, output=output)
+
+
+class SharedFuzzySystem:
+    """
+    `CompiledFuzzySystem` built on first use and shared by every caller.
+    The first call compiles the control system returned by `builder` under
+    a lock, so concurrent first calls compile it only once; later calls only
+    read an attribute, without locking.
+
+    Parameters
+    ----------
+    builder : `callable`
+        function without arguments that returns the `ctrl.ControlSystem`.
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self._system = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> CompiledFuzzySystem:
+        system = self._system
+        if system is None:
+            with self._lock:
+                if self._system is None:
+                    self._system = CompiledFuzzySystem(self.builder())
+                system = self._system
+        return system
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        # Neither the lock nor the compiled arrays are sent: another process
+        # compiles its own system on first use
+        return {'builder': self.builder, '_system': None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"SharedFuzzySystem(Compiled: {self._system is not None})"
+
+
+class FuzzyLookupTable:
+    """
+    Output of a `CompiledFuzzySystem` tabulated on a regular grid over the
+    universes of its antecedents, evaluated by multilinear interpolation.
+    A single evaluation takes microseconds; the difference with the exact
+    inference shrinks with `grid_points` (the membership functions are
+    piecewise linear, but the centroid is not linear in them). The cells
+    with a corner where no rule fires interpolate to ``NaN``.
+
+    Parameters
+    ----------
+    system : `CompiledFuzzySystem`
+        compiled fuzzy system.
+
+    grid_points : `int` or `list`, optional
+        points of the grid along each antecedent. (default ``21``)
+
+    output : `str`, optional
+        tabulated consequent. (default ``None``, the first one)
+    """
+
+    def __init__(self, system: CompiledFuzzySystem, grid_points=21, output=None):
+        self.output = output if output is not None else system.outputs[0]
+        self.inputs = list(system.inputs)
+        if np.isscalar(grid_points):
+            grid_points = [grid_points] * len(self.inputs)
+        if len(grid_points) != len(self.inputs) or min(grid_points) < 2:
+            raise Exception("grid_points must have at least two points for each antecedent.")
+        self.axes = [np.linspace(system.universes[label][0], system.universes[label][-1], points)
+                     for label, points in zip(self.inputs, grid_points)]
+
+        shape = tuple(len(axis) for axis in self.axes)
+        grid = np.empty(int(np.prod(shape)))
+        for start in range(0, len(grid), GRID_CHUNK_SIZE):
+            flat = np.arange(start, min(start + GRID_CHUNK_SIZE, len(grid)))
+            position = np.unravel_index(flat, shape)
+            values = {label: axis[index] for label, axis, index in zip(self.inputs, self.axes, position)}
+            grid[flat] = system.evaluate(**values)[self.output]
+        self.grid = grid.reshape(shape)
+
+        # Scalar evaluation in plain Python: grid as a flat list, strides and
+        # offsets of the corners of a cell (the last dimension varies fastest)
+        self._flat = self.grid.ravel().tolist()
+        self._strides = [int(np.prod(shape[k + 1:])) for k in range(len(shape))]
+        self._bounds = [(float(axis[0]), float(axis[-1]), float(axis[1] - axis[0]), len(axis) - 1)
+                        for axis in self.axes]
+        self._corners = list(itertools.product((0, 1), repeat=len(shape)))
+        self._offsets = [sum(bit * stride for bit, stride in zip(corner, self._strides))
+                         for corner in self._corners]
+
+    def __repr__(self):
+        return f"FuzzyLookupTable(Output: {self.output} Grid: {self.grid.shape})"
+
+    def __call__(self, **inputs) -> float:
+        """Interpolated output for a single set of crisp inputs."""
+        base = 0
+        fractions = []
+        for label, stride, (low, high, step, last) in zip(self.inputs, self._strides, self._bounds):
+            value = min(max(float(inputs[label]), low), high)
+            position = (value - low) / step
+            index = min(int(position), last - 1)
+            fractions.append(position - index)
+            base += index * stride
+        # Values of the corners of the cell, interpolated one dimension at a
+        # time from the last one
+        flat = self._flat
+        values = [flat[base + offset] for offset in self._offsets]
+        for fraction in reversed(fractions):
+            if fraction == 0.0:
+                values = values[0::2]
+            else:
+                values = [low + fraction * (high - low) for low, high in zip(values[0::2], values[1::2])]
+        return values[0]
+
+    def evaluate(self, **inputs) -> np.ndarray:
+        """Interpolated output for arrays of inputs (one keyword per antecedent)."""
+        indices = []
+        fractions = []
+        for label, axis in zip(self.inputs, self.axes):
+            values = np.clip(np.asarray(inputs[label], dtype=np.float64), axis[0], axis[-1])
+            position = (values - axis[0]) / (axis[1] - axis[0])
+            index = np.minimum(position.astype(np.int64), len(axis) - 2)
+            indices.append(index)
+            fractions.append(position - index)
+        values = [self.grid[tuple(index + bit for index, bit in zip(indices, corner))] for corner in self._corners]
+        for fraction in reversed(fractions):
+            values = [np.where(fraction == 0.0, low, low + fraction * (high - low))
+                      for low, high in zip(values[0::2], values[1::2])]
+        return values[0]
@@ -2,9 +2,46 @@ import numpy as np
 from PMOntologic.Resource import Resource
 from typing import List
 
+# Scalar field of a Task, stored in the instance or in the TaskTable the task is bound to
+class TaskField:
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = '_' + name
+
+    def __get__(self, task, owner=None):
+        if task is None:
+            return self
+        if task._table is None:
+            return getattr(task, self.slot)
+        return task._table.get_value(self.name, task._index)
+
+    def __set__(self, task, value):
+        if task._table is None:
+            setattr(task, self.slot, value)
+        else:
+            task._table.set_value(self.name, task._index, value)
+
 # Class representing a Task in the project
 class Task:
+    # Una tarea ligada a una TaskTable (ver TaskTable.bind) es una vista sobre
+    # una fila de la tabla: sus campos escalares se leen y escriben en las
+    # columnas de la tabla en lugar de en la instancia.
+    __slots__ = ('id', 'resources', 'dependencies', '_table', '_index',
+                 '_start', '_deadline', '_priority', '_status', '_duration',
+                 '_reward', '_difficulty', '_problems_probability')
+
+    start = TaskField()
+    deadline = TaskField()
+    priority = TaskField()
+    status = TaskField()
+    duration = TaskField()
+    reward = TaskField()
+    difficulty = TaskField()
+    problems_probability = TaskField()
+
     def __init__(self, id, priority, duration, reward, start=0, deadline=1000000, difficulty=0, problems_probability=0.0):
+        self._table = None
+        self._index = None
         self.id = id
         self.start = start
         self.deadline = deadline
@@ -24,11 +61,11 @@ class Task:
 
     def __repr__(self):
         return f"Task(Name: {self.id} Status: {self.status} Duration: {self.duration}"
-    
+
     def __eq__(self, other):
         if isinstance(other, Task):
             return (self.id == other.id)
         return False
 
     def __hash__(self):
-        return hash((self.id))
\ No newline at end of file
+        return hash((self.id))
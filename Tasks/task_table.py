@@ -0,0 +1,337 @@
+import hashlib
+import numpy as np
+from Tasks.task import Task
+from Tasks.dependency_index import DependencyIndex
+from typing import Dict, List
+
+# Scalar fields of Task stored as columns of the table
+TASK_FIELDS = ['start', 'deadline', 'priority', 'status', 'duration', 'reward', 'difficulty', 'problems_probability']
+
+def _mix64(value):
+    # Finalizador de splitmix64: reparte los bits de hashes pequeños (ids enteros)
+    value &= 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+def _is_integer(value):
+    return isinstance(value, (int, np.integer))
+
+# Class representing a compact, array-backed table of the tasks of a project
+class TaskTable:
+    """
+    Tabla de tareas con los campos escalares de cada `Task` almacenados en
+    columnas de NumPy (struct-of-arrays), las dependencias y los recursos en
+    formato CSR, y mapas id <-> índice. Las permutaciones del algoritmo
+    genético se representan como arreglos de índices sobre esta tabla, y los
+    bucles sobre las tareas pueden indexar las columnas en lugar de recorrer
+    los atributos de cada objeto.
+
+    Parameters
+    ----------
+    tasks : `list`
+        lista de tareas (`Task`) que forman la tabla. El orden de la lista
+        define el índice de cada tarea.
+
+    resources : `list`, optional
+        recursos (`Resource`) del proyecto. Los recursos usados por las tareas
+        que no estén en la lista se añaden al final. (default ``None``)
+
+    bind : `bool`, optional
+        ligar las tareas a la tabla (ver `bind`). (default ``False``)
+
+    Attributes
+    ----------
+    tasks : `list`
+        tareas originales, en el orden de la tabla.
+
+    ids : `list`
+        id de la tarea en cada índice.
+
+    index : `dict`
+        id de tarea -> índice en la tabla.
+
+    start, deadline, priority, status, duration, reward, difficulty,
+    problems_probability : `numpy.ndarray`
+        columnas con el campo correspondiente de cada tarea. Son int64 si
+        todos los valores son enteros y float64 en otro caso. En una columna
+        float64 se recuerda qué filas tenían un entero, y leer el campo desde
+        la tarea devuelve el mismo tipo que se le asignó (``10`` y no
+        ``10.0``).
+
+    dependency_ptr, dependency_idx : `numpy.ndarray`
+        dependencias en formato CSR: las dependencias de la tarea `i` son
+        `dependency_idx[dependency_ptr[i]:dependency_ptr[i + 1]]`.
+
+    external_dependency : `numpy.ndarray`
+        `True` para las tareas que dependen de alguna tarea que no está en la
+        tabla (dependencia que nunca puede cumplirse dentro de la permutación).
+
+    resource_ids : `list`
+        id del recurso en cada índice de recurso.
+
+    resource_index : `dict`
+        id de recurso -> índice de recurso.
+
+    resource_total : `numpy.ndarray`
+        cantidad total de cada recurso en el proyecto (0 si no se conoce).
+
+    resource_ptr, resource_idx, resource_amount : `numpy.ndarray`
+        recursos requeridos en formato CSR: la tarea `i` usa
+        `resource_amount[k]` unidades del recurso `resource_idx[k]` para
+        `k` en `range(resource_ptr[i], resource_ptr[i + 1])`.
+
+    id_hash : `numpy.ndarray`
+        hash de 64 bits (uint64) del id de cada tarea, para construir hashes
+        de secuencias de tareas (ver `FitnessCache`).
+
+    version : `int`
+        contador que aumenta cada vez que se modifica un valor de la tabla.
+    """
+
+    def __init__(self, tasks: List[Task], resources=None, bind=False):
+        self.tasks = list(tasks)
+        self.ids = [task.id for task in self.tasks]
+        self.index: Dict[int, int] = {task_id: i for i, task_id in enumerate(self.ids)}
+        if len(self.index) != len(self.tasks):
+            raise ValueError("Las tareas de la tabla deben tener ids distintos")
+
+        # Filas con valor entero de cada columna float64 (ver get_value)
+        self._integer_rows: Dict[str, np.ndarray] = {}
+        for field in TASK_FIELDS:
+            setattr(self, field, self._column(field))
+
+        # Dependencias en formato CSR (una fila por tarea)
+        n_tasks = len(self.tasks)
+        self.dependency_ptr = np.zeros(n_tasks + 1, dtype=np.int64)
+        self.external_dependency = np.zeros(n_tasks, dtype=bool)
+        dependency_idx = []
+        for i, task in enumerate(self.tasks):
+            for dependency in task.dependencies:
+                if dependency.id in self.index:
+                    dependency_idx.append(self.index[dependency.id])
+                else:
+                    self.external_dependency[i] = True
+            self.dependency_ptr[i + 1] = len(dependency_idx)
+        self.dependency_idx = np.array(dependency_idx, dtype=np.int64)
+
+        # Recursos del proyecto y recursos requeridos por cada tarea (CSR)
+        self.resource_ids = []
+        self.resource_index: Dict[str, int] = {}
+        resource_total = []
+        for resource in resources or []:
+            self.resource_index[resource.id] = len(self.resource_ids)
+            self.resource_ids.append(resource.id)
+            resource_total.append(resource.total)
+        self.resource_ptr = np.zeros(n_tasks + 1, dtype=np.int64)
+        resource_idx = []
+        resource_amount = []
+        for i, task in enumerate(self.tasks):
+            for resource in task.resources:
+                if resource.id not in self.resource_index:
+                    self.resource_index[resource.id] = len(self.resource_ids)
+                    self.resource_ids.append(resource.id)
+                    resource_total.append(0)
+                resource_idx.append(self.resource_index[resource.id])
+                resource_amount.append(resource.total)
+            self.resource_ptr[i + 1] = len(resource_idx)
+        self.resource_idx = np.array(resource_idx, dtype=np.int64)
+        self.resource_amount = np.array(resource_amount, dtype=np.float64)
+        self.resource_total = np.array(resource_total, dtype=np.float64)
+
+        self.id_hash = np.array([_mix64(hash(task_id)) for task_id in self.ids], dtype=np.uint64)
+        self.version = 0
+        self._fingerprint = None
+        self._fingerprint_version = None
+        self._dependents = None
+        self._levels = None
+        self._dependency_index = None
+
+        if bind:
+            self.bind()
+
+    @classmethod
+    def from_project(cls, project, bind=True):
+        """
+        Construye la tabla de las tareas y recursos de un `Project`. Por defecto
+        las tareas del proyecto quedan ligadas a la tabla.
+        """
+        return cls(list(project.tasks.values()), resources=list(project.resources.values()), bind=bind)
+
+    def _column(self, field):
+        values = [getattr(task, field) for task in self.tasks]
+        column = np.array(values)
+        if column.dtype.kind in 'iu':
+            return column.astype(np.int64)
+        # Una columna que mezcla enteros y floats se guarda en float64 para los
+        # cálculos, pero las filas enteras se siguen leyendo como `int`
+        self._integer_rows[field] = np.array([_is_integer(value) for value in values], dtype=bool)
+        return column.astype(np.float64)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __repr__(self):
+        return f"TaskTable(Tasks: {len(self.tasks)} Dependencies: {len(self.dependency_idx)} Resources: {len(self.resource_ids)})"
+
+    ############### Tareas como vistas sobre la tabla #####################
+
+    def bind(self):
+        """
+        Liga las tareas a la tabla: a partir de aquí cada `Task` es una vista
+        sobre su fila, y leer o modificar sus campos escalares lee o modifica
+        las columnas de la tabla.
+        """
+        for i, task in enumerate(self.tasks):
+            task._table = self
+            task._index = i
+
+    def unbind(self):
+        """
+        Desliga las tareas de la tabla, copiando en cada instancia el valor
+        actual de sus campos.
+        """
+        for i, task in enumerate(self.tasks):
+            if task._table is self:
+                values = {field: self.get_value(field, i) for field in TASK_FIELDS}
+                task._table = None
+                task._index = None
+                for field, value in values.items():
+                    setattr(task, field, value)
+
+    def get_value(self, field, i):
+        value = getattr(self, field)[i].item()
+        integer_rows = self._integer_rows.get(field)
+        if integer_rows is not None and integer_rows[i] and value.is_integer():
+            return int(value)
+        return value
+
+    def set_value(self, field, i, value):
+        column = getattr(self, field)
+        integer = _is_integer(value)
+        # Una columna entera pasa a float64 si se le asigna un valor que no es
+        # un entero; el resto de sus filas se siguen leyendo como `int`
+        if column.dtype.kind == 'i' and not integer:
+            column = column.astype(np.float64)
+            setattr(self, field, column)
+            self._integer_rows[field] = np.ones(len(column), dtype=bool)
+        column[i] = value
+        integer_rows = self._integer_rows.get(field)
+        if integer_rows is not None:
+            integer_rows[i] = integer
+        self.version += 1
+
+    def refresh_resources(self, i):
+        """
+        Vuelve a leer las cantidades de los recursos de la tarea `i` desde sus
+        objetos `Resource` (por ejemplo, después de dividir la tarea).
+        """
+        amounts = [resource.total for resource in self.tasks[i].resources]
+        self.resource_amount[self.resource_ptr[i]:self.resource_ptr[i + 1]] = amounts
+        self.version += 1
+
+    def fingerprint(self):
+        """
+        Huella (bytes) del contenido de la tabla: ids, campos, dependencias y
+        recursos. Dos tablas con la misma huella dan el mismo valor de la
+        función objetivo para la misma secuencia de tareas. Se recalcula solo
+        si la tabla se ha modificado desde la última llamada.
+        """
+        if self._fingerprint_version != self.version:
+            digest = hashlib.blake2b(digest_size=16)
+            for array in [self.id_hash, self.dependency_ptr, self.dependency_idx,
+                          self.external_dependency, self.resource_ptr, self.resource_idx,
+                          self.resource_amount, self.resource_total] \
+                    + [getattr(self, field) for field in TASK_FIELDS]:
+                digest.update(str(array.dtype).encode())
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.digest()
+            self._fingerprint_version = self.version
+        return self._fingerprint
+
+    ####################### Consultas #############################
+
+    def dependencies_of(self, i):
+        """Índices de las dependencias (dentro de la tabla) de la tarea `i`."""
+        return self.dependency_idx[self.dependency_ptr[i]:self.dependency_ptr[i + 1]]
+
+    def dependency_edges(self):
+        """
+        Aristas de dependencia como dos arreglos `(task, dependency)`, ordenados
+        por tarea.
+        """
+        counts = np.diff(self.dependency_ptr)
+        tasks = np.repeat(np.arange(len(self.tasks), dtype=np.int64), counts)
+        return tasks, self.dependency_idx
+
+    def dependents(self):
+        """
+        Grafo inverso de las dependencias en formato CSR `(ptr, idx)`: las
+        tareas que dependen de la tarea `i` son `idx[ptr[i]:ptr[i + 1]]`, en el
+        orden de la tabla. Las dependencias no cambian, por lo que el grafo se
+        calcula una sola vez.
+        """
+        if self._dependents is None:
+            tasks, dependencies = self.dependency_edges()
+            order = np.argsort(dependencies, kind='stable')
+            ptr = np.zeros(len(self.tasks) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(dependencies, minlength=len(self.tasks)), out=ptr[1:])
+            self._dependents = (ptr, tasks[order])
+        return self._dependents
+
+    def levels(self):
+        """
+        Nivel topológico de cada tarea: longitud del camino de dependencias
+        más largo que termina en ella (0 para las tareas sin dependencias en
+        la tabla). Ordenar las tareas por nivel respeta las dependencias. Las
+        tareas que forman parte de un ciclo quedan en el último nivel. Se
+        calcula una sola vez.
+        """
+        if self._levels is None:
+            ptr, idx = self.dependents()
+            indegree = np.diff(self.dependency_ptr).copy()
+            levels = np.zeros(len(self.tasks), dtype=np.int64)
+            done = np.zeros(len(self.tasks), dtype=bool)
+            frontier = np.flatnonzero(indegree == 0)
+            level = 0
+            # Kahn por capas: una tarea entra en la capa en la que se
+            # completa su última dependencia
+            while len(frontier) > 0:
+                levels[frontier] = level
+                done[frontier] = True
+                counts = ptr[frontier + 1] - ptr[frontier]
+                edges = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) \
+                    + np.repeat(ptr[frontier], counts)
+                dependents = idx[edges]
+                np.subtract.at(indegree, dependents, 1)
+                frontier = np.unique(dependents[indegree[dependents] == 0])
+                level += 1
+            levels[~done] = level
+            self._levels = levels
+        return self._levels
+
+    def dependency_index(self) -> DependencyIndex:
+        """
+        Índice de las dependencias de la tabla como conjuntos de bits (ver
+        `DependencyIndex`). Se construye una sola vez.
+        """
+        if self._dependency_index is None:
+            self._dependency_index = DependencyIndex(self)
+        return self._dependency_index
+
+    def resource_matrix(self):
+        """Matriz densa tarea x recurso con las cantidades requeridas."""
+        matrix = np.zeros((len(self.tasks), len(self.resource_ids)))
+        counts = np.diff(self.resource_ptr)
+        tasks = np.repeat(np.arange(len(self.tasks), dtype=np.int64), counts)
+        np.add.at(matrix, (tasks, self.resource_idx), self.resource_amount)
+        return matrix
+
+    def encode(self, permutation: List[Task]) -> np.ndarray:
+        """Convierte una permutación de tareas en un arreglo de índices."""
+        return np.fromiter((self.index[task.id] for task in permutation),
+                           dtype=np.int64, count=len(permutation))
+
+    def decode(self, indices) -> List[Task]:
+        """Convierte un arreglo de índices en la lista de tareas correspondiente."""
+        return [self.tasks[i] for i in indices]
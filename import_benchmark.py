@@ -0,0 +1,66 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Benchmark del tiempo de importación: importa un módulo en intérpretes nuevos (sin nada cargado
+# de antemano) y falla si el mejor tiempo supera el presupuesto o si se cargó alguno de los módulos
+# que solo deben importarse al usarse. Uso:
+#     python import_benchmark.py [--module Simulation.PMAgent] [--budget 1.0] [--repeat 5]
+
+DEFAULT_MODULE = 'Simulation.PMAgent'
+DEFAULT_BUDGET = 1.0
+DEFAULT_REPEAT = 5
+
+# Dependencias pesadas u opcionales que se importan solo al construir el sistema difuso o al
+# generar reglas con el LLM
+DEFERRED_MODULES = ['skfuzzy', 'google.generativeai', 'dotenv']
+
+
+def import_time(module):
+    '''
+        Segundos que tarda `import module` en un intérprete nuevo y módulos de DEFERRED_MODULES
+        que quedaron cargados
+    '''
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, *[name for name in {DEFERRED_MODULES!r} if name in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed, *loaded = result.stdout.split()
+    return float(elapsed), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de importación de un módulo del proyecto')
+    parser.add_argument('--module', default=DEFAULT_MODULE)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='segundos')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    times = []
+    loaded = set()
+    for _ in range(args.repeat):
+        elapsed, modules = import_time(args.module)
+        times.append(elapsed)
+        loaded.update(modules)
+
+    best = min(times)
+    print(f"import {args.module}: best {best:.3f}s, mean {sum(times) / len(times):.3f}s "
+          f"({args.repeat} runs, budget {args.budget:.3f}s)")
+    failed = False
+    if best > args.budget:
+        print("FAIL: the import takes longer than the budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: modules loaded at import time: {', '.join(sorted(loaded))}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+import random
+import numpy as np
+import pytest
+from Tasks.task_table import TaskTable
+from tests.helpers import make_tasks
+
+
+@pytest.fixture
+def table():
+    random.seed(0)
+    np.random.seed(0)
+    return TaskTable(make_tasks(40, seed=7, floats=True, dependency_prob=0.12))
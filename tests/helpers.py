@@ -0,0 +1,86 @@
+import random
+import numpy as np
+from Tasks.task import Task
+from Tasks.GeneticAlgorithm.Crossover_operators import topological_repair
+from PMOntologic.Resource import Resource
+
+
+def make_tasks(n=20, seed=0, floats=False, dependency_prob=0.1):
+    '''
+        Tareas aleatorias (reproducibles con `seed`) con recursos y dependencias hacia tareas anteriores
+    '''
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        duration = rnd.randint(1, 30) + (rnd.random() if floats else 0)
+        task = Task(id=i * 3 + 7, priority=rnd.randint(1, 5), duration=duration, reward=rnd.randint(10, 200),
+                    start=rnd.randint(0, 50), deadline=rnd.randint(20, 15 * n), difficulty=rnd.randint(1, 80),
+                    problems_probability=rnd.random() * 0.3 + 0.01)
+        task.resources = [Resource(id=r, total=rnd.randint(1, 5)) for r in rnd.sample(['A', 'B', 'C', 'D'], rnd.randint(0, 2))]
+        for j in range(i):
+            if rnd.random() < dependency_prob:
+                task.dependencies.append(tasks[j])
+        tasks.append(task)
+    return tasks
+
+
+def random_permutations(table, n, seed=0):
+    '''
+        `n` permutaciones aleatorias de los índices de `table` (sin respetar las dependencias)
+    '''
+    rnd = random.Random(seed)
+    permutations = []
+    for _ in range(n):
+        permutation = list(range(len(table)))
+        rnd.shuffle(permutation)
+        permutations.append(permutation)
+    return np.array(permutations, dtype=np.int64)
+
+
+def feasible_permutations(table, n, seed=0):
+    '''
+        `n` permutaciones aleatorias de los índices de `table` que respetan las dependencias
+    '''
+    rnd = random.Random(seed)
+    permutations = []
+    for _ in range(n):
+        permutation = list(range(len(table)))
+        rnd.shuffle(permutation)
+        permutations.append(topological_repair(permutation, table))
+    return permutations
+
+
+def respects_dependencies(permutation):
+    '''
+        Si cada tarea de `permutation` aparece después de todas sus dependencias que están en ella
+    '''
+    position = {task.id: k for k, task in enumerate(permutation)}
+    return all(position.get(dependency.id, -1) < position[task.id]
+               for task in permutation for dependency in task.dependencies)
+
+
+def make_pm(n=20, seed=0, workers=None, **kwargs):
+    '''
+        PMAgent de un proyecto con las tareas de `make_tasks` y, si se dan, los trabajadores
+        `workers` [(id, problem_solving)]
+    '''
+    from PMOntologic.PMO import Project
+    from Simulation.PMAgent import PMAgent, PMperception
+    tasks = make_tasks(n, seed=seed)
+    resources = [Resource(id=r, total=40) for r in ['A', 'B', 'C', 'D']]
+    project = Project('p', tasks, resources, risks=[], opportunities=[])
+    kwargs.setdefault('planning_time_budget', 0.5)
+    pm = PMAgent(min_motivation_team=20, initial_perception=PMperception(reward=0, team_motivation=80),
+                 rules={}, active_rules=[], project=project, **kwargs)
+    if workers is not None:
+        pm.know_workers(workers)
+    return pm
+
+
+def assert_same(expected, actual):
+    '''
+        Mismos NaN en `expected` y `actual` y valores finitos iguales hasta 1e-12
+    '''
+    assert np.array_equal(np.isnan(expected), np.isnan(actual))
+    finite = ~np.isnan(expected)
+    assert np.all(np.abs(expected[finite] - actual[finite]) <= 1e-12)
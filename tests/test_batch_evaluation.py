@@ -0,0 +1,15 @@
+import pytest
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.Batch_evaluation import batch_optimization_function, get_batch_function
+from tests.helpers import make_tasks, random_permutations
+
+
+@pytest.mark.parametrize("floats", [False, True])
+def test_batch_matches_optimization_function(floats):
+    table = TaskTable(make_tasks(40, seed=2, floats=floats, dependency_prob=0.15))
+    index_matrix = random_permutations(table, 30)
+    batch = batch_optimization_function(index_matrix, table)
+    scalar = [optimization_function(table.decode(permutation)) for permutation in index_matrix]
+    assert batch.tolist() == scalar
+    assert get_batch_function(optimization_function) is batch_optimization_function
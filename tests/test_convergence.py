@@ -0,0 +1,62 @@
+import random
+import numpy as np
+from Tasks.task import Task
+from Tasks.GeneticAlgorithm.Convergence import ConvergenceMonitor, population_diversity, \
+    STOP_GENERATIONS, STOP_PLATEAU, STOP_DIVERSITY, STOP_TIME_BUDGET
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks
+
+
+def chain(n=6):
+    # Una sola permutación respeta las dependencias: todos los individuos son iguales
+    tasks = [Task(id=i, priority=1, duration=2, reward=10) for i in range(n)]
+    for previous, task in zip(tasks, tasks[1:]):
+        task.dependencies.append(previous)
+    return tasks
+
+
+def optimize(tasks, n_generations=30, **kwargs):
+    random.seed(0)
+    np.random.seed(0)
+    population = Population(10, tasks)
+    population.optimize(optimization_function, "maximize", n_generations=n_generations, **kwargs)
+    return population
+
+
+def test_plateau():
+    population = optimize(chain(), early_stopping=True, stopping_rounds=3, stopping_tolerance=1e-9)
+    assert optimize(chain(), n_generations=8, stopping_rounds=3, stopping_tolerance=1e-9).stop_reason \
+        == STOP_GENERATIONS
+    assert population.stop_reason == STOP_PLATEAU
+    assert len(population.history.column("best_fitness")) == 5
+
+
+def test_diversity_collapse():
+    population = optimize(chain(), min_diversity=0.01)
+    assert population.stop_reason == STOP_DIVERSITY
+    assert len(population.history.column("best_fitness")) == 1
+
+
+def test_time_budget():
+    population = optimize(make_tasks(15, seed=1), n_generations=1000, time_budget=0.0)
+    assert population.stop_reason == STOP_TIME_BUDGET
+    assert len(population.history.column("best_fitness")) == 1
+
+
+def test_all_generations():
+    population = optimize(make_tasks(15, seed=1), n_generations=4, early_stopping=True, stopping_rounds=10,
+                          stopping_tolerance=1e-9)
+    assert population.stop_reason == STOP_GENERATIONS
+
+
+def test_monitor_plateau_needs_stopping_rounds_small_changes():
+    monitor = ConvergenceMonitor(stopping_rounds=2, stopping_tolerance=0.5)
+    assert monitor.check(2, [None, 1.0, 0.1]) is None
+    assert monitor.check(3, [None, 1.0, 0.1, 0.2]) == STOP_PLATEAU
+
+
+def test_population_diversity():
+    best = np.arange(4)
+    assert population_diversity(np.array([best, best]), best) == 0.0
+    assert population_diversity(np.array([best, best[::-1]]), best) == 0.5
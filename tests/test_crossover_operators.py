@@ -0,0 +1,32 @@
+import random
+import pytest
+from Tasks.GeneticAlgorithm.Crossover_operators import CROSSOVER_METHODS, get_crossover_method, \
+    dependency_aware_crossover
+from Tasks.GeneticAlgorithm import Permutations_generator_heuristics as heuristics
+from tests.helpers import feasible_permutations, random_permutations, respects_dependencies
+
+
+def test_topological_repair(table):
+    for permutation in feasible_permutations(table, 10):
+        assert sorted(permutation.tolist()) == list(range(len(table)))
+        assert table.dependency_index().is_feasible(permutation)
+
+
+@pytest.mark.parametrize("method", list(CROSSOVER_METHODS))
+def test_crossover_keeps_precedences(table, method):
+    crossover = get_crossover_method(method)
+    parents = feasible_permutations(table, 20, seed=1)
+    for parent1, parent2 in zip(parents[::2], parents[1::2]):
+        child = crossover(parent1, parent2, table)
+        assert sorted(child.tolist()) == list(range(len(table)))
+        assert respects_dependencies(table.decode(child))
+
+
+def test_dependency_aware_crossover_matches_the_list_version(table):
+    parents = random_permutations(table, 20, seed=2)
+    for k, (parent1, parent2) in enumerate(zip(parents[::2], parents[1::2])):
+        random.seed(k)
+        child = dependency_aware_crossover(parent1, parent2, table)
+        random.seed(k)
+        expected = heuristics.dependency_aware_crossover(table.decode(parent1), table.decode(parent2))
+        assert table.decode(child) == expected
@@ -0,0 +1,79 @@
+import random
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.dependency_index import shared_dependency_index
+
+
+def make_graph(n=25, seed=0):
+    # Dependencias aleatorias en cualquier dirección: hay ciclos y autodependencias
+    rnd = random.Random(seed)
+    tasks = [Task(id=i, priority=1, duration=1, reward=1) for i in range(n)]
+    for task in tasks:
+        task.dependencies = rnd.sample(tasks, rnd.randint(0, 2))
+    return TaskTable(tasks)
+
+
+def reachable(i, edges):
+    seen = set()
+    stack = list(edges(i))
+    while stack:
+        j = stack.pop()
+        if j not in seen:
+            seen.add(j)
+            stack.extend(edges(j))
+    return seen
+
+
+def test_closure_matches_search_with_cycles():
+    for seed in range(5):
+        table = make_graph(seed=seed)
+        index = table.dependency_index()
+        dependencies = lambda i: table.dependencies_of(i).tolist()
+        ptr, idx = table.dependents()
+        dependents = lambda i: idx[ptr[i]:ptr[i + 1]].tolist()
+        for i in range(len(table)):
+            ancestors = reachable(i, dependencies)
+            assert set(index.ancestors(i).tolist()) == ancestors
+            assert set(index.descendants(i).tolist()) == reachable(i, dependents)
+            assert all(index.depends_on(i, j) == (j in ancestors) for j in range(len(table)))
+
+
+def test_feasible_prefix():
+    tasks = [Task(id=i, priority=1, duration=1, reward=1) for i in range(4)]
+    tasks[1].dependencies = [tasks[0]]
+    tasks[2].dependencies = [tasks[1], tasks[3]]
+    tasks[3].dependencies = [Task(id=9, priority=1, duration=1, reward=1)]
+    index = TaskTable(tasks).dependency_index()
+    assert index.feasible_prefix([0, 1, 3, 2]).tolist() == [True, True, False, True]
+    assert index.feasible_prefix([1, 0, 2, 3]).tolist() == [False, True, False, False]
+    assert not index.is_feasible([0, 1, 3, 2])
+    assert index.is_ready(1, index.mask([0])) and not index.is_ready(2, index.mask([0, 1]))
+
+
+def test_blocked_by_and_external_dependencies():
+    tasks = [Task(id=i, priority=1, duration=1, reward=1) for i in range(4)]
+    tasks[1].dependencies = [tasks[0]]
+    tasks[2].dependencies = [tasks[0], tasks[1]]
+    tasks[3].dependencies = [Task(id=9, priority=1, duration=1, reward=1)]
+    index = TaskTable(tasks).dependency_index()
+    assert index.blocked_by(index.mask([0])).tolist() == [False, True, True, False]
+    assert index.blocked_by(index.mask([1, 3])).tolist() == [False, False, True, False]
+    # Una dependencia fuera de la tabla nunca se completa
+    assert index.external == [False, False, False, True]
+    assert not index.is_ready(3, index.mask([0, 1, 2]))
+    assert index.is_ready(0, 0)
+
+
+def test_shared_dependency_index():
+    tasks = [Task(id=i, priority=1, duration=1, reward=1) for i in range(3)]
+    assert shared_dependency_index(tasks) is None
+    assert shared_dependency_index([]) is None
+    table = TaskTable(tasks)
+    table.bind()
+    assert shared_dependency_index(tasks) is table.dependency_index()
+    assert shared_dependency_index(tasks[::-1]) is table.dependency_index()
+    other = TaskTable([Task(id=5, priority=1, duration=1, reward=1)])
+    other.bind()
+    assert shared_dependency_index(tasks + other.tasks) is None
+    table.unbind()
+    assert shared_dependency_index(tasks) is None
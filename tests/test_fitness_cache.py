@@ -0,0 +1,53 @@
+import random
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Fitness_cache import FitnessCache
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks
+
+
+def test_hits_and_misses():
+    table = TaskTable(make_tasks(10, seed=1))
+    cache = FitnessCache()
+    key, sequence = cache.key(np.arange(10), table, optimization_function)
+    assert cache.get(key, sequence) is None
+    cache.put(key, sequence, 5.0)
+    assert cache.get(key, sequence) == 5.0
+    other_key, _ = cache.key(np.arange(10)[::-1], table, optimization_function)
+    assert other_key != key
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    table = TaskTable(make_tasks(10, seed=1))
+    cache = FitnessCache(max_size=2)
+    entries = [cache.key(np.roll(np.arange(10), k), table, optimization_function) for k in range(3)]
+    cache.put(*entries[0], 0.0)
+    cache.put(*entries[1], 1.0)
+    cache.get(*entries[0])
+    cache.put(*entries[2], 2.0)
+    assert len(cache) == 2
+    assert cache.get(*entries[1]) is None
+    assert cache.get(*entries[0]) == 0.0 and cache.get(*entries[2]) == 2.0
+
+
+def test_collision_is_not_a_hit():
+    table = TaskTable(make_tasks(10, seed=1))
+    cache = FitnessCache()
+    key, sequence = cache.key(np.arange(10), table, optimization_function)
+    _, other_sequence = cache.key(np.arange(10)[::-1], table, optimization_function)
+    cache.put(key, sequence, 5.0)
+    # Otra secuencia con la misma clave (colisión del hash)
+    assert cache.get(key, other_sequence) is None
+
+
+def test_cached_values_are_the_objective_values():
+    random.seed(0)
+    np.random.seed(0)
+    cache = FitnessCache()
+    population = Population(12, make_tasks(12, seed=3), fitness_cache=cache)
+    population.optimize(optimization_function, "maximize", n_generations=6, mutation_prob=0.05)
+    assert cache.hits > 0
+    for individual in population.last_generation[:12]:
+        assert individual.function_value == optimization_function(individual.variable_values)
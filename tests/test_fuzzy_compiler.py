@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from skfuzzy import control as ctrl
+from Tasks.fuzzy_compiler import CompiledFuzzySystem
+from Tasks.Optimization_function import create_fuzzy_system
+from Simulation.PMAgent import progress_control_system
+from tests.helpers import assert_same
+
+# skfuzzy llama a np.maximum con tres argumentos posicionales
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+def skfuzzy_outputs(control_system, values):
+    simulation = ctrl.ControlSystemSimulation(control_system)
+    labels = [antecedent.label for antecedent in control_system.antecedents]
+    output = next(iter(control_system.consequents)).label
+    results = []
+    for row in values:
+        for label, value in zip(labels, row):
+            simulation.input[label] = value
+        try:
+            simulation.compute()
+            results.append(simulation.output.get(output, np.nan))
+        except Exception:
+            results.append(np.nan)
+    return labels, output, np.array(results, dtype=np.float64)
+
+
+@pytest.mark.parametrize("control_system, highs", [
+    (progress_control_system(), [100, 100, 100, 100]),
+    (create_fuzzy_system(100, 500, 50, 10000, 80).ctrl, [100, 500, 50, 10000, 80]),
+])
+def test_compiled_system_matches_skfuzzy(control_system, highs):
+    rng = np.random.default_rng(0)
+    values = np.column_stack([rng.uniform(-0.1 * high, 1.1 * high, 200) for high in highs])
+    values[:20] = np.round(values[:20])
+    labels, output, expected = skfuzzy_outputs(control_system, values)
+
+    system = CompiledFuzzySystem(control_system)
+    assert_same(expected, system.evaluate_matrix(values))
+    single = [system.compute(**dict(zip(labels, row)))[output] for row in values]
+    assert_same(expected, np.array(single))
+
+
+def test_lookup_table_matches_grid_and_scalar_call():
+    system = CompiledFuzzySystem(progress_control_system())
+    table = system.lookup_table(grid_points=6)
+    assert table.grid.shape == (6,) * len(system.inputs)
+    # En los nodos de la malla la interpolación es la inferencia exacta
+    nodes = np.column_stack([axis[[0, 2, 5, 3]] for axis in table.axes])
+    assert_same(system.evaluate_matrix(nodes), table.evaluate(**dict(zip(table.inputs, nodes.T))))
+
+    rng = np.random.default_rng(2)
+    values = np.column_stack([rng.uniform(axis[0] - 5, axis[-1] + 5, 50) for axis in table.axes])
+    interpolated = table.evaluate(**dict(zip(table.inputs, values.T)))
+    single = np.array([table(**dict(zip(table.inputs, row))) for row in values])
+    assert_same(interpolated, single)
+    with pytest.raises(Exception):
+        system.lookup_table(grid_points=[6, 1, 6, 6])
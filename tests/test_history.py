@@ -0,0 +1,35 @@
+import random
+import numpy as np
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.History import HistoryRecorder, load_history
+from tests.helpers import make_tasks
+
+
+def test_summary_statistics_are_finite():
+    random.seed(0)
+    np.random.seed(0)
+    population = Population(20, make_tasks(15, seed=1))
+    population.optimize(optimization_function, "maximize", n_generations=4)
+    for field in ["mean_fitness", "std_fitness", "min_fitness", "best_fitness"]:
+        column = population.history.column(field)
+        assert len(column) == 4
+        assert np.all(np.isfinite(column))
+    assert np.all(population.history.column("min_fitness") <= population.history.column("best_fitness"))
+
+
+def test_ring_buffer_keeps_the_newest_rows():
+    recorder = HistoryRecorder(level="summary", capacity=3)
+    for generation in range(5):
+        recorder.record(generation, np.array([1.0, 2.0]), 2.0, 2.0)
+    assert recorder.column("generation").tolist() == [2, 3, 4]
+    assert recorder.n_recorded == 5
+
+
+def test_chunks_written_to_disk(tmp_path):
+    path = str(tmp_path / "history")
+    recorder = HistoryRecorder(level="best", capacity=2, path=path)
+    for generation in range(5):
+        recorder.record(generation, np.array([1.0]), 1.0, 1.0, best_permutation=np.arange(3))
+    recorder.flush()
+    assert load_history(path)["generation"].tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,49 @@
+import pickle
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Tasks.GeneticAlgorithm.Island_model import IslandModel, island_executor, _evolve_worker
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks
+
+
+def run(n_jobs=1, executor=None):
+    islands = IslandModel(3, 10, make_tasks(15, seed=9), n_jobs=n_jobs, seed=4)
+    islands.optimize(optimization_function, "maximize", n_generations=6, migration_interval=2,
+                     executor=executor)
+    return islands
+
+
+def test_in_process_run_keeps_the_global_random_state():
+    random.seed(1)
+    np.random.seed(1)
+    expected = (random.random(), np.random.random())
+    random.seed(1)
+    np.random.seed(1)
+    run()
+    assert (random.random(), np.random.random()) == expected
+
+
+def test_processes_match_the_in_process_run():
+    serial = run()
+    # Más procesos que islas: algún proceso recibe su primera isla después de
+    # la primera época y pide las tareas de la optimización
+    executor = island_executor(5)
+    try:
+        parallel = run(n_jobs=3, executor=executor)
+    finally:
+        executor.shutdown()
+    assert parallel.optimal_fitness == serial.optimal_fitness
+    assert parallel.best_fitness_history == serial.best_fitness_history
+
+
+def test_worker_without_the_tasks_asks_for_them():
+    epoch = {"permutations": None, "immigrants": np.empty((0, 15), dtype=np.int32), "seed": 0,
+             "n_individuals": 6, "optimization": "maximize", "n_generations": 1, "optimize_kwargs": {}}
+    registration = pickle.dumps((make_tasks(15, seed=9), optimization_function))
+    with ProcessPoolExecutor(1) as executor:
+        assert executor.submit(_evolve_worker, ("key", None, epoch)).result() is None
+        first = executor.submit(_evolve_worker, ("key", registration, epoch)).result()
+        again = executor.submit(_evolve_worker, ("key", None, epoch)).result()
+    assert again is not None and again["fitness"] == first["fitness"]
+    assert len(pickle.dumps(("key", None, epoch))) < len(registration) / 5
@@ -0,0 +1,30 @@
+import pytest
+import Simulation.PMAgent as pm_agent
+from Simulation.PMAgent import progress_control_system, progress_system
+from import_benchmark import import_time
+from tests.helpers import make_pm
+
+# skfuzzy llama a np.maximum con tres argumentos posicionales
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+def test_importing_the_agent_defers_optional_modules():
+    _, loaded = import_time('Simulation.PMAgent')
+    assert loaded == []
+
+
+def test_progress_system_built_once(monkeypatch):
+    system = progress_system()
+    assert progress_system() is system
+    assert progress_control_system() is progress_control_system()
+
+    def build_again():
+        raise AssertionError("the progress control system was built again")
+
+    # Los agentes nuevos reutilizan el sistema ya compilado
+    monkeypatch.setattr(pm_agent, 'create_progress_control_system', build_again)
+    for seed in range(2):
+        pm = make_pm(n=12, seed=seed, workers=[(1, 40), (2, 70)])
+        pm.generate_milestones(3)
+        assert len(pm.beliefs['milestones']['milestones']) > 0
+    assert progress_system() is system
@@ -0,0 +1,32 @@
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.List_scheduler import list_schedule, list_schedule_indices
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks, respects_dependencies
+
+
+def test_list_schedule_keeps_precedences():
+    tasks = make_tasks(40, seed=8, floats=True, dependency_prob=0.12)
+    order, score = list_schedule(tasks)
+    assert sorted(task.id for task in order) == sorted(task.id for task in tasks)
+    assert respects_dependencies(order)
+    assert score == optimization_function(order)
+    assert list_schedule(tasks)[0] == order
+
+
+def test_least_slack_first_and_late_tasks_last():
+    tasks = [
+        Task(id=0, priority=1, duration=5, reward=10, deadline=100),
+        Task(id=1, priority=1, duration=5, reward=10, deadline=6),
+        Task(id=2, priority=1, duration=5, reward=10, deadline=12),
+        # No puede terminar a tiempo: va detrás de las que sí llegan
+        Task(id=3, priority=1, duration=5, reward=10, deadline=1),
+    ]
+    assert list_schedule_indices(TaskTable(tasks)).tolist() == [1, 2, 0, 3]
+
+
+def test_tasks_of_a_cycle_go_last():
+    tasks = [Task(id=i, priority=1, duration=1, reward=1) for i in range(4)]
+    tasks[0].dependencies = [tasks[1]]
+    tasks[1].dependencies = [tasks[0]]
+    assert list_schedule_indices(TaskTable(tasks)).tolist() == [2, 3, 0, 1]
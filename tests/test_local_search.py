@@ -0,0 +1,31 @@
+import time
+import pytest
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Local_search import LocalSearch
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks, feasible_permutations, respects_dependencies
+
+
+@pytest.mark.parametrize("method", ["hill_climbing", "annealing", "memetic"])
+def test_local_search_keeps_precedences(table, method):
+    local_search = LocalSearch(table)
+    for permutation in feasible_permutations(table, 3, seed=3):
+        refined, score = local_search.refine(permutation, method=method)
+        assert respects_dependencies(table.decode(refined))
+        assert score == optimization_function(table.decode(refined))
+        assert score >= optimization_function(table.decode(permutation))
+
+
+def test_refine_respects_the_time_budget():
+    table = TaskTable(make_tasks(300, seed=9, floats=True, dependency_prob=0.01))
+    permutation = feasible_permutations(table, 1)[0]
+    start = time.time()
+    refined, score = LocalSearch(table).refine(permutation, method="memetic", time_budget=0.2)
+    assert time.time() - start < 1.0
+    assert respects_dependencies(table.decode(refined))
+    assert score >= optimization_function(table.decode(permutation))
+
+
+def test_max_segment_must_be_at_least_two(table):
+    with pytest.raises(Exception):
+        LocalSearch(table, max_segment=1)
@@ -0,0 +1,65 @@
+import random
+import numpy as np
+from Tasks.GeneticAlgorithm.Multi_objective import OBJECTIVES, DEFAULT_OBJECTIVES, PLANNER_OBJECTIVES, \
+    PRIORITY_OBJECTIVES, objective_matrix, objective_columns, dominance_matrix, non_dominated_sort, \
+    crowding_distance, select_survivors
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks, random_permutations
+
+# Frente construido a mano (maximizando ambas columnas):
+#   frente 0: (3, 1), (2, 2), (1, 3)
+#   frente 1: (2, 1)          dominado por (3, 1) y (2, 2)
+#   frente 2: (1, 1)          dominado por (2, 1)
+#   frente 3: (0, 0)
+VALUES = np.array([[3, 1], [2, 2], [1, 3], [1, 1], [2, 1], [0, 0]], dtype=float)
+
+
+def test_dominance_and_fronts():
+    dominates = dominance_matrix(VALUES)
+    assert dominates[0, 4] and dominates[1, 4] and not dominates[2, 4]
+    assert not dominates[0, 1] and not dominates[1, 0]
+    assert not np.any(np.diag(dominates))
+    assert non_dominated_sort(VALUES).tolist() == [0, 0, 0, 2, 1, 3]
+
+
+def test_crowding_distance():
+    ranks = non_dominated_sort(VALUES)
+    distance = crowding_distance(VALUES, ranks)
+    # Extremos del frente 0 y frentes de un solo miembro: distancia infinita
+    assert np.isinf(distance[[0, 2, 3, 4, 5]]).all()
+    # (2, 2): hueco normalizado de 1 en cada objetivo
+    assert np.isclose(distance[1], 2.0)
+
+
+def test_select_survivors():
+    survivors, ranks, distance = select_survivors(VALUES, 4)
+    assert list(survivors[:3]) in ([0, 2, 1], [2, 0, 1])
+    assert survivors[3] == 4
+    assert ranks.tolist() == non_dominated_sort(VALUES).tolist()
+
+
+def test_objective_breakdown_matches_optimization_function(table):
+    index_matrix = random_permutations(table, 20, seed=3)
+    values = objective_matrix(index_matrix, table)
+    assert values.shape == (20, len(OBJECTIVES))
+    total = values[:, objective_columns(DEFAULT_OBJECTIVES)].sum(axis=1)
+    expected = [optimization_function(table.decode(permutation)) for permutation in index_matrix]
+    assert np.allclose(total, expected)
+
+
+def test_pareto_front_and_selection():
+    random.seed(0)
+    np.random.seed(0)
+    population = Population(20, make_tasks(15, seed=4, dependency_prob=0.1))
+    front = population.optimize_multiobjective(objectives=PLANNER_OBJECTIVES, n_generations=10,
+                                               mutation_prob=0.05)
+    assert len(front) == len(population.pareto_objectives) > 0
+    values = population.pareto_objectives[:, objective_columns(PLANNER_OBJECTIVES)]
+    assert not dominance_matrix(values).any()
+
+    for priority, objective in PRIORITY_OBJECTIVES.items():
+        selected = population.select_from_front(priority)
+        column = population.pareto_objectives[:, objective_columns([objective])[0]]
+        index = [individual.variable_values for individual in front].index(selected)
+        assert column[index] == column.max()
@@ -0,0 +1,43 @@
+import random
+import numpy as np
+import pytest
+from Tasks.GeneticAlgorithm.Mutation_operators import MUTATION_OPERATORS, Mutator, AdaptiveRate
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks, feasible_permutations, respects_dependencies
+
+
+@pytest.mark.parametrize("operator", MUTATION_OPERATORS)
+def test_mutation_keeps_precedences(table, operator):
+    mutator = Mutator(table, operators=[operator])
+    for permutation in feasible_permutations(table, 10, seed=2):
+        mutator.mutate(permutation, 0.3)
+        assert sorted(permutation.tolist()) == list(range(len(table)))
+        assert respects_dependencies(table.decode(permutation))
+
+
+def test_operators_of_a_single_call(table):
+    mutator = Mutator(table, operators=["swap"], weights=[1])
+    calls = []
+    mutator.insertion = lambda permutation: calls.append("insertion") or True
+    permutation = feasible_permutations(table, 1)[0]
+    changes = mutator.mutate(permutation, 0.5, operators=["insertion"])
+    assert changes == len(calls) > 0 and set(calls) == {"insertion"}
+    with pytest.raises(Exception):
+        mutator.mutate(permutation, 0.5, operators=["rotate"])
+
+
+def test_adaptive_rate():
+    rate = AdaptiveRate(0.1, min_rate=0.05, max_rate=0.2, factor=2)
+    assert rate.update(False) == 0.2 and rate.update(False) == 0.2
+    assert rate.update(True) == 0.1 and rate.update(True) == 0.05 and rate.update(True) == 0.05
+
+
+def test_new_generation_has_only_evaluated_individuals():
+    random.seed(0)
+    np.random.seed(0)
+    population = Population(12, make_tasks(15, seed=1))
+    population.optimize(optimization_function, "maximize", n_generations=3, mutation_prob=0.1)
+    population.create_new_generation(mutation_pob=10, mutation_prob=0.1)
+    assert len(population.individuals) == 12
+    assert all(respects_dependencies(individual.variable_values) for individual in population.individuals)
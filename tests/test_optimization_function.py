@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import numpy as np
+import pytest
+from Tasks.fuzzy_compiler import CompiledFuzzySystem
+from Tasks.Optimization_function import create_fuzzy_system, evaluate_permutation, evaluate_permutations, \
+    compile_fuzzy_system, default_fuzzy_system, QUALITY_INPUTS
+from tests.helpers import assert_same
+
+# skfuzzy llama a np.maximum con tres argumentos posicionales
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+def test_evaluate_permutations_matches_evaluate_permutation():
+    quality_eval = create_fuzzy_system(100, 500, 50, 10000, 80)
+    rng = np.random.default_rng(1)
+    values = np.column_stack([rng.uniform(0, high, 100) for high in [100, 500, 50, 10000, 80]])
+    values[:3] = [[100, 500, 10, 10000, 79], [0, 0, 0, 0, 0], [120, -3, 60, 20000, 100]]
+    expected = []
+    for row in values:
+        quality = evaluate_permutation(quality_eval, *row)
+        expected.append(np.nan if quality is None else quality)
+    assert_same(np.array(expected), evaluate_permutations(quality_eval, values))
+
+
+def test_compiled_once_per_control_system():
+    quality_eval = create_fuzzy_system(100, 500, 50, 10000, 80)
+    system = compile_fuzzy_system(quality_eval)
+    assert isinstance(system, CompiledFuzzySystem)
+    assert compile_fuzzy_system(quality_eval) is system
+    assert compile_fuzzy_system(system) is system
+    assert compile_fuzzy_system(create_fuzzy_system(100, 500, 50, 10000, 80)) is not system
+    # Una sola fila también se evalúa como lote
+    assert evaluate_permutations(system, [50, 250, 25, 5000, 40]).shape == (1,)
+
+
+def test_wrong_number_of_columns():
+    quality_eval = create_fuzzy_system(100, 500, 50, 10000, 80)
+    with pytest.raises(Exception):
+        evaluate_permutations(quality_eval, np.zeros((4, len(QUALITY_INPUTS) - 1)))
+
+
+def test_import_has_no_side_effects():
+    code = ("import sys\n"
+            "import Tasks.Optimization_function\n"
+            "print(*[name for name in ['skfuzzy', 'matplotlib'] if name in sys.modules])\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_default_fuzzy_system_is_cached():
+    quality_eval = default_fuzzy_system()
+    assert default_fuzzy_system() is quality_eval
+    assert np.isclose(evaluate_permutation(quality_eval, 50, 250, 25, 5000, 40),
+                      evaluate_permutations(quality_eval, [50, 250, 25, 5000, 40])[0])
+    # Sin ninguna regla activa devuelve None en lugar de lanzar KeyError
+    assert evaluate_permutation(quality_eval, 100, 500, 10, 10000, 79) is None
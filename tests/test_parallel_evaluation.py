@@ -0,0 +1,37 @@
+import random
+import numpy as np
+import pytest
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Parallel_evaluation import ParallelEvaluator
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from tests.helpers import make_tasks
+
+
+def optimize(n_jobs, **kwargs):
+    random.seed(3)
+    np.random.seed(3)
+    population = Population(16, make_tasks(20, seed=2, floats=True))
+    try:
+        population.optimize(optimization_function, "maximize", n_generations=5, n_jobs=n_jobs, **kwargs)
+    finally:
+        population.shutdown_evaluator()
+    return population
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_processes_give_the_serial_result(vectorized):
+    serial = optimize(None)
+    parallel = optimize(2, vectorized=vectorized)
+    assert parallel.optimal_fitness == serial.optimal_fitness
+    assert [task.id for task in parallel.optimal_variable_values] \
+        == [task.id for task in serial.optimal_variable_values]
+    assert parallel.history.column("best_fitness").tolist() == serial.history.column("best_fitness").tolist()
+
+
+def test_evaluator_matches_the_objective_function():
+    tasks = make_tasks(20, seed=4, floats=True)
+    rnd = random.Random(0)
+    index_matrix = np.array([rnd.sample(range(len(tasks)), len(tasks)) for _ in range(7)])
+    with ParallelEvaluator(tasks, optimization_function, n_jobs=2) as evaluator:
+        values = evaluator.evaluate(index_matrix)
+    assert values.tolist() == [optimization_function([tasks[i] for i in row]) for row in index_matrix]
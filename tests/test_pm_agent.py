@@ -0,0 +1,79 @@
+import random
+import time
+import numpy as np
+import pytest
+from collections import deque
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Simulation.PMAgent import PMperception
+from tests.helpers import make_pm
+
+
+def setup_function():
+    random.seed(0)
+    np.random.seed(0)
+
+
+def test_planning_objective_is_reused_while_the_budget_does_not_change():
+    pm = make_pm(resource_aware=True)
+    budget = dict(pm.beliefs['resources'])
+    objective = pm.planning_objective(budget)
+    assert objective is pm.objective_function
+    assert pm.planning_objective(dict(budget)) is objective
+    budget['A'] -= 5
+    changed = pm.planning_objective(budget)
+    assert changed is not objective and changed.budget == budget
+
+
+def test_parallel_objective_is_rebuilt_when_the_capacities_change():
+    pm = make_pm(n_workers=2, workers=[('W0', 40), ('W1', 60)])
+    objective = pm.planning_objective(pm.beliefs['resources'], pm.known_problem_solving())
+    assert pm.planning_objective(pm.beliefs['resources'], [40, 60]) is objective
+    assert pm.planning_objective(pm.beliefs['resources'], [40, 63]).problem_solving == [40, 63]
+    assert make_pm().planning_objective({}) is optimization_function
+
+
+def test_replans_share_the_fitness_cache_entries():
+    pm = make_pm(resource_aware=True)
+    pm.replan(time_budget=0.2)
+    pm.replan(time_budget=0.2)
+    objectives = {key[0] for key in pm.fitness_cache._entries}
+    assert objectives == {pm.objective_function}
+
+
+def test_act_replans_after_a_new_problem():
+    pm = make_pm(workers=[('W0', 40), ('W1', 60)])
+    replans = []
+    pm.replan = lambda: replans.append(list(pm.ordered_tasks))
+    problem = pm.ordered_tasks[0].id
+    pm.act(PMperception(reward=0, actual_time=10, problems=[problem], team_motivation=80))
+    assert len(replans) == 1 and not pm.plan_outdated
+    pm.act(PMperception(reward=0, actual_time=20, problems=[problem], team_motivation=80))
+    assert len(replans) == 1
+
+    pm.replan_on_change = False
+    pm.ordered_tasks[0].status = -1
+    pm.act(PMperception(reward=0, actual_time=30, team_motivation=80))
+    assert len(replans) == 1 and pm.plan_outdated
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"resource_aware": True}, {"local_search": "hill_climbing"}])
+def test_replan_is_never_worse_than_the_current_plan(kwargs):
+    pm = make_pm(n=30, **kwargs)
+    # Plan actual peor que el del constructor: el orden de la tabla del proyecto
+    pm.ordered_tasks = deque(pm.project.tasks.values())
+    objective = pm.planning_objective(pm.beliefs['resources'])
+    before = objective(list(pm.ordered_tasks))
+    pending = {task.id for task in pm.ordered_tasks}
+    start = time.time()
+    plan = pm.replan(time_budget=0.3)
+    assert time.time() - start < 0.3 + 0.5
+    assert {task.id for task in plan} == pending
+    assert objective(plan) >= before
+
+
+def test_replan_drops_completed_tasks():
+    pm = make_pm()
+    done = pm.ordered_tasks[3]
+    done.status = 1
+    plan = pm.replan(time_budget=0.1)
+    assert done not in plan and len(plan) == len(pm.project.tasks) - 1
@@ -0,0 +1,34 @@
+import random
+import numpy as np
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Population import Population
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.Prefix_scoring import PrefixScore, first_difference
+from tests.helpers import make_tasks, random_permutations
+
+
+def test_prefix_rescore_matches_full_evaluation():
+    table = TaskTable(make_tasks(40, seed=3, floats=True, dependency_prob=0.15))
+    rnd = random.Random(1)
+    for permutation in random_permutations(table, 10, seed=2):
+        parent = PrefixScore(permutation, table)
+        assert parent.score == optimization_function(table.decode(permutation))
+        child = permutation.copy()
+        i, j = sorted(rnd.sample(range(len(child)), 2))
+        child[i], child[j] = child[j], child[i]
+        for start in [None, i]:
+            assert parent.rescore(child, start=start).score == optimization_function(table.decode(child))
+
+
+def test_first_difference():
+    assert first_difference(np.array([1, 2, 3]), np.array([1, 4, 3])) == 1
+    assert first_difference(np.array([1, 2]), np.array([1, 2, 3])) == 2
+
+
+def test_incremental_evaluation_of_a_population():
+    random.seed(0)
+    np.random.seed(0)
+    population = Population(12, make_tasks(20, seed=5, floats=True))
+    population.optimize(optimization_function, "maximize", n_generations=5, mutation_prob=0.1, incremental=True)
+    for individual in population.last_generation[:12]:
+        assert individual.function_value == optimization_function(individual.variable_values)
@@ -0,0 +1,35 @@
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Tasks_combination import optimization_function
+from Tasks.GeneticAlgorithm.Batch_evaluation import get_batch_function
+from Tasks.GeneticAlgorithm.Resource_evaluation import ResourceAwareObjective
+from PMOntologic.Resource import Resource
+from tests.helpers import make_tasks, random_permutations
+
+
+def test_resource_aware_batch_matches_call():
+    table = TaskTable(make_tasks(30, seed=4, floats=True, dependency_prob=0.1))
+    objective = ResourceAwareObjective({'A': 12, 'B': 8, 'C': 20})
+    index_matrix = random_permutations(table, 20, seed=3)
+    batch = get_batch_function(objective)(index_matrix, table)
+    scalar = [objective(table.decode(permutation)) for permutation in index_matrix]
+    assert batch.tolist() == scalar
+
+
+def test_overdraft_and_early_start_penalties():
+    first = Task(id=0, priority=2, duration=5, reward=50, start=0, deadline=100)
+    second = Task(id=1, priority=1, duration=2, reward=50, start=10, deadline=100)
+    first.resources = [Resource(id='A', total=3)]
+    second.resources = [Resource(id='A', total=2), Resource(id='B', total=50)]
+    objective = ResourceAwareObjective({'A': 4}, overdraft_penalty=100, early_start_penalty=1)
+
+    # `second` sobregira A (3 + 2 > 4; B no tiene límite) y empieza en 5 en vez de en 10
+    penalty = (5 - 1) * 100 + (10 - 5) * (5 - 1) * 1
+    assert objective([first, second]) == optimization_function([first, second]) - penalty
+    # En el otro orden sólo `first` sobregira y `second` empieza antes de tiempo
+    penalty = (5 - 2) * 100 + (10 - 0) * (5 - 1) * 1
+    assert objective([second, first]) == optimization_function([second, first]) - penalty
+
+    table = TaskTable([first, second])
+    assert get_batch_function(objective)([[0, 1], [1, 0]], table).tolist() \
+        == [objective([first, second]), objective([second, first])]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+from Tasks.GeneticAlgorithm.Batch_evaluation import batch_optimization_function, get_batch_function
+from Tasks.GeneticAlgorithm.Schedule_decoder import decode_schedule, task_finish_times, \
+    parallel_finish_times, ParallelScheduleObjective
+from tests.helpers import make_tasks, random_permutations
+
+
+def test_decode_schedule_waits_for_dependencies():
+    # Posición 2 depende de la 0 y la 3 de la 1, con 2 trabajadores:
+    #   t0: trabajador 0 [0, 4)   t1: trabajador 1 [0, 2)
+    #   t2: trabajador 1 libre en 2, espera a t0 -> [4, 7)
+    #   t3: trabajador 0 libre en 4 -> [4, 5)
+    dependencies = [[], [], [0], [1]]
+    assert decode_schedule([4, 2, 3, 1], [10, 10, 10, 10], dependencies, 2) == [4, 2, 7, 5]
+    # El trabajador 0 (capacidad 50) tarda 4 * 80 / 50 en la tarea 0
+    finish = decode_schedule([4, 2, 3, 1], [80, 10, 10, 10], dependencies, 2, problem_solving=[50, 100])
+    assert np.allclose(finish, [6.4, 2, 9.4, 7.4])
+
+
+def test_task_and_table_versions_agree():
+    tasks = [Task(id=i, priority=1, duration=d, reward=10, difficulty=10) for i, d in enumerate([4, 2, 3, 1])]
+    tasks[2].dependencies.append(tasks[0])
+    tasks[3].dependencies.append(tasks[1])
+    table = TaskTable(tasks)
+    assert task_finish_times(tasks, 2) == [4, 2, 7, 5]
+    assert parallel_finish_times([0, 1, 2, 3], table, 2).tolist() == [4, 2, 7, 5]
+    # Una dependencia colocada después no hace esperar
+    assert task_finish_times([tasks[2], tasks[0]], 2) == [3, 4]
+    assert parallel_finish_times([2, 0], table, 2).tolist() == [3, 4]
+
+
+def test_parallel_schedule_with_one_worker_is_optimization_function():
+    table = TaskTable(make_tasks(30, seed=5, floats=True, dependency_prob=0.1))
+    index_matrix = random_permutations(table, 20, seed=4)
+    assert ParallelScheduleObjective(1).batch(index_matrix, table).tolist() \
+        == batch_optimization_function(index_matrix, table).tolist()
+
+
+@pytest.mark.parametrize("problem_solving", [None, [20, 50, 80]])
+def test_parallel_schedule_batch_matches_call(problem_solving):
+    table = TaskTable(make_tasks(30, seed=6, floats=True, dependency_prob=0.1))
+    objective = ParallelScheduleObjective(3, problem_solving=problem_solving)
+    index_matrix = random_permutations(table, 20, seed=5)
+    batch = get_batch_function(objective)(index_matrix, table)
+    scalar = [objective(table.decode(permutation)) for permutation in index_matrix]
+    assert batch.tolist() == scalar
@@ -0,0 +1,53 @@
+import pickle
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from Tasks.fuzzy_compiler import SharedFuzzySystem
+from Simulation.PMAgent import progress_control_system, progress_system
+
+INPUTS = dict(motivation=70, problem_solving=40, reward=55, progress=30)
+
+
+def test_compiled_once_under_concurrent_first_calls():
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return progress_control_system()
+
+    shared = SharedFuzzySystem(builder)
+    barrier = threading.Barrier(8)
+    systems = []
+
+    def first_call():
+        barrier.wait()
+        systems.append(shared())
+
+    threads = [threading.Thread(target=first_call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert len(systems) == 8 and all(system is systems[0] for system in systems)
+
+
+def test_pickle_does_not_send_the_compiled_system():
+    shared = SharedFuzzySystem(progress_control_system)
+    system = shared()
+    copy = pickle.loads(pickle.dumps(shared))
+    assert copy._system is None
+    assert copy().compute(**INPUTS) == system.compute(**INPUTS)
+
+
+def test_threads_match_serial_evaluation():
+    system = progress_system()
+    values = np.random.default_rng(3).uniform(-5, 105, (400, len(system.inputs)))
+
+    def evaluate(row):
+        return system.compute(**dict(zip(system.inputs, row)))['milestone_type']
+
+    serial = np.array([evaluate(row) for row in values])
+    with ThreadPoolExecutor(8) as executor:
+        parallel = np.array(list(executor.map(evaluate, values)))
+    assert np.array_equal(serial, parallel, equal_nan=True)
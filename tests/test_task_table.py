@@ -0,0 +1,28 @@
+from Tasks.task import Task
+from Tasks.task_table import TaskTable
+
+
+def test_mixed_column_keeps_python_types():
+    tasks = [Task(id=1, priority=1, duration=10, reward=5), Task(id=2, priority=2, duration=2.5, reward=7)]
+    table = TaskTable(tasks, bind=True)
+    assert table.duration.dtype.kind == 'f'
+    assert tasks[0].duration == 10 and type(tasks[0].duration) is int
+    assert type(tasks[1].duration) is float
+
+    table.unbind()
+    assert type(tasks[0].duration) is int and type(tasks[1].duration) is float
+
+
+def test_assignment_keeps_the_assigned_type():
+    tasks = [Task(id=1, priority=1, duration=10, reward=5), Task(id=2, priority=2, duration=4, reward=7)]
+    table = TaskTable(tasks, bind=True)
+    assert table.duration.dtype.kind == 'i'
+
+    tasks[0].duration = 3.0
+    assert table.duration.dtype.kind == 'f'
+    assert type(tasks[0].duration) is float and tasks[0].duration == 3.0
+    assert type(tasks[1].duration) is int and tasks[1].duration == 4
+
+    tasks[0].duration = 6
+    assert type(tasks[0].duration) is int and tasks[0].duration == 6
+    assert table.duration.tolist() == [6.0, 4.0]